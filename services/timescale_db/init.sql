@@ -1,22 +1,381 @@
 CREATE EXTENSION IF NOT EXISTS timescaledb;
 
+-- The values of src.libs.sentiment_analysis.base.Sentiment, 4 bytes per row
+CREATE TYPE sentiment AS ENUM ('positive', 'negative', 'neutral', 'unknown', 'invalid');
+
+-- The URL articles are deduplicated by: surrounding whitespace and the fragment removed, the scheme and host
+-- lowercased and the trailing slashes of the path removed. Must match db_helpers.canonical_url.
+CREATE FUNCTION canonical_url(url TEXT) RETURNS TEXT
+LANGUAGE SQL IMMUTABLE STRICT PARALLEL SAFE AS $$
+    SELECT COALESCE(lower(substring(path FROM '^[A-Za-z][A-Za-z0-9+.-]*://[^/]*')), '')
+        || regexp_replace(path, '^[A-Za-z][A-Za-z0-9+.-]*://[^/]*', '')
+        || query
+    FROM (
+        SELECT
+            rtrim(split_part(trimmed, '?', 1), '/') AS path,
+            CASE WHEN strpos(trimmed, '?') > 0 THEN substr(trimmed, strpos(trimmed, '?')) ELSE '' END AS query
+        FROM (SELECT split_part(btrim(url, E' \t\r\n'), '#', 1) AS trimmed) fragmentless
+    ) parts
+$$;
+
+-- Dimension tables, so that articles rows hold small ids instead of repeating the names
+-- (see db_helpers.dimension_ids). Ids are never reused or renamed.
+CREATE TABLE article_topics (
+    id SMALLINT GENERATED ALWAYS AS IDENTITY PRIMARY KEY,
+    name VARCHAR(255) NOT NULL UNIQUE
+);
+
+CREATE TABLE article_sources (
+    id INTEGER GENERATED ALWAYS AS IDENTITY PRIMARY KEY,
+    name VARCHAR(255) NOT NULL UNIQUE
+);
+
+-- Versions of the models (and settings) that scored the articles, see SentimentAnalyzer.model_version
+CREATE TABLE model_versions (
+    id SMALLINT GENERATED ALWAYS AS IDENTITY PRIMARY KEY,
+    name VARCHAR(255) NOT NULL UNIQUE
+);
+
 CREATE TABLE articles (
     id SERIAL,
-    topic VARCHAR(255) NOT NULL,
     published_at TIMESTAMPTZ NOT NULL,
-    source_name VARCHAR(255),
+    topic_id SMALLINT NOT NULL REFERENCES article_topics (id),
+    sentiment sentiment NOT NULL,
+    source_id INTEGER REFERENCES article_sources (id),
     author VARCHAR(255),
     title TEXT,
     description TEXT,
-    url TEXT UNIQUE,
+    url TEXT,
+    -- MD5 of canonical_url(url), 16 bytes instead of the whole URL in the upsert key (see db_helpers.url_hash)
+    url_hash UUID,
     url_to_image TEXT,
     content TEXT,
-    sentiment VARCHAR(20) NOT NULL,
     created_at TIMESTAMPTZ DEFAULT NOW(),
+    -- Probabilities behind the sentiment (see sentiment_analysis.base.Scores), NULL where a model was not run
+    relevance_entailment REAL,
+    relevance_neutral REAL,
+    relevance_contradiction REAL,
+    sentiment_positive REAL,
+    sentiment_negative REAL,
+    sentiment_neutral REAL,
+    model_version_id SMALLINT REFERENCES model_versions (id),
+    -- Full-text search of the article explorer (visual/database/pages), titles weigh most
+    search_vector TSVECTOR GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', COALESCE(title, '')), 'A') ||
+        setweight(to_tsvector('english', COALESCE(description, '')), 'B') ||
+        setweight(to_tsvector('english', COALESCE(content, '')), 'C')
+    ) STORED,
+    PRIMARY KEY (id, published_at)
+);
+
+SELECT create_hypertable('articles', 'published_at', chunk_time_interval => INTERVAL '7 days');
+
+-- Upsert key of the ingest (ON CONFLICT in db_helpers): an article is stored once per topic it is about.
+-- A unique index on a hypertable must include the time column, which also keeps every conflict check
+-- inside the one chunk the article belongs to.
+CREATE UNIQUE INDEX idx_articles_url_hash ON articles (url_hash, topic_id, published_at);
+
+-- Keyset pagination of the article explorer, newest first, and the same filtered by topic
+CREATE INDEX idx_articles_time_id ON articles (published_at DESC, id DESC);
+CREATE INDEX idx_topic_time ON articles (topic_id, published_at DESC, id DESC);
+CREATE INDEX idx_articles_source_time ON articles (source_id, published_at DESC) WHERE source_id IS NOT NULL;
+-- Sentiment has five values, only the rare failed ones are worth an index (to inspect or re-score them)
+CREATE INDEX idx_articles_unscored ON articles (published_at DESC, id DESC) WHERE sentiment IN ('unknown', 'invalid');
+CREATE INDEX idx_articles_search ON articles USING GIN (search_vector);
+
+-- The articles as they looked before the dimension tables, with names instead of ids, for ad-hoc queries
+CREATE VIEW articles_named AS
+SELECT
+    a.id, t.name AS topic, a.published_at, s.name AS source_name, a.author, a.title, a.description,
+    a.url, a.url_to_image, a.content, a.sentiment::TEXT AS sentiment, a.created_at
+FROM articles a
+JOIN article_topics t ON t.id = a.topic_id
+LEFT JOIN article_sources s ON s.id = a.source_id;
+
+-- Relevance of an article from its stored NLI probabilities, as the ABSA analyzer decides it
+-- (see ABSASentimentAnalyzer._is_relevant): irrelevant when contradiction is the most likely
+-- label, or when neutral is and reaches the threshold
+CREATE OR REPLACE FUNCTION is_relevant_by_scores(entailment REAL, neutral REAL, contradiction REAL, threshold REAL)
+RETURNS BOOLEAN LANGUAGE SQL IMMUTABLE STRICT PARALLEL SAFE AS $$
+    SELECT NOT (
+        contradiction >= GREATEST(entailment, neutral)
+        OR (neutral >= GREATEST(entailment, contradiction) AND neutral >= threshold)
+    )
+$$;
+
+-- The most likely label of the stored ABSA probabilities
+CREATE OR REPLACE FUNCTION sentiment_by_scores(positive REAL, negative REAL, neutral REAL)
+RETURNS sentiment LANGUAGE SQL IMMUTABLE STRICT PARALLEL SAFE AS $$
+    SELECT CASE GREATEST(positive, negative, neutral)
+        WHEN positive THEN 'positive'::sentiment
+        WHEN negative THEN 'negative'::sentiment
+        ELSE 'neutral'::sentiment
+    END
+$$;
+
+-- Re-applies a relevance threshold to the stored scores of a topic's articles, without running the
+-- models again (see src/scripts/rethreshold_relevance.py). Articles only become relevant again when
+-- their sentiment was scored; those judged irrelevant at ingest never were and keep 'unknown'.
+-- Returns the number of articles relabelled and the range of their publication dates.
+CREATE OR REPLACE FUNCTION rethreshold_relevance(topic TEXT, threshold REAL)
+RETURNS TABLE (relabelled BIGINT, first_published TIMESTAMPTZ, last_published TIMESTAMPTZ)
+LANGUAGE SQL AS $$
+    WITH relabelled AS (
+        UPDATE articles a SET sentiment = rescored.sentiment
+        FROM (
+            SELECT
+                id,
+                published_at,
+                CASE
+                    WHEN NOT is_relevant_by_scores(relevance_entailment, relevance_neutral, relevance_contradiction, threshold)
+                        THEN 'unknown'::sentiment
+                    ELSE sentiment_by_scores(sentiment_positive, sentiment_negative, sentiment_neutral)
+                END AS sentiment
+            FROM articles
+            WHERE topic_id = (SELECT id FROM article_topics WHERE name = topic)
+                AND relevance_neutral IS NOT NULL
+        ) rescored
+        WHERE a.id = rescored.id
+            AND a.published_at = rescored.published_at
+            AND rescored.sentiment IS NOT NULL
+            AND a.sentiment IS DISTINCT FROM rescored.sentiment
+        RETURNING a.published_at
+    )
+    SELECT COUNT(*), MIN(published_at), MAX(published_at) FROM relabelled
+$$;
+
+-- Chunks older than a month are compressed. Segmenting by topic lets per-topic reads of a compressed
+-- chunk skip the other topics; src/scripts/configure_storage.py changes these settings (ARTICLES_* in src/consts.py)
+ALTER TABLE articles SET (
+    timescaledb.compress,
+    timescaledb.compress_segmentby = 'topic_id',
+    timescaledb.compress_orderby = 'published_at DESC'
+);
+SELECT add_compression_policy('articles', compress_after => INTERVAL '30 days');
+
+-- Cold storage of the description and content of old articles, moved there by tier_article_text() when
+-- ARTICLES_TEXT_TIER_AFTER is set. The articles rows, sentiment included, stay where they are.
+CREATE TABLE articles_text_archive (
+    id INTEGER NOT NULL,
+    published_at TIMESTAMPTZ NOT NULL,
+    description TEXT,
+    content TEXT,
+    archived_at TIMESTAMPTZ DEFAULT NOW(),
     PRIMARY KEY (id, published_at)
 );
 
-SELECT create_hypertable('articles', 'published_at');
+SELECT create_hypertable('articles_text_archive', 'published_at', chunk_time_interval => INTERVAL '30 days');
+
+ALTER TABLE articles_text_archive SET (
+    timescaledb.compress,
+    timescaledb.compress_orderby = 'published_at DESC, id'
+);
+SELECT add_compression_policy('articles_text_archive', compress_after => INTERVAL '1 day');
+
+-- Job procedure (see add_job): archives the text of the articles chunks entirely older than
+-- config->>'older_than', one chunk per transaction. Run it before those chunks get compressed.
+CREATE OR REPLACE PROCEDURE tier_article_text(job_id INT, config JSONB)
+LANGUAGE plpgsql AS $$
+DECLARE
+    chunk REGCLASS;
+BEGIN
+    FOR chunk IN SELECT show_chunks('articles', older_than => (config->>'older_than')::INTERVAL) LOOP
+        EXECUTE format(
+            'INSERT INTO articles_text_archive (id, published_at, description, content)
+             SELECT id, published_at, description, content FROM %s
+             WHERE description IS NOT NULL OR content IS NOT NULL
+             ON CONFLICT (id, published_at) DO UPDATE SET
+                 description = COALESCE(EXCLUDED.description, articles_text_archive.description),
+                 content = COALESCE(EXCLUDED.content, articles_text_archive.content)',
+            chunk
+        );
+        -- Only rows archived above, not ones inserted since
+        EXECUTE format(
+            'UPDATE %s AS a SET description = NULL, content = NULL
+             WHERE (a.description IS NOT NULL OR a.content IS NOT NULL)
+                 AND EXISTS (
+                     SELECT 1 FROM articles_text_archive t
+                     WHERE t.id = a.id AND t.published_at = a.published_at
+                         AND t.description IS NOT DISTINCT FROM COALESCE(a.description, t.description)
+                         AND t.content IS NOT DISTINCT FROM COALESCE(a.content, t.content)
+                 )',
+            chunk
+        );
+        COMMIT;
+    END LOOP;
+END;
+$$;
+
+-- Dashboard rollups: article counts per hour and per day (UTC) by topic, source and sentiment ids.
+-- materialized_only = false adds the not yet materialized recent rows at query time, so the
+-- dashboard stays current between refreshes. The daily rollup is computed from the hourly one.
+CREATE MATERIALIZED VIEW articles_hourly
+WITH (timescaledb.continuous, timescaledb.materialized_only = false) AS
+SELECT
+    time_bucket(INTERVAL '1 hour', published_at) AS bucket,
+    topic_id,
+    source_id,
+    sentiment,
+    COUNT(*) AS article_count
+FROM articles
+GROUP BY bucket, topic_id, source_id, sentiment
+WITH NO DATA;
+
+CREATE MATERIALIZED VIEW articles_daily
+WITH (timescaledb.continuous, timescaledb.materialized_only = false) AS
+SELECT
+    time_bucket(INTERVAL '1 day', bucket) AS bucket,
+    topic_id,
+    source_id,
+    sentiment,
+    SUM(article_count)::BIGINT AS article_count
+FROM articles_hourly
+GROUP BY 1, topic_id, source_id, sentiment
+WITH NO DATA;
+
+-- Late articles (re-scored or polled after the fact) land within a few days; older ranges are
+-- refreshed explicitly by the backfill (see db_helpers.refresh_rollups)
+SELECT add_continuous_aggregate_policy('articles_hourly',
+    start_offset => INTERVAL '3 days',
+    end_offset => INTERVAL '1 hour',
+    schedule_interval => INTERVAL '15 minutes');
+
+SELECT add_continuous_aggregate_policy('articles_daily',
+    start_offset => INTERVAL '7 days',
+    end_offset => INTERVAL '1 day',
+    schedule_interval => INTERVAL '1 hour');
+
+CREATE INDEX idx_articles_hourly_topic ON articles_hourly (topic_id, bucket DESC);
+CREATE INDEX idx_articles_daily_topic ON articles_daily (topic_id, bucket DESC);
+
+-- Units of work (one topic on one day) already completed by a backfill, so an interrupted run resumes where it stopped
+CREATE TABLE backfill_checkpoints (
+    topic VARCHAR(255) NOT NULL,
+    day DATE NOT NULL,
+    articles INTEGER NOT NULL,
+    completed_at TIMESTAMPTZ DEFAULT NOW(),
+    PRIMARY KEY (topic, day)
+);
+
+
+-- Per-article progress through the pipeline, so a restarted run only redoes unfinished work.
+-- One row per (url, topic); the *_at columns double as an audit and throughput log.
+CREATE TABLE processing_ledger (
+    url TEXT NOT NULL,
+    topic VARCHAR(255) NOT NULL,
+    stage VARCHAR(20) NOT NULL,
+    model_version VARCHAR(255) NOT NULL,
+    run_id VARCHAR(32) NOT NULL,
+    relevant BOOLEAN,
+    sentiment VARCHAR(20),
+    fetched_at TIMESTAMPTZ,
+    relevance_at TIMESTAMPTZ,
+    sentiment_at TIMESTAMPTZ,
+    persisted_at TIMESTAMPTZ,
+    PRIMARY KEY (url, topic)
+);
+
+CREATE INDEX idx_ledger_run ON processing_ledger (run_id);
+
+
+-- One row per scheduled run, so a restarted scheduler catches up from the last successful run
+CREATE TABLE scheduler_runs (
+    job_name VARCHAR(64) NOT NULL,
+    run_date DATE NOT NULL,
+    status VARCHAR(20) NOT NULL,
+    owner VARCHAR(255),
+    started_at TIMESTAMPTZ DEFAULT NOW(),
+    finished_at TIMESTAMPTZ,
+    PRIMARY KEY (job_name, run_date)
+);
+
+
+-- Page requests of a scheduled run that failed: a retried run only makes those marked retry again
+CREATE TABLE scheduler_failed_pages (
+    job_name VARCHAR(64) NOT NULL,
+    run_date DATE NOT NULL,
+    topic VARCHAR(255) NOT NULL,
+    day DATE NOT NULL,
+    page INTEGER NOT NULL,
+    attempts INTEGER NOT NULL,
+    error TEXT,
+    retry BOOLEAN NOT NULL,
+    PRIMARY KEY (job_name, run_date, topic, day, page)
+);
+
+
+-- Latest publication time already ingested per topic, with the state of the adaptive intraday poller
+CREATE TABLE topic_watermarks (
+    topic VARCHAR(255) PRIMARY KEY,
+    watermark TIMESTAMPTZ NOT NULL,
+    interval_seconds INTEGER NOT NULL,
+    arrival_rate DOUBLE PRECISION NOT NULL,
+    updated_at TIMESTAMPTZ DEFAULT NOW()
+);
+
+
+-- NewsAPI requests spent per UTC day and consumer (job, poller, backfill, ...)
+CREATE TABLE api_quota_usage (
+    day DATE NOT NULL,
+    consumer VARCHAR(64) NOT NULL,
+    requests INTEGER NOT NULL DEFAULT 0,
+    updated_at TIMESTAMPTZ DEFAULT NOW(),
+    PRIMARY KEY (day, consumer)
+);
+
+-- Requests spent per UTC day by all consumers; its row lock is what keeps them within the budget
+CREATE TABLE api_quota_days (
+    day DATE PRIMARY KEY,
+    requests INTEGER NOT NULL DEFAULT 0
+);
+
+-- Smoothed number of articles NewsAPI reports per topic and day, used to value extra pages
+CREATE TABLE topic_volume (
+    topic VARCHAR(255) PRIMARY KEY,
+    articles_per_day DOUBLE PRECISION NOT NULL,
+    updated_at TIMESTAMPTZ DEFAULT NOW()
+);
+
+-- Pages left out of a plan for lack of budget, offered again by the next one
+CREATE TABLE deferred_pages (
+    topic VARCHAR(255) NOT NULL,
+    day DATE NOT NULL,
+    page INTEGER NOT NULL,
+    deferred_at TIMESTAMPTZ DEFAULT NOW(),
+    PRIMARY KEY (topic, day, page)
+);
+
+
+-- Requests and cooldowns per NewsAPI key (by fingerprint, never the key itself) and UTC day
+CREATE TABLE api_key_usage (
+    day DATE NOT NULL,
+    key_id VARCHAR(64) NOT NULL,
+    requests INTEGER NOT NULL DEFAULT 0,
+    cooldown_until TIMESTAMPTZ,
+    updated_at TIMESTAMPTZ DEFAULT NOW(),
+    PRIMARY KEY (day, key_id)
+);
+
+
+-- Topics to scrape and how, read at runtime by the jobs and the dashboard (see src/libs/topic_registry.py)
+CREATE TABLE topics (
+    name VARCHAR(255) PRIMARY KEY,
+    query TEXT NOT NULL,
+    cadence VARCHAR(16) NOT NULL DEFAULT 'daily' CHECK (cadence IN ('daily', 'intraday')),
+    priority REAL NOT NULL DEFAULT 1 CHECK (priority >= 0),
+    analyzer VARCHAR(16) NOT NULL DEFAULT 'absa' CHECK (analyzer IN ('absa', 'llm')),
+    relevance_threshold REAL CHECK (relevance_threshold BETWEEN 0 AND 1),
+    enabled BOOLEAN NOT NULL DEFAULT TRUE,
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+-- Running processes reload the registry when updated_at moves, so every change must bump it
+CREATE OR REPLACE FUNCTION touch_updated_at() RETURNS TRIGGER AS $$
+BEGIN
+    NEW.updated_at = NOW();
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
 
-CREATE INDEX idx_topic_time ON articles (topic, published_at DESC);
-CREATE INDEX idx_sentiment ON articles (sentiment);
\ No newline at end of file
+CREATE TRIGGER topics_touch_updated_at BEFORE UPDATE ON topics
+    FOR EACH ROW EXECUTE FUNCTION touch_updated_at();
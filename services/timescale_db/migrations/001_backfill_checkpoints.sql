@@ -0,0 +1,10 @@
+-- Brings an existing database in line with init.sql: backfill checkpoints.
+-- Apply with: psql -h $POSTGRES_HOST -p $POSTGRES_PORT -U $POSTGRES_USER -d $POSTGRES_DB -f <this file>
+
+CREATE TABLE IF NOT EXISTS backfill_checkpoints (
+    topic VARCHAR(255) NOT NULL,
+    day DATE NOT NULL,
+    articles INTEGER NOT NULL,
+    completed_at TIMESTAMPTZ DEFAULT NOW(),
+    PRIMARY KEY (topic, day)
+);
@@ -0,0 +1,21 @@
+-- Brings an existing database in line with init.sql: processing ledger.
+-- Apply with: psql -h $POSTGRES_HOST -p $POSTGRES_PORT -U $POSTGRES_USER -d $POSTGRES_DB -f <this file>
+
+-- Per-article progress through the pipeline, so a restarted run only redoes unfinished work.
+-- One row per (url, topic); the *_at columns double as an audit and throughput log.
+CREATE TABLE IF NOT EXISTS processing_ledger (
+    url TEXT NOT NULL,
+    topic VARCHAR(255) NOT NULL,
+    stage VARCHAR(20) NOT NULL,
+    model_version VARCHAR(255) NOT NULL,
+    run_id VARCHAR(32) NOT NULL,
+    relevant BOOLEAN,
+    sentiment VARCHAR(20),
+    fetched_at TIMESTAMPTZ,
+    relevance_at TIMESTAMPTZ,
+    sentiment_at TIMESTAMPTZ,
+    persisted_at TIMESTAMPTZ,
+    PRIMARY KEY (url, topic)
+);
+
+CREATE INDEX IF NOT EXISTS idx_ledger_run ON processing_ledger (run_id);
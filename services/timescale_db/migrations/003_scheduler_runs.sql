@@ -0,0 +1,13 @@
+-- Brings an existing database in line with init.sql: scheduler run history.
+-- Apply with: psql -h $POSTGRES_HOST -p $POSTGRES_PORT -U $POSTGRES_USER -d $POSTGRES_DB -f <this file>
+
+-- One row per scheduled run, so a restarted scheduler catches up from the last successful run
+CREATE TABLE IF NOT EXISTS scheduler_runs (
+    job_name VARCHAR(64) NOT NULL,
+    run_date DATE NOT NULL,
+    status VARCHAR(20) NOT NULL,
+    owner VARCHAR(255),
+    started_at TIMESTAMPTZ DEFAULT NOW(),
+    finished_at TIMESTAMPTZ,
+    PRIMARY KEY (job_name, run_date)
+);
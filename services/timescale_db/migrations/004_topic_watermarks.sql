@@ -0,0 +1,11 @@
+-- Brings an existing database in line with init.sql: intraday polling watermarks.
+-- Apply with: psql -h $POSTGRES_HOST -p $POSTGRES_PORT -U $POSTGRES_USER -d $POSTGRES_DB -f <this file>
+
+-- Latest publication time already ingested per topic, with the state of the adaptive intraday poller
+CREATE TABLE IF NOT EXISTS topic_watermarks (
+    topic VARCHAR(255) PRIMARY KEY,
+    watermark TIMESTAMPTZ NOT NULL,
+    interval_seconds INTEGER NOT NULL,
+    arrival_rate DOUBLE PRECISION NOT NULL,
+    updated_at TIMESTAMPTZ DEFAULT NOW()
+);
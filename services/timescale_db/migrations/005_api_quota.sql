@@ -0,0 +1,27 @@
+-- Brings an existing database in line with init.sql: NewsAPI request budget accounting.
+-- Apply with: psql -h $POSTGRES_HOST -p $POSTGRES_PORT -U $POSTGRES_USER -d $POSTGRES_DB -f <this file>
+
+-- NewsAPI requests spent per UTC day and consumer (job, poller, backfill, ...)
+CREATE TABLE IF NOT EXISTS api_quota_usage (
+    day DATE NOT NULL,
+    consumer VARCHAR(64) NOT NULL,
+    requests INTEGER NOT NULL DEFAULT 0,
+    updated_at TIMESTAMPTZ DEFAULT NOW(),
+    PRIMARY KEY (day, consumer)
+);
+
+-- Smoothed number of articles NewsAPI reports per topic and day, used to value extra pages
+CREATE TABLE IF NOT EXISTS topic_volume (
+    topic VARCHAR(255) PRIMARY KEY,
+    articles_per_day DOUBLE PRECISION NOT NULL,
+    updated_at TIMESTAMPTZ DEFAULT NOW()
+);
+
+-- Pages left out of a plan for lack of budget, offered again by the next one
+CREATE TABLE IF NOT EXISTS deferred_pages (
+    topic VARCHAR(255) NOT NULL,
+    day DATE NOT NULL,
+    page INTEGER NOT NULL,
+    deferred_at TIMESTAMPTZ DEFAULT NOW(),
+    PRIMARY KEY (topic, day, page)
+);
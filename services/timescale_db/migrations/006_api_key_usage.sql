@@ -0,0 +1,12 @@
+-- Brings an existing database in line with init.sql: per API key usage.
+-- Apply with: psql -h $POSTGRES_HOST -p $POSTGRES_PORT -U $POSTGRES_USER -d $POSTGRES_DB -f <this file>
+
+-- Requests and cooldowns per NewsAPI key (by fingerprint, never the key itself) and UTC day
+CREATE TABLE IF NOT EXISTS api_key_usage (
+    day DATE NOT NULL,
+    key_id VARCHAR(64) NOT NULL,
+    requests INTEGER NOT NULL DEFAULT 0,
+    cooldown_until TIMESTAMPTZ,
+    updated_at TIMESTAMPTZ DEFAULT NOW(),
+    PRIMARY KEY (day, key_id)
+);
@@ -0,0 +1,27 @@
+-- Brings an existing database in line with init.sql: the topic registry.
+-- Apply with: psql -h $POSTGRES_HOST -p $POSTGRES_PORT -U $POSTGRES_USER -d $POSTGRES_DB -f <this file>
+-- The table is seeded from TOPICS the first time a job reads it while empty.
+
+-- Topics to scrape and how, read at runtime by the jobs and the dashboard (see src/libs/topic_registry.py)
+CREATE TABLE IF NOT EXISTS topics (
+    name VARCHAR(255) PRIMARY KEY,
+    query TEXT NOT NULL,
+    cadence VARCHAR(16) NOT NULL DEFAULT 'daily' CHECK (cadence IN ('daily', 'intraday')),
+    priority REAL NOT NULL DEFAULT 1 CHECK (priority >= 0),
+    analyzer VARCHAR(16) NOT NULL DEFAULT 'absa' CHECK (analyzer IN ('absa', 'llm')),
+    relevance_threshold REAL CHECK (relevance_threshold BETWEEN 0 AND 1),
+    enabled BOOLEAN NOT NULL DEFAULT TRUE,
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+-- Running processes reload the registry when updated_at moves, so every change must bump it
+CREATE OR REPLACE FUNCTION touch_updated_at() RETURNS TRIGGER AS $$
+BEGIN
+    NEW.updated_at = NOW();
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS topics_touch_updated_at ON topics;
+CREATE TRIGGER topics_touch_updated_at BEFORE UPDATE ON topics
+    FOR EACH ROW EXECUTE FUNCTION touch_updated_at();
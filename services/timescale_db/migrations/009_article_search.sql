@@ -0,0 +1,14 @@
+-- Brings an existing database in line with init.sql: full-text search and keyset pagination of articles.
+-- Apply with: psql -h $POSTGRES_HOST -p $POSTGRES_PORT -U $POSTGRES_USER -d $POSTGRES_DB -f <this file>
+-- Adding the generated column rewrites every chunk of articles, run it off-peak.
+
+-- Full-text search of the article explorer (visual/database/pages), titles weigh most
+ALTER TABLE articles ADD COLUMN IF NOT EXISTS search_vector TSVECTOR GENERATED ALWAYS AS (
+    setweight(to_tsvector('english', COALESCE(title, '')), 'A') ||
+    setweight(to_tsvector('english', COALESCE(description, '')), 'B') ||
+    setweight(to_tsvector('english', COALESCE(content, '')), 'C')
+) STORED;
+
+CREATE INDEX IF NOT EXISTS idx_articles_search ON articles USING GIN (search_vector);
+-- Keyset pagination of the article explorer, newest first
+CREATE INDEX IF NOT EXISTS idx_articles_time_id ON articles (published_at DESC, id DESC);
@@ -0,0 +1,68 @@
+-- Brings an existing database in line with init.sql: chunk interval, compression and text tiering of articles.
+-- Apply with: psql -h $POSTGRES_HOST -p $POSTGRES_PORT -U $POSTGRES_USER -d $POSTGRES_DB -f <this file>
+-- Existing chunks keep their interval. Compressing the chunks already past 30 days happens in the
+-- policy's next runs; to compress them at once and measure the gain, run src/scripts/storage_benchmark.py --apply.
+
+SELECT set_chunk_time_interval('articles', INTERVAL '7 days');
+
+-- Chunks older than a month are compressed. Segmenting by topic lets per-topic reads of a compressed
+-- chunk skip the other topics; src/scripts/configure_storage.py changes these settings (ARTICLES_* in src/consts.py)
+ALTER TABLE articles SET (
+    timescaledb.compress,
+    timescaledb.compress_segmentby = 'topic',
+    timescaledb.compress_orderby = 'published_at DESC'
+);
+SELECT add_compression_policy('articles', compress_after => INTERVAL '30 days', if_not_exists => true);
+
+-- Cold storage of the description and content of old articles, moved there by tier_article_text() when
+-- ARTICLES_TEXT_TIER_AFTER is set. The articles rows, sentiment included, stay where they are.
+CREATE TABLE IF NOT EXISTS articles_text_archive (
+    id INTEGER NOT NULL,
+    published_at TIMESTAMPTZ NOT NULL,
+    description TEXT,
+    content TEXT,
+    archived_at TIMESTAMPTZ DEFAULT NOW(),
+    PRIMARY KEY (id, published_at)
+);
+
+SELECT create_hypertable('articles_text_archive', 'published_at', chunk_time_interval => INTERVAL '30 days', if_not_exists => true);
+
+ALTER TABLE articles_text_archive SET (
+    timescaledb.compress,
+    timescaledb.compress_orderby = 'published_at DESC, id'
+);
+SELECT add_compression_policy('articles_text_archive', compress_after => INTERVAL '1 day', if_not_exists => true);
+
+-- Job procedure (see add_job): archives the text of the articles chunks entirely older than
+-- config->>'older_than', one chunk per transaction. Run it before those chunks get compressed.
+CREATE OR REPLACE PROCEDURE tier_article_text(job_id INT, config JSONB)
+LANGUAGE plpgsql AS $$
+DECLARE
+    chunk REGCLASS;
+BEGIN
+    FOR chunk IN SELECT show_chunks('articles', older_than => (config->>'older_than')::INTERVAL) LOOP
+        EXECUTE format(
+            'INSERT INTO articles_text_archive (id, published_at, description, content)
+             SELECT id, published_at, description, content FROM %s
+             WHERE description IS NOT NULL OR content IS NOT NULL
+             ON CONFLICT (id, published_at) DO UPDATE SET
+                 description = COALESCE(EXCLUDED.description, articles_text_archive.description),
+                 content = COALESCE(EXCLUDED.content, articles_text_archive.content)',
+            chunk
+        );
+        -- Only rows archived above, not ones inserted since
+        EXECUTE format(
+            'UPDATE %s AS a SET description = NULL, content = NULL
+             WHERE (a.description IS NOT NULL OR a.content IS NOT NULL)
+                 AND EXISTS (
+                     SELECT 1 FROM articles_text_archive t
+                     WHERE t.id = a.id AND t.published_at = a.published_at
+                         AND t.description IS NOT DISTINCT FROM COALESCE(a.description, t.description)
+                         AND t.content IS NOT DISTINCT FROM COALESCE(a.content, t.content)
+                 )',
+            chunk
+        );
+        COMMIT;
+    END LOOP;
+END;
+$$;
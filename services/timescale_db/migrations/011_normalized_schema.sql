@@ -0,0 +1,124 @@
+-- Brings an existing database in line with init.sql: sentiment as an enum, topic and source as dimension ids.
+-- Apply with: psql -h $POSTGRES_HOST -p $POSTGRES_PORT -U $POSTGRES_USER -d $POSTGRES_DB -f <this file>
+-- Rewrites the whole articles table: stop the jobs and workers first, and leave it time on large tables.
+-- Compressed chunks are decompressed and recompressed by the policy; the rollups are rebuilt at the end.
+\set ON_ERROR_STOP on
+
+DO $$
+BEGIN
+    CREATE TYPE sentiment AS ENUM ('positive', 'negative', 'neutral', 'unknown', 'invalid');
+EXCEPTION WHEN duplicate_object THEN NULL;
+END;
+$$;
+
+-- Dimension tables, so that articles rows hold small ids instead of repeating the names
+-- (see db_helpers.dimension_ids). Ids are never reused or renamed.
+CREATE TABLE IF NOT EXISTS article_topics (
+    id SMALLINT GENERATED ALWAYS AS IDENTITY PRIMARY KEY,
+    name VARCHAR(255) NOT NULL UNIQUE
+);
+
+CREATE TABLE IF NOT EXISTS article_sources (
+    id INTEGER GENERATED ALWAYS AS IDENTITY PRIMARY KEY,
+    name VARCHAR(255) NOT NULL UNIQUE
+);
+
+INSERT INTO article_topics (name) SELECT DISTINCT topic FROM articles ORDER BY 1 ON CONFLICT (name) DO NOTHING;
+INSERT INTO article_sources (name)
+SELECT DISTINCT source_name FROM articles WHERE source_name IS NOT NULL ORDER BY 1
+ON CONFLICT (name) DO NOTHING;
+
+-- The rollups and the compression settings depend on the columns being replaced
+DROP MATERIALIZED VIEW IF EXISTS articles_daily;
+DROP MATERIALIZED VIEW IF EXISTS articles_hourly;
+
+SELECT remove_compression_policy('articles', if_exists => true);
+SELECT decompress_chunk(chunk, if_compressed => true) FROM show_chunks('articles') chunk;
+ALTER TABLE articles SET (timescaledb.compress = false);
+
+DROP INDEX IF EXISTS idx_topic_time;
+DROP INDEX IF EXISTS idx_sentiment;
+
+ALTER TABLE articles
+    ADD COLUMN topic_id SMALLINT REFERENCES article_topics (id),
+    ADD COLUMN source_id INTEGER REFERENCES article_sources (id);
+
+UPDATE articles a SET
+    topic_id = t.id,
+    source_id = (SELECT s.id FROM article_sources s WHERE s.name = a.source_name)
+FROM article_topics t
+WHERE t.name = a.topic;
+
+ALTER TABLE articles ALTER COLUMN topic_id SET NOT NULL;
+ALTER TABLE articles ALTER COLUMN sentiment TYPE sentiment USING sentiment::sentiment;
+ALTER TABLE articles DROP COLUMN topic, DROP COLUMN source_name;
+
+-- Keyset pagination of the article explorer, newest first, and the same filtered by topic
+CREATE INDEX IF NOT EXISTS idx_articles_time_id ON articles (published_at DESC, id DESC);
+CREATE INDEX idx_topic_time ON articles (topic_id, published_at DESC, id DESC);
+CREATE INDEX idx_articles_source_time ON articles (source_id, published_at DESC) WHERE source_id IS NOT NULL;
+-- Sentiment has five values, only the rare failed ones are worth an index (to inspect or re-score them)
+CREATE INDEX idx_articles_unscored ON articles (published_at DESC, id DESC) WHERE sentiment IN ('unknown', 'invalid');
+
+-- The articles as they looked before the dimension tables, with names instead of ids, for ad-hoc queries
+CREATE OR REPLACE VIEW articles_named AS
+SELECT
+    a.id, t.name AS topic, a.published_at, s.name AS source_name, a.author, a.title, a.description,
+    a.url, a.url_to_image, a.content, a.sentiment::TEXT AS sentiment, a.created_at
+FROM articles a
+JOIN article_topics t ON t.id = a.topic_id
+LEFT JOIN article_sources s ON s.id = a.source_id;
+
+ALTER TABLE articles SET (
+    timescaledb.compress,
+    timescaledb.compress_segmentby = 'topic_id',
+    timescaledb.compress_orderby = 'published_at DESC'
+);
+SELECT add_compression_policy('articles', compress_after => INTERVAL '30 days');
+
+VACUUM ANALYZE articles;
+
+-- Dashboard rollups: article counts per hour and per day (UTC) by topic, source and sentiment ids.
+-- materialized_only = false adds the not yet materialized recent rows at query time, so the
+-- dashboard stays current between refreshes. The daily rollup is computed from the hourly one.
+CREATE MATERIALIZED VIEW articles_hourly
+WITH (timescaledb.continuous, timescaledb.materialized_only = false) AS
+SELECT
+    time_bucket(INTERVAL '1 hour', published_at) AS bucket,
+    topic_id,
+    source_id,
+    sentiment,
+    COUNT(*) AS article_count
+FROM articles
+GROUP BY bucket, topic_id, source_id, sentiment
+WITH NO DATA;
+
+CREATE MATERIALIZED VIEW articles_daily
+WITH (timescaledb.continuous, timescaledb.materialized_only = false) AS
+SELECT
+    time_bucket(INTERVAL '1 day', bucket) AS bucket,
+    topic_id,
+    source_id,
+    sentiment,
+    SUM(article_count)::BIGINT AS article_count
+FROM articles_hourly
+GROUP BY 1, topic_id, source_id, sentiment
+WITH NO DATA;
+
+-- Late articles (re-scored or polled after the fact) land within a few days; older ranges are
+-- refreshed explicitly by the backfill (see db_helpers.refresh_rollups)
+SELECT add_continuous_aggregate_policy('articles_hourly',
+    start_offset => INTERVAL '3 days',
+    end_offset => INTERVAL '1 hour',
+    schedule_interval => INTERVAL '15 minutes');
+
+SELECT add_continuous_aggregate_policy('articles_daily',
+    start_offset => INTERVAL '7 days',
+    end_offset => INTERVAL '1 day',
+    schedule_interval => INTERVAL '1 hour');
+
+CREATE INDEX idx_articles_hourly_topic ON articles_hourly (topic_id, bucket DESC);
+CREATE INDEX idx_articles_daily_topic ON articles_daily (topic_id, bucket DESC);
+
+CALL refresh_continuous_aggregate('articles_hourly', NULL, NULL);
+CALL refresh_continuous_aggregate('articles_daily', NULL, NULL);
@@ -0,0 +1,50 @@
+-- Brings an existing database in line with init.sql: articles are upserted on (url_hash, published_at)
+-- instead of the URL, which a hypertable cannot hold a unique index on by itself.
+-- Apply with: psql -h $POSTGRES_HOST -p $POSTGRES_PORT -U $POSTGRES_USER -d $POSTGRES_DB -f <this file>
+-- Rewrites the whole articles table: stop the jobs and workers first, and leave it time on large tables.
+-- Compressed chunks are decompressed and recompressed by the policy.
+\set ON_ERROR_STOP on
+
+-- The URL articles are deduplicated by: surrounding whitespace and the fragment removed, the scheme and host
+-- lowercased and the trailing slashes of the path removed. Must match db_helpers.canonical_url.
+CREATE OR REPLACE FUNCTION canonical_url(url TEXT) RETURNS TEXT
+LANGUAGE SQL IMMUTABLE STRICT PARALLEL SAFE AS $$
+    SELECT COALESCE(lower(substring(path FROM '^[A-Za-z][A-Za-z0-9+.-]*://[^/]*')), '')
+        || regexp_replace(path, '^[A-Za-z][A-Za-z0-9+.-]*://[^/]*', '')
+        || query
+    FROM (
+        SELECT
+            rtrim(split_part(trimmed, '?', 1), '/') AS path,
+            CASE WHEN strpos(trimmed, '?') > 0 THEN substr(trimmed, strpos(trimmed, '?')) ELSE '' END AS query
+        FROM (SELECT split_part(btrim(url, E' \t\r\n'), '#', 1) AS trimmed) fragmentless
+    ) parts
+$$;
+
+SELECT remove_compression_policy('articles', if_exists => true);
+SELECT decompress_chunk(chunk, if_compressed => true) FROM show_chunks('articles') chunk;
+
+ALTER TABLE articles DROP CONSTRAINT IF EXISTS articles_url_key;
+ALTER TABLE articles ADD COLUMN IF NOT EXISTS url_hash UUID;
+
+UPDATE articles SET url_hash = md5(canonical_url(url))::UUID WHERE url IS NOT NULL;
+
+-- Rows the old key let through with URLs that only differ once canonical: keep the latest stored
+DELETE FROM articles a
+USING articles newer
+WHERE newer.url_hash = a.url_hash
+    AND newer.published_at = a.published_at
+    AND (newer.created_at, newer.id) > (a.created_at, a.id);
+DELETE FROM articles_text_archive archive
+WHERE NOT EXISTS (SELECT 1 FROM articles a WHERE a.id = archive.id AND a.published_at = archive.published_at);
+
+-- Upsert key of the ingest (ON CONFLICT in db_helpers). A unique index on a hypertable must include the
+-- time column, which also keeps every conflict check inside the one chunk the article belongs to.
+CREATE UNIQUE INDEX IF NOT EXISTS idx_articles_url_hash ON articles (url_hash, published_at);
+
+SELECT add_compression_policy('articles', compress_after => INTERVAL '30 days');
+
+VACUUM ANALYZE articles;
+
+-- The rollups still count the duplicates removed above
+CALL refresh_continuous_aggregate('articles_hourly', NULL, NULL);
+CALL refresh_continuous_aggregate('articles_daily', NULL, NULL);
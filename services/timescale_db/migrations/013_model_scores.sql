@@ -0,0 +1,72 @@
+-- Brings an existing database in line with init.sql: the model probabilities and version behind each sentiment.
+-- Apply with: psql -h $POSTGRES_HOST -p $POSTGRES_PORT -U $POSTGRES_USER -d $POSTGRES_DB -f <this file>
+-- Articles stored before have no scores; only re-running the models would give them some.
+\set ON_ERROR_STOP on
+
+-- Versions of the models (and settings) that scored the articles, see SentimentAnalyzer.model_version
+CREATE TABLE IF NOT EXISTS model_versions (
+    id SMALLINT GENERATED ALWAYS AS IDENTITY PRIMARY KEY,
+    name VARCHAR(255) NOT NULL UNIQUE
+);
+
+-- Nullable columns without a default are added to compressed chunks without rewriting them
+ALTER TABLE articles
+    ADD COLUMN IF NOT EXISTS relevance_entailment REAL,
+    ADD COLUMN IF NOT EXISTS relevance_neutral REAL,
+    ADD COLUMN IF NOT EXISTS relevance_contradiction REAL,
+    ADD COLUMN IF NOT EXISTS sentiment_positive REAL,
+    ADD COLUMN IF NOT EXISTS sentiment_negative REAL,
+    ADD COLUMN IF NOT EXISTS sentiment_neutral REAL,
+    ADD COLUMN IF NOT EXISTS model_version_id SMALLINT REFERENCES model_versions (id);
+
+-- Relevance of an article from its stored NLI probabilities, as the ABSA analyzer decides it
+-- (see ABSASentimentAnalyzer._is_relevant): irrelevant when contradiction is the most likely
+-- label, or when neutral is and reaches the threshold
+CREATE OR REPLACE FUNCTION is_relevant_by_scores(entailment REAL, neutral REAL, contradiction REAL, threshold REAL)
+RETURNS BOOLEAN LANGUAGE SQL IMMUTABLE STRICT PARALLEL SAFE AS $$
+    SELECT NOT (
+        contradiction >= GREATEST(entailment, neutral)
+        OR (neutral >= GREATEST(entailment, contradiction) AND neutral >= threshold)
+    )
+$$;
+
+-- The most likely label of the stored ABSA probabilities
+CREATE OR REPLACE FUNCTION sentiment_by_scores(positive REAL, negative REAL, neutral REAL)
+RETURNS sentiment LANGUAGE SQL IMMUTABLE STRICT PARALLEL SAFE AS $$
+    SELECT CASE GREATEST(positive, negative, neutral)
+        WHEN positive THEN 'positive'::sentiment
+        WHEN negative THEN 'negative'::sentiment
+        ELSE 'neutral'::sentiment
+    END
+$$;
+
+-- Re-applies a relevance threshold to the stored scores of a topic's articles, without running the
+-- models again (see src/scripts/rethreshold_relevance.py). Articles only become relevant again when
+-- their sentiment was scored; those judged irrelevant at ingest never were and keep 'unknown'.
+-- Returns the number of articles relabelled and the range of their publication dates.
+CREATE OR REPLACE FUNCTION rethreshold_relevance(topic TEXT, threshold REAL)
+RETURNS TABLE (relabelled BIGINT, first_published TIMESTAMPTZ, last_published TIMESTAMPTZ)
+LANGUAGE SQL AS $$
+    WITH relabelled AS (
+        UPDATE articles a SET sentiment = rescored.sentiment
+        FROM (
+            SELECT
+                id,
+                published_at,
+                CASE
+                    WHEN NOT is_relevant_by_scores(relevance_entailment, relevance_neutral, relevance_contradiction, threshold)
+                        THEN 'unknown'::sentiment
+                    ELSE sentiment_by_scores(sentiment_positive, sentiment_negative, sentiment_neutral)
+                END AS sentiment
+            FROM articles
+            WHERE topic_id = (SELECT id FROM article_topics WHERE name = topic)
+                AND relevance_neutral IS NOT NULL
+        ) rescored
+        WHERE a.id = rescored.id
+            AND a.published_at = rescored.published_at
+            AND rescored.sentiment IS NOT NULL
+            AND a.sentiment IS DISTINCT FROM rescored.sentiment
+        RETURNING a.published_at
+    )
+    SELECT COUNT(*), MIN(published_at), MAX(published_at) FROM relabelled
+$$;
@@ -0,0 +1,12 @@
+-- Brings an existing database in line with init.sql: daily request totals, spent atomically.
+-- Apply with: psql -h $POSTGRES_HOST -p $POSTGRES_PORT -U $POSTGRES_USER -d $POSTGRES_DB -f <this file>
+
+-- Requests spent per UTC day by all consumers; its row lock is what keeps them within the budget
+CREATE TABLE IF NOT EXISTS api_quota_days (
+    day DATE PRIMARY KEY,
+    requests INTEGER NOT NULL DEFAULT 0
+);
+
+INSERT INTO api_quota_days (day, requests)
+SELECT day, SUM(requests) FROM api_quota_usage GROUP BY day
+ON CONFLICT (day) DO UPDATE SET requests = EXCLUDED.requests;
@@ -0,0 +1,27 @@
+-- Brings an existing database in line with init.sql: the upsert key includes the topic, so the copies of
+-- an article stored for several topics no longer overwrite each other.
+-- Apply with: psql -h $POSTGRES_HOST -p $POSTGRES_PORT -U $POSTGRES_USER -d $POSTGRES_DB -f <this file>
+-- Stop the jobs and workers first. Compressed chunks are decompressed and recompressed by the policy.
+\set ON_ERROR_STOP on
+
+-- Databases created from the current init.sql already have the key: leave their chunks alone
+SELECT EXISTS (
+    SELECT 1 FROM pg_index i
+    JOIN pg_attribute a ON a.attrelid = i.indrelid AND a.attnum = ANY(i.indkey)
+    WHERE i.indexrelid = to_regclass('idx_articles_url_hash') AND a.attname = 'topic_id'
+) AS has_topic_key \gset
+\if :has_topic_key
+\echo idx_articles_url_hash already includes topic_id, nothing to do
+\quit
+\endif
+
+SELECT remove_compression_policy('articles', if_exists => true);
+SELECT decompress_chunk(chunk, if_compressed => true) FROM show_chunks('articles') chunk;
+
+-- Upsert key of the ingest (ON CONFLICT in db_helpers): an article is stored once per topic it is about.
+-- A unique index on a hypertable must include the time column, which also keeps every conflict check
+-- inside the one chunk the article belongs to.
+DROP INDEX IF EXISTS idx_articles_url_hash;
+CREATE UNIQUE INDEX idx_articles_url_hash ON articles (url_hash, topic_id, published_at);
+
+SELECT add_compression_policy('articles', compress_after => INTERVAL '30 days');
@@ -0,0 +1,15 @@
+-- Brings an existing database in line with init.sql: failed page requests of scheduled runs.
+-- Apply with: psql -h $POSTGRES_HOST -p $POSTGRES_PORT -U $POSTGRES_USER -d $POSTGRES_DB -f <this file>
+
+-- Page requests of a scheduled run that failed: a retried run only makes those marked retry again
+CREATE TABLE IF NOT EXISTS scheduler_failed_pages (
+    job_name VARCHAR(64) NOT NULL,
+    run_date DATE NOT NULL,
+    topic VARCHAR(255) NOT NULL,
+    day DATE NOT NULL,
+    page INTEGER NOT NULL,
+    attempts INTEGER NOT NULL,
+    error TEXT,
+    retry BOOLEAN NOT NULL,
+    PRIMARY KEY (job_name, run_date, topic, day, page)
+);
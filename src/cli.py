@@ -3,7 +3,9 @@ import logging
 
 from src.consts import SCRAPING_END_DATE
 from src.scripts.initialize_database import fill_database
+from src.scripts.poll_job import run_polling
 from src.scripts.scheduled_job import run_schedule
+from src.scripts.worker import run_workers
 
 
 def app():
@@ -24,6 +26,9 @@ def app():
     )
     parser.add_argument('-s', '--scrape', type=int, help="If entered, will scrape as many days as stated (enter -1 for all)")
     parser.add_argument('-m', '--maintain', action='store_true', help="If entered, will maintain the database by running the tool everyday")
+    parser.add_argument('-p', '--poll', action='store_true', help="If entered, will poll NewsAPI throughout the day for new articles")
+    parser.add_argument('-d', '--distributed', action='store_true', help="With --maintain, only scrape and enqueue the articles for the workers")
+    parser.add_argument('-w', '--workers', type=int, help="If entered, will run as many inference workers consuming the Redis work queue")
 
     args = parser.parse_args()
 
@@ -31,7 +36,13 @@ def app():
         fill_database(SCRAPING_END_DATE, args.scrape if args.scrape != -1 else None)
 
     if args.maintain:
-        run_schedule()
+        run_schedule(distributed=args.distributed)
+
+    if args.poll:
+        run_polling()
+
+    if args.workers:
+        run_workers(args.workers)
 
 
 if __name__ == "__main__":
@@ -1,4 +1,4 @@
-from datetime import date
+from datetime import date, time
 from enum import Enum
 from pathlib import Path
 
@@ -6,6 +6,16 @@ DEFAULT_TOPIC="Cloud Computing"
 
 TOPICS=["Cloud Computing"]
 
+# Weight of each topic when the request budget runs short (see src/libs/quota.py), 1 when missing
+TOPIC_PRIORITIES: dict[str, float] = {}
+
+# TOPICS and TOPIC_PRIORITIES only seed the topics table, which is the source of truth at runtime (see src/libs/topic_registry.py)
+TOPIC_REGISTRY_REFRESH_SECONDS = 60  # how often running processes check the table for changes
+
+# Scrape several topics per request with one OR query, routing the articles back locally (see src/libs/topic_routing.py)
+PACKED_QUERIES = False
+QUERY_MAX_LENGTH = 500  # NewsAPI's limit on q
+
 class TypesOfSA(str, Enum):
     LLM = "llm"
     ABSA = "absa"
@@ -14,5 +24,86 @@ SENTIMENT_ANALYSIS_MODEL:TypesOfSA=TypesOfSA.ABSA
 
 SCRAPING_END_DATE = date.today()
 
+# Streaming pipeline (see src/libs/pipeline.py): bounded queue size between stages and workers per stage
+PIPELINE_QUEUE_SIZE = 100
+PIPELINE_WORKERS = {
+    "fetch": 4,
+    "dedup": 1,
+    "relevance": 1,
+    "sentiment": 1,
+    "persist": 1,
+}
+
 LOGGING_LOCATION=(Path(__file__).parent.resolve() / "logs.log").absolute().resolve()
 
+
+# Database connection pool and background writer (see src/libs/db_writer.py)
+DB_POOL_MAX_CONNECTIONS = 5
+DB_WRITER_BATCH_SIZE = 500
+DB_WRITER_FLUSH_INTERVAL = 2.0  # seconds
+DB_WRITER_MAX_QUEUE = 5000
+DB_WRITER_MAX_RETRIES = 5
+DB_WRITER_BACKOFF = 0.5  # seconds, doubled on every retry
+
+# Backfill (see src/scripts/backfill.py): days per chunk and chunks processed in parallel
+BACKFILL_CHUNK_DAYS = 7
+BACKFILL_WORKERS = 4
+# Days in a row with failed units after which the backfill gives up (errors other than the history limit)
+BACKFILL_MAX_FAILED_DAYS = 3
+
+# Distributed mode (see src/libs/work_queue.py): article batches flow through a Redis stream to worker processes
+WORK_STREAM = "newsapi:article-batches"
+WORK_DEAD_LETTER_STREAM = "newsapi:article-batches:dead"
+WORK_GROUP = "inference-workers"
+WORK_BATCH_SIZE = 20
+# About 30 KB per batch of WORK_BATCH_SIZE articles, so ~120 MB of the 256 MB Redis maxmemory (services/redis)
+WORK_STREAM_MAXLEN = 4_000
+WORK_CLAIM_IDLE_MS = 10 * 60 * 1000  # unacknowledged batches idle for this long are redelivered
+WORK_MAX_DELIVERIES = 5  # after this many deliveries a batch is moved to the dead-letter stream
+
+# Scheduler (see src/scripts/scheduled_job.py)
+SCHEDULER_RUN_TIME = time(0, 5)  # daily run time; each replica adds its own jitter
+SCHEDULER_JITTER_SECONDS = 300
+SCHEDULER_POLL_SECONDS = 60
+SCHEDULER_RETRY_SECONDS = 15 * 60  # wait after a failed run before trying it again
+SCHEDULER_MAX_PAGE_ATTEMPTS = 3  # attempts at a failed page request, over a run's retries, before giving it up
+SCHEDULER_LEASE_SECONDS = 120
+SCHEDULER_MAX_CATCH_UP_DAYS = 7
+
+# Intraday polling (see src/scripts/poll_job.py)
+POLL_MIN_INTERVAL = 5 * 60  # seconds
+POLL_MAX_INTERVAL = 2 * 60 * 60  # seconds
+POLL_TARGET_ARTICLES = 20  # articles a poll should bring back on average
+POLL_RATE_SMOOTHING = 0.3  # weight of the latest observation in the arrival rate average
+POLL_MAX_PAGES = 3  # pages fetched in one poll when a burst overflows the first one
+POLL_DAILY_REQUEST_BUDGET = 100  # NewsAPI requests the poller may spend per day
+
+# NewsAPI request budget (see src/libs/quota.py), shared by every job through the api_quota_usage table
+QUOTA_DAILY_BUDGET = 100  # requests per API key and UTC day on the developer plan
+QUOTA_MAX_PAGES_PER_TOPIC = 1  # the developer plan stops at 100 results, raise on paid plans
+QUOTA_VOLUME_SMOOTHING = 0.3  # weight of the latest day in each topic's volume average
+QUOTA_MAX_DEFER_DAYS = 7  # deferred pages older than this are dropped
+
+# NewsAPI HTTP client (see src/libs/http_client.py)
+HTTP_REQUESTS_PER_SECOND = 2.0  # ceiling of the adaptive client-side rate
+HTTP_BURST = 5
+HTTP_TIMEOUT = 30  # seconds
+HTTP_MAX_RETRIES = {"rate_limited": 5, "server": 3, "network": 3}  # per error class, client errors are never retried
+HTTP_BACKOFF_BASE = 1.0  # seconds, doubled on every retry
+HTTP_BACKOFF_MAX = 60.0  # seconds, also caps the server's Retry-After
+CIRCUIT_FAILURE_THRESHOLD = 3  # consecutive failed requests before a topic is paused
+CIRCUIT_COOLDOWN_SECONDS = 5 * 60
+API_KEY_COOLDOWN_SECONDS = 15 * 60  # a rate-limited API key is left aside this long
+
+# Dashboard result cache in Redis (see src/libs/query_cache.py), invalidated by the ingest path
+QUERY_CACHE_VERSIONS_KEY = "dashboard:data-versions"
+QUERY_CACHE_PREFIX = "dashboard:cache:"
+QUERY_CACHE_HISTORY_TTL = 7 * 24 * 60 * 60  # seconds, closed buckets only change when their version does
+QUERY_CACHE_OPEN_TTL = 30  # seconds, for results including the bucket still being filled
+ROLLUP_REFRESH_INTERVAL = 60  # seconds between refreshes of the rollups over newly written days (db_helpers.RollupRefresher)
+
+# Storage of the articles hypertable, applied by src/scripts/configure_storage.py (PostgreSQL intervals)
+ARTICLES_CHUNK_INTERVAL = "7 days"  # only chunks created afterwards get a new interval
+ARTICLES_COMPRESS_AFTER = "30 days"  # chunks older than this are compressed, segmented by topic
+ARTICLES_TEXT_TIER_AFTER: str | None = None  # e.g. "14 days": move description and content to articles_text_archive
+ARTICLES_TEXT_RETENTION: str | None = None  # e.g. "2 years": drop archived text older than this
@@ -0,0 +1,220 @@
+import datetime
+import hashlib
+import logging
+import os
+import threading
+from dataclasses import dataclass
+
+import requests
+from dotenv import load_dotenv
+from psycopg2.extras import execute_values
+
+from src.consts import API_KEY_COOLDOWN_SECONDS, QUOTA_DAILY_BUDGET
+from src.libs.db_helpers import pooled_connection
+
+logger = logging.getLogger(__name__)
+load_dotenv()
+
+
+_pool: "ApiKeyPool | None" = None
+_pool_lock = threading.Lock()
+
+
+class NoApiKeyAvailable(Exception):
+    """Every configured NewsAPI key is cooling down or out of requests for today."""
+
+
+def configured_keys() -> list[str]:
+    """The NewsAPI keys from NEWS_API_KEYS (comma-separated), or the single NEWS_API_KEY."""
+    keys = [key.strip() for key in os.getenv("NEWS_API_KEYS", "").split(",") if key.strip()]
+    if not keys and os.getenv("NEWS_API_KEY"):
+        keys = [os.getenv("NEWS_API_KEY")]
+    return keys
+
+
+def _key_id(key: str) -> str:
+    # Keys are secrets, only a fingerprint of them is logged and stored
+    return hashlib.sha256(key.encode()).hexdigest()[:12]
+
+
+def _today() -> datetime.date:
+    return datetime.datetime.now(datetime.timezone.utc).date()
+
+
+@dataclass(slots=True)
+class _KeyState:
+    key: str
+    key_id: str
+    requests: int = 0
+    cooldown_until: datetime.datetime | None = None
+
+
+class ApiKeyPool:
+    """Spreads NewsAPI requests over several keys, each with its own daily quota.
+
+    acquire() hands out the least-used key that is neither cooling down nor out of
+    requests for the UTC day. report() cools a key down when NewsAPI rejects it: for
+    API_KEY_COOLDOWN_SECONDS after a rate limit, until the next day when it is invalid
+    or disabled. Counters and cooldowns live in api_key_usage and a key is chosen and
+    counted in one UPDATE, so they survive restarts and processes sharing the keys
+    never hand out more than a key's quota between them.
+    """
+
+    def __init__(self, keys: list[str], daily_quota: int = QUOTA_DAILY_BUDGET):
+        if not keys:
+            raise ValueError("No NewsAPI key configured, set NEWS_API_KEYS or NEWS_API_KEY")
+        self.daily_quota = daily_quota
+        self._states = {key: _KeyState(key, _key_id(key)) for key in keys}
+        self._day: datetime.date | None = None
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._states)
+
+    def acquire(self) -> str:
+        """Reserve one request on the least-used available key."""
+        with self._lock:
+            self._load_if_new_day()
+            # A key picked by another process in the meantime may have just run out: try the next one
+            for _ in self._states:
+                reserved = self._reserve()
+                if reserved is None:
+                    break
+                key_id, requests = reserved
+                state = next(state for state in self._states.values() if state.key_id == key_id)
+                state.requests = requests
+                return state.key
+            raise NoApiKeyAvailable(f"All {len(self._states)} NewsAPI keys are exhausted or cooling down")
+
+    def count(self, key: str) -> None:
+        """Count one more request on a key handed out by acquire(), e.g. a retry sent with it."""
+        with self._lock:
+            state = self._states[key]
+            # NewsAPI counts it whatever the quota left, so it is not refused here
+            state.requests = self._increment(state)
+
+    def has_spare(self, key: str) -> bool:
+        """Whether another key than ``key`` could take over right now."""
+        now = datetime.datetime.now(datetime.timezone.utc)
+        with self._lock:
+            return any(
+                state.key != key and state.requests < self.daily_quota
+                and (state.cooldown_until is None or state.cooldown_until <= now)
+                for state in self._states.values()
+            )
+
+    def report(self, key: str, response: requests.Response) -> bool:
+        """Cool the key down if NewsAPI rejected it; returns whether the request should move to another key."""
+        if response.status_code == 429:
+            self._cool_down(key, datetime.timedelta(seconds=API_KEY_COOLDOWN_SECONDS), "rate limited")
+            return True
+        if response.status_code == 401:
+            self._cool_down(key, datetime.timedelta(days=1), "rejected")
+            return True
+        return False
+
+    def usage(self) -> dict[str, int]:
+        """Requests spent today per key fingerprint."""
+        with self._lock:
+            self._load_if_new_day()
+            return {state.key_id: state.requests for state in self._states.values()}
+
+    def _cool_down(self, key: str, duration: datetime.timedelta, reason: str) -> None:
+        with self._lock:
+            state = self._states[key]
+            state.cooldown_until = datetime.datetime.now(datetime.timezone.utc) + duration
+            logger.warning(f"NewsAPI key {state.key_id} {reason}, cooling down until {state.cooldown_until:%Y-%m-%d %H:%M}")
+            self._save(state)
+
+    def _load_if_new_day(self) -> None:
+        if self._day == _today():
+            return
+        self._day = _today()
+        ids = {state.key_id: state for state in self._states.values()}
+        with pooled_connection() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute(
+                    """
+                        SELECT key_id, COALESCE(SUM(requests) FILTER (WHERE day = %s), 0), MAX(cooldown_until)
+                        FROM api_key_usage WHERE key_id = ANY(%s) GROUP BY key_id
+                    """,
+                    (self._day, list(ids)),
+                )
+                loaded = {key_id: (requests, cooldown) for key_id, requests, cooldown in cursor.fetchall()}
+        for key_id, state in ids.items():
+            state.requests, state.cooldown_until = loaded.get(key_id, (0, None))
+
+    def _reserve(self) -> tuple[str, int] | None:
+        """Count one request on the least-used available key in the database; its fingerprint and requests today."""
+        ids = [state.key_id for state in self._states.values()]
+        with pooled_connection() as conn:
+            with conn.cursor() as cursor:
+                execute_values(
+                    cursor,
+                    "INSERT INTO api_key_usage (day, key_id) VALUES %s ON CONFLICT (day, key_id) DO NOTHING",
+                    [(self._day, key_id) for key_id in ids],
+                )
+                # The chosen row stays locked until the commit, and its quota is checked again once it is ours
+                cursor.execute(
+                    """
+                        UPDATE api_key_usage SET requests = requests + 1, updated_at = NOW()
+                        WHERE day = %(day)s AND requests < %(quota)s AND key_id = (
+                            SELECT candidate.key_id FROM api_key_usage candidate
+                            WHERE candidate.day = %(day)s AND candidate.key_id = ANY(%(ids)s)
+                                AND candidate.requests < %(quota)s
+                                AND NOT EXISTS (
+                                    SELECT 1 FROM api_key_usage cooling
+                                    WHERE cooling.key_id = candidate.key_id AND cooling.cooldown_until > NOW()
+                                )
+                            ORDER BY candidate.requests, candidate.key_id
+                            LIMIT 1
+                            FOR UPDATE
+                        )
+                        RETURNING key_id, requests
+                    """,
+                    {"day": self._day, "quota": self.daily_quota, "ids": ids},
+                )
+                reserved = cursor.fetchone()
+            conn.commit()
+        return reserved
+
+    def _increment(self, state: _KeyState) -> int:
+        """Count one request on ``state``'s key in the database; its requests today."""
+        with pooled_connection() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute(
+                    """
+                        INSERT INTO api_key_usage (day, key_id, requests) VALUES (%s, %s, 1)
+                        ON CONFLICT (day, key_id) DO UPDATE SET
+                            requests = api_key_usage.requests + 1,
+                            updated_at = NOW()
+                        RETURNING requests
+                    """,
+                    (self._day, state.key_id),
+                )
+                requests = cursor.fetchone()[0]
+            conn.commit()
+        return requests
+
+    def _save(self, state: _KeyState) -> None:
+        with pooled_connection() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute(
+                    """
+                        INSERT INTO api_key_usage (day, key_id, cooldown_until) VALUES (%s, %s, %s)
+                        ON CONFLICT (day, key_id) DO UPDATE SET
+                            cooldown_until = GREATEST(api_key_usage.cooldown_until, EXCLUDED.cooldown_until),
+                            updated_at = NOW()
+                    """,
+                    (self._day, state.key_id, state.cooldown_until),
+                )
+            conn.commit()
+
+
+def get_api_key_pool() -> ApiKeyPool:
+    """Get the process-wide key pool over configured_keys() (created on first use)."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ApiKeyPool(configured_keys())
+        return _pool
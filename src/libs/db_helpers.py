@@ -1,20 +1,57 @@
+import hashlib
 import os
-from datetime import datetime
+import re
+import threading
+from contextlib import contextmanager
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Iterable, Iterator
+
 import psycopg2
+from psycopg2.extras import execute_values
+from psycopg2.pool import ThreadedConnectionPool
 from dotenv import load_dotenv
 
+from src.consts import DB_POOL_MAX_CONNECTIONS, ROLLUP_REFRESH_INTERVAL
 from src.libs.models import Article
-from src.libs.sentiment_analysis.base import Sentiment
+from src.libs.query_cache import publish_versions
+from src.libs.sentiment_analysis.base import Scores, Sentiment
 import logging
 
 logger = logging.getLogger(__name__)
 load_dotenv()
 
+_pool: ThreadedConnectionPool | None = None
+_pool_lock = threading.Lock()
 
-def get_db_connection():
-    """Get a connection to the PostgreSQL/TimescaleDB database."""
-    logger.debug("Connecting to " + os.getenv("POSTGRES_DB"))
-    return psycopg2.connect(
+# Ids of the names already in each dimension table, only ever added to (ids are never reused)
+_dimension_ids: dict[str, dict[str, int]] = {"article_topics": {}, "article_sources": {}, "model_versions": {}}
+_dimension_lock = threading.Lock()
+
+# The topic, source and model version are stored as ids of the article_topics, article_sources and model_versions tables
+ARTICLE_COLUMNS = """
+    topic_id, published_at, source_id, author,
+    title, description, url, url_to_image, content, sentiment,
+    relevance_entailment, relevance_neutral, relevance_contradiction,
+    sentiment_positive, sentiment_negative, sentiment_neutral, model_version_id, url_hash
+"""
+# ON CONFLICT to handle duplicates by canonical URL within a topic, on the unique index idx_articles_url_hash
+ARTICLE_CONFLICT_CLAUSE = """
+    ON CONFLICT (url_hash, topic_id, published_at) DO UPDATE SET
+        sentiment = EXCLUDED.sentiment,
+        created_at = NOW(),
+        -- An article resumed from the ledger was scored by the same model version, without its scores
+        relevance_entailment = COALESCE(EXCLUDED.relevance_entailment, articles.relevance_entailment),
+        relevance_neutral = COALESCE(EXCLUDED.relevance_neutral, articles.relevance_neutral),
+        relevance_contradiction = COALESCE(EXCLUDED.relevance_contradiction, articles.relevance_contradiction),
+        sentiment_positive = COALESCE(EXCLUDED.sentiment_positive, articles.sentiment_positive),
+        sentiment_negative = COALESCE(EXCLUDED.sentiment_negative, articles.sentiment_negative),
+        sentiment_neutral = COALESCE(EXCLUDED.sentiment_neutral, articles.sentiment_neutral),
+        model_version_id = COALESCE(EXCLUDED.model_version_id, articles.model_version_id)
+"""
+
+
+def _connection_kwargs() -> dict:
+    return dict(
         host=os.getenv("POSTGRES_HOST", "localhost"),
         port=os.getenv("POSTGRES_PORT", "5432"),
         database=os.getenv("POSTGRES_DB"),
@@ -23,7 +60,159 @@ def get_db_connection():
     )
 
 
-def add_to_db(article: Article, sentiment: Sentiment, topic: str) -> None:
+def get_db_connection():
+    """Get a connection to the PostgreSQL/TimescaleDB database."""
+    logger.debug("Connecting to " + os.getenv("POSTGRES_DB"))
+    return psycopg2.connect(**_connection_kwargs())
+
+
+def get_db_pool() -> ThreadedConnectionPool:
+    """Get the process-wide, thread-safe connection pool (created on first use)."""
+    global _pool
+    with _pool_lock:
+        if _pool is None or _pool.closed:
+            logger.debug("Creating connection pool for " + os.getenv("POSTGRES_DB"))
+            _pool = ThreadedConnectionPool(1, DB_POOL_MAX_CONNECTIONS, **_connection_kwargs())
+        return _pool
+
+
+@contextmanager
+def pooled_connection() -> Iterator:
+    """Borrow a connection from the pool, discarding it instead of returning it if it broke."""
+    pool = get_db_pool()
+    conn = pool.getconn()
+    try:
+        yield conn
+    except (psycopg2.OperationalError, psycopg2.InterfaceError):
+        pool.putconn(conn, close=True)
+        conn = None
+        raise
+    finally:
+        if conn is not None:
+            if not conn.closed:
+                conn.rollback()
+            pool.putconn(conn, close=bool(conn.closed))
+
+
+def dimension_ids(table: str, names: Iterable[str | None]) -> dict[str, int]:
+    """
+    Get the ids of names in a dimension table (article_topics, article_sources or model_versions), adding the new ones.
+
+    New names are committed on a connection of their own before their ids are cached, so
+    that the cache never holds the id of a row rolled back with the caller's transaction.
+    """
+    wanted = {name for name in names if name is not None}
+    with _dimension_lock:
+        known = _dimension_ids[table]
+        missing = sorted(wanted - known.keys())
+        if missing:
+            with pooled_connection() as conn:
+                with conn.cursor() as cursor:
+                    # Inserting only the names not found keeps the identity from burning values on conflicts
+                    cursor.execute(f"SELECT name, id FROM {table} WHERE name = ANY(%s)", (missing,))
+                    known.update(cursor.fetchall())
+                    new = [(name,) for name in missing if name not in known]
+                    if new:
+                        execute_values(cursor, f"INSERT INTO {table} (name) VALUES %s ON CONFLICT (name) DO NOTHING", new)
+                        conn.commit()
+                        cursor.execute(f"SELECT name, id FROM {table} WHERE name = ANY(%s)", ([name for name, in new],))
+                        known.update(cursor.fetchall())
+        return {name: known[name] for name in wanted}
+
+
+_URL_AUTHORITY = re.compile(r"^[A-Za-z][A-Za-z0-9+.-]*://[^/]*")
+
+
+def canonical_url(url: str) -> str:
+    """
+    The form of a URL articles are deduplicated by: surrounding whitespace and the fragment
+    removed, the scheme and host lowercased and the trailing slashes of the path removed.
+
+    Must match the canonical_url SQL function, which migrations use to hash stored URLs.
+    """
+    trimmed = url.strip(" \t\r\n").split("#", 1)[0]
+    path, question, query = trimmed.partition("?")
+    path = path.rstrip("/")
+    authority = _URL_AUTHORITY.match(path)
+    if authority:
+        path = authority.group().lower() + path[authority.end():]
+    return path + question + query
+
+
+def url_hash(url: str | None) -> str | None:
+    """MD5 of the canonical URL in hex, stored as a UUID (16 bytes) in the articles upsert key."""
+    if url is None:
+        return None
+    return hashlib.md5(canonical_url(url).encode()).hexdigest()
+
+
+def article_row(
+    article: Article,
+    sentiment: Sentiment,
+    topic: str,
+    scores: Scores | None = None,
+    model_version: str | None = None,
+) -> tuple:
+    """
+    Build the articles row, in ARTICLE_COLUMNS order but with the topic, source and model version
+    names and without the URL hash, for an analysed article.
+    """
+    # Rejected here rather than by the database, where it would fail the writer's whole batch
+    if article.published_datetime is None:
+        raise ValueError(f"Article without a publication date: {article.url}")
+
+    return (
+        topic,
+        article.published_datetime,
+        article.source.name,
+        article.author,
+        article.title,
+        article.description,
+        article.url,
+        article.urlToImage,
+        article.content,
+        sentiment.value,
+        *(scores or Scores()).model_dump().values(),
+        model_version,
+    )
+
+
+def insert_article_rows(cursor, rows: list[tuple]) -> None:
+    """
+    Insert many article rows in a single statement.
+
+    A statement cannot upsert the same key twice, so only the last row per canonical URL, topic
+    and publication date is kept. Articles without a URL are never deduplicated.
+
+    Args:
+        cursor: An open cursor; the caller owns the transaction
+        rows: Rows built by article_row
+    """
+    url_index = 6
+    hashed = [(row, url_hash(row[url_index])) for row in rows]
+    unique_rows = list({
+        (digest, row[0], row[1]) if digest else position: (row, digest) for position, (row, digest) in enumerate(hashed)
+    }.values())
+    topic_ids = dimension_ids("article_topics", (row[0] for row, _ in unique_rows))
+    source_ids = dimension_ids("article_sources", (row[2] for row, _ in unique_rows))
+    model_version_ids = dimension_ids("model_versions", (row[-1] for row, _ in unique_rows))
+    execute_values(
+        cursor,
+        f"INSERT INTO articles ({ARTICLE_COLUMNS}) VALUES %s {ARTICLE_CONFLICT_CLAUSE}",
+        [
+            (topic_ids[row[0]], row[1], source_ids.get(row[2]), *row[3:-1], model_version_ids.get(row[-1]), digest)
+            for row, digest in unique_rows
+        ],
+    )
+
+
+def add_to_db(
+    article: Article,
+    sentiment: Sentiment,
+    topic: str,
+    scores: Scores | None = None,
+    model_version: str | None = None,
+) -> None:
     """
     Add an article with its sentiment to the TimescaleDB warehouse.
 
@@ -31,46 +220,266 @@ def add_to_db(article: Article, sentiment: Sentiment, topic: str) -> None:
         article: The article to store
         sentiment: The sentiment analysis result
         topic: The topic this article relates to
+        scores: The model probabilities behind the sentiment, if any
+        model_version: The SentimentAnalyzer.model_version that scored it
     """
     try:
-        # Parse the published date
-        published_at = datetime.fromisoformat(article.publishedAt.replace('Z', '+00:00'))
-
         conn = get_db_connection()
         cursor = conn.cursor()
 
-        # Insert article with sentiment (ON CONFLICT to handle duplicates by URL)
-        insert_query = """
-            INSERT INTO articles (
-                topic, published_at, source_name, author,
-                title, description, url, url_to_image, content, sentiment
-            ) VALUES (
-                %s, %s, %s, %s, %s, %s, %s, %s, %s, %s
-            )
-            ON CONFLICT (url) DO UPDATE SET
-                sentiment = EXCLUDED.sentiment,
-                created_at = NOW()
-        """
-
-        cursor.execute(insert_query, (
-            topic,
-            published_at,
-            article.source.name,
-            article.author,
-            article.title,
-            article.description,
-            article.url,
-            article.urlToImage,
-            article.content,
-            sentiment.value
-        ))
+        row = article_row(article, sentiment, topic, scores, model_version)
+        insert_article_rows(cursor, [row])
 
         conn.commit()
         cursor.close()
         conn.close()
 
+        with RollupRefresher(interval=None) as refresher:
+            refresher.record([row])
+
         logger.info(f"Added article to DB: {article.title} with sentiment: {sentiment.value}")
 
     except Exception as e:
         logger.error(f"Error adding article to database: {e}")
-        raise
\ No newline at end of file
+        raise
+
+
+def load_completed_units(topics: list[str], start: date, end: date) -> set[tuple[str, date]]:
+    """
+    Get the (topic, day) backfill units already completed within a date range.
+
+    Args:
+        topics: The topics of interest
+        start: First day of the range (inclusive)
+        end: Last day of the range (inclusive)
+    """
+    with pooled_connection() as conn:
+        with conn.cursor() as cursor:
+            cursor.execute(
+                """
+                    SELECT topic, day FROM backfill_checkpoints
+                    WHERE topic = ANY(%s) AND day >= %s AND day <= %s
+                """,
+                (topics, start, end),
+            )
+            return set(cursor.fetchall())
+
+
+def mark_unit_completed(topic: str, day: date, articles: int) -> None:
+    """Record that a (topic, day) backfill unit has been fully scored and persisted."""
+    with pooled_connection() as conn:
+        with conn.cursor() as cursor:
+            cursor.execute(
+                """
+                    INSERT INTO backfill_checkpoints (topic, day, articles) VALUES (%s, %s, %s)
+                    ON CONFLICT (topic, day) DO UPDATE SET
+                        articles = EXCLUDED.articles,
+                        completed_at = NOW()
+                """,
+                (topic, day, articles),
+            )
+        conn.commit()
+
+
+def last_successful_run(job_name: str) -> date | None:
+    """Get the latest run date a scheduled job completed, if any, even if some of its pages could not be fetched."""
+    with pooled_connection() as conn:
+        with conn.cursor() as cursor:
+            cursor.execute(
+                "SELECT MAX(run_date) FROM scheduler_runs WHERE job_name = %s AND status IN ('succeeded', 'partial')",
+                (job_name,),
+            )
+            return cursor.fetchone()[0]
+
+
+def record_run(job_name: str, run_date: date, status: str, owner: str | None = None) -> None:
+    """
+    Record the status of a scheduled run ('running', 'succeeded', 'partial' or 'failed').
+
+    Args:
+        job_name: The scheduled job
+        run_date: The date the run covers
+        status: The new status, finished_at is set for anything but 'running'
+        owner: The replica executing the run
+    """
+    with pooled_connection() as conn:
+        with conn.cursor() as cursor:
+            cursor.execute(
+                """
+                    INSERT INTO scheduler_runs (job_name, run_date, status, owner) VALUES (%s, %s, %s, %s)
+                    ON CONFLICT (job_name, run_date) DO UPDATE SET
+                        status = EXCLUDED.status,
+                        owner = COALESCE(EXCLUDED.owner, scheduler_runs.owner),
+                        started_at = CASE WHEN EXCLUDED.status = 'running' THEN NOW() ELSE scheduler_runs.started_at END,
+                        finished_at = CASE WHEN EXCLUDED.status = 'running' THEN NULL ELSE NOW() END
+                """,
+                (job_name, run_date, status, owner),
+            )
+        conn.commit()
+
+
+def load_failed_pages(job_name: str, run_date: date) -> list[tuple[str, date, int, int, str, bool]]:
+    """Get the (topic, day, page, attempts, error, retry) of the page requests a scheduled run failed so far."""
+    with pooled_connection() as conn:
+        with conn.cursor() as cursor:
+            cursor.execute(
+                """
+                    SELECT topic, day, page, attempts, error, retry FROM scheduler_failed_pages
+                    WHERE job_name = %s AND run_date = %s
+                """,
+                (job_name, run_date),
+            )
+            return cursor.fetchall()
+
+
+def save_failed_pages(job_name: str, run_date: date, pages: list[tuple[str, date, int, int, str, bool]]) -> None:
+    """Replace the failed page requests of a scheduled run (see load_failed_pages)."""
+    with pooled_connection() as conn:
+        with conn.cursor() as cursor:
+            cursor.execute("DELETE FROM scheduler_failed_pages WHERE job_name = %s AND run_date = %s", (job_name, run_date))
+            if pages:
+                execute_values(
+                    cursor,
+                    """
+                        INSERT INTO scheduler_failed_pages (job_name, run_date, topic, day, page, attempts, error, retry)
+                        VALUES %s
+                    """,
+                    [(job_name, run_date, *page) for page in pages],
+                )
+        conn.commit()
+
+
+def load_watermarks(topics: list[str]) -> dict[str, tuple[datetime, int, float]]:
+    """Get the (watermark, interval in seconds, arrival rate) saved by the intraday poller per topic."""
+    with pooled_connection() as conn:
+        with conn.cursor() as cursor:
+            cursor.execute(
+                "SELECT topic, watermark, interval_seconds, arrival_rate FROM topic_watermarks WHERE topic = ANY(%s)",
+                (topics,),
+            )
+            return {topic: (watermark, interval, rate) for topic, watermark, interval, rate in cursor.fetchall()}
+
+
+def save_watermark(topic: str, watermark: datetime, interval_seconds: int, arrival_rate: float) -> None:
+    """Persist the intraday poller's state for a topic."""
+    with pooled_connection() as conn:
+        with conn.cursor() as cursor:
+            cursor.execute(
+                """
+                    INSERT INTO topic_watermarks (topic, watermark, interval_seconds, arrival_rate) VALUES (%s, %s, %s, %s)
+                    ON CONFLICT (topic) DO UPDATE SET
+                        watermark = GREATEST(topic_watermarks.watermark, EXCLUDED.watermark),
+                        interval_seconds = EXCLUDED.interval_seconds,
+                        arrival_rate = EXCLUDED.arrival_rate,
+                        updated_at = NOW()
+                """,
+                (topic, watermark, interval_seconds, arrival_rate),
+            )
+        conn.commit()
+
+
+def refresh_rollups(start: datetime, end: datetime) -> None:
+    """
+    Re-materialize the dashboard rollups (articles_hourly, then articles_daily) over a time range.
+
+    Their refresh policies only look a few days back, so rows written further in the past,
+    by a backfill for instance, must be refreshed explicitly. Buckets still open are left
+    out: the rollups read them from the articles table until they close.
+    """
+    now = datetime.now(timezone.utc)
+    open_buckets = {
+        "articles_hourly": now.replace(minute=0, second=0, microsecond=0),
+        "articles_daily": datetime.combine(now.date(), time(), timezone.utc),
+    }
+    conn = get_db_connection()
+    try:
+        # Continuous aggregates cannot be refreshed inside a transaction
+        conn.autocommit = True
+        with conn.cursor() as cursor:
+            for view, open_start in open_buckets.items():
+                if start < min(end, open_start):
+                    cursor.execute("CALL refresh_continuous_aggregate(%s, %s, %s)", (view, start, min(end, open_start)))
+    finally:
+        conn.close()
+
+
+class RollupRefresher:
+    """Refreshes the dashboard rollups over the days articles were written to, then bumps their data versions.
+
+    Rows landing in closed buckets only reach the rollups once these are refreshed, and a
+    version bumped earlier would let the dashboard cache the stale totals under it. Writers
+    only record() the rows they committed (it is their on_flush hook); the days collected
+    are refreshed together every ``interval`` seconds on a thread of the refresher's own,
+    and once more on close(). Days whose refresh fails are kept for the next attempt.
+
+    Args:
+        interval: Seconds between refreshes, None to refresh only on close (one-off runs)
+    """
+
+    def __init__(self, interval: float | None = ROLLUP_REFRESH_INTERVAL):
+        self.interval = interval
+        self._days: set[date] = set()
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def __enter__(self) -> "RollupRefresher":
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def start(self) -> None:
+        if self.interval is not None and self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="rollup-refresher", daemon=True)
+            self._thread.start()
+
+    def close(self) -> None:
+        """Stop the refresh thread and refresh what is left."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.refresh()
+
+    def record(self, rows: list[tuple]) -> None:
+        """Mark the UTC days of committed article rows (see article_row) for the next refresh."""
+        days = {row[1].astimezone(timezone.utc).date() for row in rows if row[1] is not None}
+        with self._lock:
+            self._days |= days
+
+    def refresh(self) -> None:
+        with self._refresh_lock:
+            with self._lock:
+                days, self._days = sorted(self._days), set()
+            for first, last in _day_runs(days):
+                start = datetime.combine(first, time(), timezone.utc)
+                end = datetime.combine(last, time(), timezone.utc) + timedelta(days=1)
+                try:
+                    refresh_rollups(start, end)
+                except psycopg2.Error as e:
+                    logger.error(f"Refreshing the rollups from {start:%Y-%m-%d} to {end:%Y-%m-%d} failed, retrying later: {e}")
+                    with self._lock:
+                        self._days.update(first + timedelta(days=i) for i in range((last - first).days + 1))
+                    continue
+                publish_versions(start + timedelta(days=i) for i in range((end - start).days))
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.refresh()
+
+
+def _day_runs(days: list[date]) -> Iterator[tuple[date, date]]:
+    """(first, last) of each run of consecutive days in sorted ``days``."""
+    run_start = previous = None
+    for day in days:
+        if previous is not None and day != previous + timedelta(days=1):
+            yield run_start, previous
+            run_start = None
+        if run_start is None:
+            run_start = day
+        previous = day
+    if run_start is not None:
+        yield run_start, previous
@@ -0,0 +1,217 @@
+import logging
+import queue
+import threading
+import time
+from typing import Any, Callable
+
+import psycopg2
+
+from src.consts import (
+    DB_WRITER_BACKOFF,
+    DB_WRITER_BATCH_SIZE,
+    DB_WRITER_FLUSH_INTERVAL,
+    DB_WRITER_MAX_QUEUE,
+    DB_WRITER_MAX_RETRIES,
+)
+from src.libs.db_helpers import insert_article_rows, pooled_connection
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+# Errors worth retrying: lost connections, serialization failures and deadlocks
+TRANSIENT_ERRORS = (
+    psycopg2.OperationalError,
+    psycopg2.InterfaceError,
+    psycopg2.extensions.TransactionRollbackError,
+)
+
+
+class _Barrier:
+    def __init__(self):
+        self.event = threading.Event()
+
+
+class BackgroundDBWriter:
+    """Batches rows on a background thread and writes them over a pooled connection.
+
+    Producers call submit() and return immediately; the writer commits a batch once
+    ``batch_size`` rows are queued or ``flush_interval`` seconds have passed since the
+    first row of the batch. Transient database errors are retried with exponential
+    backoff; other errors split the batch until the offending rows are isolated and
+    dropped. close() (or leaving the ``with`` block) flushes everything still queued.
+
+    Args:
+        write_batch: Called with (cursor, rows) inside the transaction, insert_article_rows by default.
+        on_flush: Called with the rows after their transaction committed.
+    """
+
+    def __init__(
+        self,
+        write_batch: Callable[[Any, list], None] = insert_article_rows,
+        on_flush: Callable[[list], None] | None = None,
+        batch_size: int = DB_WRITER_BATCH_SIZE,
+        flush_interval: float = DB_WRITER_FLUSH_INTERVAL,
+        max_queue: int = DB_WRITER_MAX_QUEUE,
+        max_retries: int = DB_WRITER_MAX_RETRIES,
+        backoff: float = DB_WRITER_BACKOFF,
+        name: str = "db-writer",
+    ):
+        self.write_batch = write_batch
+        self.on_flush = on_flush
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.name = name
+
+        self._queue: queue.Queue = queue.Queue(maxsize=max_queue)
+        self._thread: threading.Thread | None = None
+
+        self.rows_written = 0
+        self.rows_failed = 0
+        self.flushes = 0
+        self.last_flush_latency = 0.0
+        self.total_flush_latency = 0.0
+
+    def __enter__(self) -> "BackgroundDBWriter":
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
+
+    @property
+    def queue_depth(self) -> int:
+        """Rows (and flush requests) waiting to be written."""
+        return self._queue.qsize()
+
+    @property
+    def average_flush_latency(self) -> float:
+        return self.total_flush_latency / self.flushes if self.flushes else 0.0
+
+    def stats(self) -> dict:
+        return {
+            "queue_depth": self.queue_depth,
+            "rows_written": self.rows_written,
+            "rows_failed": self.rows_failed,
+            "flushes": self.flushes,
+            "last_flush_latency": self.last_flush_latency,
+            "average_flush_latency": self.average_flush_latency,
+        }
+
+    def start(self) -> None:
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+            self._thread.start()
+
+    def submit(self, row: Any) -> None:
+        """Queue a row for writing; blocks only while the queue is full."""
+        self._queue.put(row)
+
+    def barrier(self) -> threading.Event:
+        """Return an event that is set once every row submitted before this call has been handled."""
+        barrier = _Barrier()
+        self._queue.put(barrier)
+        return barrier.event
+
+    def flush(self, timeout: float | None = None) -> bool:
+        """Write everything queued so far and wait for it; returns False on timeout."""
+        return self.barrier().wait(timeout)
+
+    def close(self) -> None:
+        """Flush all queued rows and stop the writer thread."""
+        if self._thread is None:
+            return
+        self._queue.put(_STOP)
+        self._thread.join()
+        self._thread = None
+        logger.info(f"{self.name} closed: {self.stats()}")
+
+    def _run(self) -> None:
+        batch: list = []
+        deadline = None
+
+        while True:
+            timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = None
+
+            if item is None or item is _STOP or isinstance(item, _Barrier):
+                self._flush(batch)
+                batch, deadline = [], None
+                if isinstance(item, _Barrier):
+                    item.event.set()
+                if item is _STOP:
+                    return
+                continue
+
+            batch.append(item)
+            if deadline is None:
+                deadline = time.monotonic() + self.flush_interval
+            if len(batch) >= self.batch_size:
+                self._flush(batch)
+                batch, deadline = [], None
+
+    def _flush(self, batch: list) -> None:
+        if not batch:
+            return
+
+        started = time.monotonic()
+        written = self._write_splitting(batch)
+        if not written:
+            return
+
+        self.last_flush_latency = time.monotonic() - started
+        self.total_flush_latency += self.last_flush_latency
+        self.flushes += 1
+        self.rows_written += len(written)
+        logger.debug(
+            f"{self.name} flushed {len(written)} rows in {self.last_flush_latency:.3f}s "
+            f"(queue depth {self.queue_depth})"
+        )
+
+        if self.on_flush is not None:
+            try:
+                self.on_flush(written)
+            except Exception as e:
+                logger.error(f"{self.name} on_flush hook failed: {e}")
+
+    def _write_splitting(self, batch: list) -> list:
+        """
+        Write a batch, returning the rows committed.
+
+        A batch failing for good (a value too long for its column, say) is split in halves
+        and each written on its own, so only the offending rows are dropped.
+        """
+        try:
+            return batch if self._write(batch) else []
+        except Exception as e:
+            if len(batch) == 1:
+                logger.error(f"{self.name} dropped a row: {e}\n{batch[0]!r:.500}")
+                self.rows_failed += 1
+                return []
+            logger.warning(f"{self.name} batch of {len(batch)} rows failed ({e}), splitting it")
+            middle = len(batch) // 2
+            return self._write_splitting(batch[:middle]) + self._write_splitting(batch[middle:])
+
+    def _write(self, batch: list) -> bool:
+        """Commit a batch, retrying transient errors; False once retries are exhausted, other errors are raised."""
+        for attempt in range(self.max_retries + 1):
+            try:
+                with pooled_connection() as conn:
+                    with conn.cursor() as cursor:
+                        self.write_batch(cursor, batch)
+                    conn.commit()
+                return True
+            except TRANSIENT_ERRORS as e:
+                if attempt == self.max_retries:
+                    logger.error(f"{self.name} dropped {len(batch)} rows after {attempt + 1} attempts: {e}")
+                    self.rows_failed += len(batch)
+                    return False
+                delay = self.backoff * 2 ** attempt
+                logger.warning(f"{self.name} flush failed ({e}), retrying in {delay:.1f}s")
+                time.sleep(delay)
+        return False
@@ -0,0 +1,243 @@
+import logging
+import random
+import threading
+import time
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+from enum import Enum
+from typing import Callable
+
+import requests
+
+from src.consts import (
+    CIRCUIT_COOLDOWN_SECONDS,
+    CIRCUIT_FAILURE_THRESHOLD,
+    HTTP_BACKOFF_BASE,
+    HTTP_BACKOFF_MAX,
+    HTTP_BURST,
+    HTTP_MAX_RETRIES,
+    HTTP_REQUESTS_PER_SECOND,
+    HTTP_TIMEOUT,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class ErrorClass(str, Enum):
+    RATE_LIMITED = "rate_limited"
+    SERVER = "server"
+    NETWORK = "network"
+    CLIENT = "client"  # our request is wrong, retrying cannot help
+
+
+class CircuitOpenError(Exception):
+    """Requests for this key are paused after repeated failures."""
+
+    def __init__(self, key: str, retry_in: float):
+        self.key = key
+        self.retry_in = retry_in
+        super().__init__(f"Circuit open for {key!r}, retrying in {retry_in:.0f}s")
+
+
+class TokenBucket:
+    """Client-side rate limiter whose rate adapts to the server (thread-safe).
+
+    The rate is halved every time the server pushes back (slow_down) and grows back
+    linearly with successful requests (speed_up), up to ``max_rate``, so requests
+    settle just under the highest rate the API accepts.
+    """
+
+    def __init__(self, max_rate: float, capacity: int):
+        self.max_rate = max_rate
+        self.rate = max_rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        """Block until a request may be sent."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+    def slow_down(self) -> None:
+        with self._lock:
+            self.rate = max(self.max_rate / 64, self.rate / 2)
+            self._tokens = min(self._tokens, 0.0)
+
+    def speed_up(self) -> None:
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + self.max_rate / 16)
+
+
+@dataclass(slots=True)
+class _Circuit:
+    failures: int = 0
+    opened_at: float | None = None
+
+
+class CircuitBreaker:
+    """Pauses one key (e.g. a topic) after ``threshold`` consecutive failures, for ``cooldown`` seconds.
+
+    Once the cooldown is over a single trial request goes through: success closes the
+    circuit, failure opens it again.
+    """
+
+    def __init__(self, threshold: int, cooldown: float):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self._circuits: dict[str, _Circuit] = {}
+        self._lock = threading.Lock()
+
+    def check(self, key: str) -> None:
+        with self._lock:
+            circuit = self._circuits.get(key)
+            if circuit is None or circuit.opened_at is None:
+                return
+            retry_in = circuit.opened_at + self.cooldown - time.monotonic()
+            if retry_in > 0:
+                raise CircuitOpenError(key, retry_in)
+            # Half-open: let this request through, the next ones wait for its outcome
+            circuit.opened_at = time.monotonic()
+
+    def success(self, key: str) -> None:
+        with self._lock:
+            self._circuits.pop(key, None)
+
+    def failure(self, key: str) -> None:
+        with self._lock:
+            circuit = self._circuits.setdefault(key, _Circuit())
+            circuit.failures += 1
+            if circuit.failures >= self.threshold:
+                if circuit.opened_at is None:
+                    logger.warning(f"Pausing requests for {key!r} for {self.cooldown:.0f}s after {circuit.failures} failures")
+                circuit.opened_at = time.monotonic()
+
+
+def classify(response: requests.Response | None, error: Exception | None = None) -> ErrorClass | None:
+    """Sort a failed attempt into an ErrorClass, None for a success."""
+    if error is not None:
+        return ErrorClass.NETWORK
+    if response.status_code == 429:
+        return ErrorClass.RATE_LIMITED
+    if response.status_code >= 500:
+        return ErrorClass.SERVER
+    if response.status_code >= 400:
+        return ErrorClass.CLIENT
+    return None
+
+
+def _retry_after(response: requests.Response | None) -> float | None:
+    value = response.headers.get("Retry-After") if response is not None else None
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class HttpClient:
+    """GET requests paced by a TokenBucket, retried per error class and guarded per key by a CircuitBreaker.
+
+    Retries wait for the server's Retry-After when it sends one, and otherwise back off
+    exponentially with full jitter. Client errors are never retried; they are returned
+    like successes for the caller to handle, and do not count against the circuit.
+    Every attempt, retries included, goes through the caller's ``on_attempt`` first, so
+    it can be counted against a request budget.
+    """
+
+    def __init__(
+        self,
+        requests_per_second: float = HTTP_REQUESTS_PER_SECOND,
+        burst: int = HTTP_BURST,
+        max_retries: dict[ErrorClass, int] | None = None,
+        timeout: float = HTTP_TIMEOUT,
+    ):
+        self.bucket = TokenBucket(requests_per_second, burst)
+        self.breaker = CircuitBreaker(CIRCUIT_FAILURE_THRESHOLD, CIRCUIT_COOLDOWN_SECONDS)
+        self.max_retries = max_retries if max_retries is not None else {ErrorClass(k): v for k, v in HTTP_MAX_RETRIES.items()}
+        self.timeout = timeout
+        self.session = requests.Session()
+
+    def get(
+        self,
+        url: str,
+        params: dict,
+        key: str,
+        stream: bool = False,
+        retry_rate_limited: bool = True,
+        on_attempt: Callable[[], None] | None = None,
+    ) -> requests.Response:
+        """
+        Send a GET request, retrying transient failures.
+
+        Args:
+            url: The URL to request
+            params: Query parameters
+            key: What the circuit breaker tracks, e.g. the topic being scraped
+            stream: Passed on to requests
+            retry_rate_limited: False to get 429 responses back at once, when the caller
+                has a better answer to them than waiting (e.g. switching API keys)
+            on_attempt: Called right before every attempt is sent; an exception it raises
+                stops the request there and is passed on
+
+        Returns:
+            The last response, successful or not once the retries ran out
+
+        Raises:
+            CircuitOpenError: If requests for ``key`` are paused
+            requests.RequestException: If the network kept failing
+        """
+        self.breaker.check(key)
+
+        attempt = 0
+        while True:
+            self.bucket.acquire()
+            if on_attempt is not None:
+                on_attempt()
+            response, error = None, None
+            try:
+                response = self.session.get(url, params=params, timeout=self.timeout, stream=stream)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                error = e
+
+            error_class = classify(response, error)
+            if error_class is None:
+                self.bucket.speed_up()
+                self.breaker.success(key)
+                return response
+            if error_class is ErrorClass.CLIENT or (error_class is ErrorClass.RATE_LIMITED and not retry_rate_limited):
+                return response
+            if error_class is ErrorClass.RATE_LIMITED:
+                self.bucket.slow_down()
+
+            if attempt >= self.max_retries.get(error_class, 0):
+                self.breaker.failure(key)
+                if error is not None:
+                    raise error
+                return response
+
+            delay = _retry_after(response)
+            if delay is None:
+                delay = random.uniform(0, min(HTTP_BACKOFF_MAX, HTTP_BACKOFF_BASE * 2 ** attempt))
+            logger.warning(
+                f"Request for {key!r} failed ({error_class.value}: {error or response.status_code}), "
+                f"retry {attempt + 1} in {delay:.1f}s"
+            )
+            if response is not None:
+                response.close()
+            time.sleep(min(delay, HTTP_BACKOFF_MAX))
+            attempt += 1
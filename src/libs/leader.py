@@ -0,0 +1,86 @@
+import logging
+import os
+import socket
+import threading
+import uuid
+from contextlib import contextmanager
+from typing import Iterator
+
+import redis
+
+logger = logging.getLogger(__name__)
+
+# Only touch the key while we still own it, otherwise a lapsed holder could steal a newer lease
+_RENEW_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('pexpire', KEYS[1], ARGV[2])
+end
+return 0
+"""
+_RELEASE_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+
+class LeaderLock:
+    """A lease-based lock in Redis, so only one replica acts as leader at a time.
+
+    The lease expires after ``ttl_seconds`` unless renewed; hold() keeps renewing it
+    from a background thread, so a crashed leader frees the lock within one TTL.
+    """
+
+    def __init__(self, client: redis.Redis, name: str, ttl_seconds: float):
+        self.client = client
+        self.name = name
+        self.ttl_ms = int(ttl_seconds * 1000)
+        self.owner = f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self.lost = threading.Event()
+
+    def acquire(self) -> bool:
+        return bool(self.client.set(self.name, self.owner, nx=True, px=self.ttl_ms))
+
+    def renew(self) -> bool:
+        return bool(self.client.eval(_RENEW_SCRIPT, 1, self.name, self.owner, self.ttl_ms))
+
+    def release(self) -> None:
+        self.client.eval(_RELEASE_SCRIPT, 1, self.name, self.owner)
+
+    @contextmanager
+    def hold(self) -> Iterator[bool]:
+        """Try to take the lease and keep it renewed while the block runs.
+
+        Yields whether the lease was acquired; ``lost`` is set if a renewal fails
+        while the block is still running.
+        """
+        if not self.acquire():
+            yield False
+            return
+
+        self.lost.clear()
+        stop = threading.Event()
+        renewer = threading.Thread(target=self._keep_renewed, args=(stop,), name="leader-renew", daemon=True)
+        renewer.start()
+        try:
+            yield True
+        finally:
+            stop.set()
+            renewer.join()
+            try:
+                self.release()
+            except redis.RedisError as e:
+                logger.warning(f"Could not release {self.name}, it will expire on its own: {e}")
+
+    def _keep_renewed(self, stop: threading.Event) -> None:
+        while not stop.wait(self.ttl_ms / 3000):
+            try:
+                renewed = self.renew()
+            except redis.RedisError as e:
+                logger.warning(f"Renewing {self.name} failed: {e}")
+                continue
+            if not renewed:
+                logger.error(f"Lost the lease on {self.name}, another replica may take over")
+                self.lost.set()
+                return
@@ -0,0 +1,204 @@
+import datetime
+import logging
+import uuid
+from dataclasses import dataclass, fields
+from enum import Enum
+
+from psycopg2.extras import execute_values
+
+from src.libs.db_helpers import pooled_connection
+from src.libs.db_writer import BackgroundDBWriter
+from src.libs.sentiment_analysis.base import Sentiment
+
+logger = logging.getLogger(__name__)
+
+
+class LedgerStage(str, Enum):
+    """Processing stages of an article, in the order they are reached."""
+    FETCHED = "fetched"
+    RELEVANCE_SCORED = "relevance_scored"
+    SENTIMENT_SCORED = "sentiment_scored"
+    PERSISTED = "persisted"
+
+
+_STAGE_ORDER = list(LedgerStage)
+_STAGE_ARRAY = "ARRAY[" + ", ".join(f"'{stage.value}'" for stage in _STAGE_ORDER) + "]"
+
+_STAGE_TIMESTAMP = {
+    LedgerStage.FETCHED: "fetched_at",
+    LedgerStage.RELEVANCE_SCORED: "relevance_at",
+    LedgerStage.SENTIMENT_SCORED: "sentiment_at",
+    LedgerStage.PERSISTED: "persisted_at",
+}
+
+
+@dataclass(slots=True)
+class LedgerEntry:
+    """Progress of one (url, topic) pair, as stored in processing_ledger."""
+    url: str
+    topic: str
+    stage: LedgerStage
+    model_version: str
+    run_id: str
+    relevant: bool | None = None
+    sentiment: Sentiment | None = None
+    fetched_at: datetime.datetime | None = None
+    relevance_at: datetime.datetime | None = None
+    sentiment_at: datetime.datetime | None = None
+    persisted_at: datetime.datetime | None = None
+
+    def merge(self, newer: "LedgerEntry") -> None:
+        """Fold a later update for the same (url, topic) into this one, never moving the stage backwards."""
+        if newer.model_version != self.model_version:
+            for field in fields(self):
+                setattr(self, field.name, getattr(newer, field.name))
+            return
+        if _STAGE_ORDER.index(newer.stage) > _STAGE_ORDER.index(self.stage):
+            self.stage = newer.stage
+        self.run_id = newer.run_id
+        for name in ("relevant", "sentiment", *_STAGE_TIMESTAMP.values()):
+            value = getattr(newer, name)
+            if value is not None:
+                setattr(self, name, value)
+
+
+_LEDGER_COLUMNS = [field.name for field in fields(LedgerEntry)]
+
+# Reached stages only move forward, unless the model version changed and the work has to be redone
+_UPSERT_LEDGER_QUERY = f"""
+    INSERT INTO processing_ledger AS l ({", ".join(_LEDGER_COLUMNS)}) VALUES %s
+    ON CONFLICT (url, topic) DO UPDATE SET
+        stage = CASE
+            WHEN l.model_version IS DISTINCT FROM EXCLUDED.model_version
+                OR array_position({_STAGE_ARRAY}, EXCLUDED.stage::text) > array_position({_STAGE_ARRAY}, l.stage::text)
+            THEN EXCLUDED.stage ELSE l.stage END,
+        relevant = CASE
+            WHEN l.model_version IS DISTINCT FROM EXCLUDED.model_version THEN EXCLUDED.relevant
+            ELSE COALESCE(EXCLUDED.relevant, l.relevant) END,
+        sentiment = CASE
+            WHEN l.model_version IS DISTINCT FROM EXCLUDED.model_version THEN EXCLUDED.sentiment
+            ELSE COALESCE(EXCLUDED.sentiment, l.sentiment) END,
+        model_version = EXCLUDED.model_version,
+        run_id = EXCLUDED.run_id,
+        fetched_at = COALESCE(EXCLUDED.fetched_at, l.fetched_at),
+        relevance_at = COALESCE(EXCLUDED.relevance_at, l.relevance_at),
+        sentiment_at = COALESCE(EXCLUDED.sentiment_at, l.sentiment_at),
+        persisted_at = COALESCE(EXCLUDED.persisted_at, l.persisted_at)
+"""
+
+
+def _upsert_ledger_entries(cursor, entries: list[LedgerEntry]) -> None:
+    merged: dict[tuple[str, str], LedgerEntry] = {}
+    for entry in entries:
+        key = (entry.url, entry.topic)
+        if key in merged:
+            merged[key].merge(entry)
+        else:
+            merged[key] = LedgerEntry(*(getattr(entry, name) for name in _LEDGER_COLUMNS))
+
+    rows = [
+        tuple(value.value if isinstance(value, Enum) else value for value in (getattr(entry, name) for name in _LEDGER_COLUMNS))
+        for entry in merged.values()
+    ]
+    execute_values(cursor, _UPSERT_LEDGER_QUERY, rows)
+
+
+class ProcessingLedger:
+    """Records how far each article got through the pipeline, for one model version.
+
+    Updates are batched through their own BackgroundDBWriter. A restarted run looks
+    the fetched articles up with lookup() and only redoes the missing stages; rows of
+    processing_ledger also serve as an audit trail (which run and model version scored
+    what, and when) and as a per-stage throughput log (see throughput()).
+    """
+
+    def __init__(self, model_version: str, run_id: str | None = None):
+        self.model_version = model_version
+        self.run_id = run_id or uuid.uuid4().hex
+        self._writer = BackgroundDBWriter(write_batch=_upsert_ledger_entries, name="ledger-writer")
+
+    def __enter__(self) -> "ProcessingLedger":
+        self._writer.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self._writer.close()
+        try:
+            logger.info(f"Ledger for run {self.run_id}: {self.run_summary()}")
+        except Exception as e:
+            logger.error(f"Could not summarise ledger run {self.run_id}: {e}")
+
+    def lookup(self, topic: str, urls: list[str]) -> dict[str, LedgerEntry]:
+        """Get the progress already recorded for these articles with the current model version."""
+        with pooled_connection() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute(
+                    f"""
+                        SELECT {", ".join(_LEDGER_COLUMNS)} FROM processing_ledger
+                        WHERE topic = %s AND url = ANY(%s) AND model_version = %s
+                    """,
+                    (topic, urls, self.model_version),
+                )
+                entries = [LedgerEntry(*row) for row in cursor.fetchall()]
+
+        for entry in entries:
+            entry.stage = LedgerStage(entry.stage)
+            entry.sentiment = Sentiment(entry.sentiment) if entry.sentiment else None
+        return {entry.url: entry for entry in entries}
+
+    def record(
+        self,
+        url: str,
+        topic: str,
+        stage: LedgerStage,
+        relevant: bool | None = None,
+        sentiment: Sentiment | None = None,
+    ) -> None:
+        entry = LedgerEntry(url, topic, stage, self.model_version, self.run_id, relevant, sentiment)
+        setattr(entry, _STAGE_TIMESTAMP[stage], datetime.datetime.now(datetime.timezone.utc))
+        self._writer.submit(entry)
+
+    def record_persisted(self, rows: list[tuple]) -> None:
+        """BackgroundDBWriter.on_flush hook for article rows (see db_helpers.article_row)."""
+        for row in rows:
+            if row[6]:
+                self.record(row[6], row[0], LedgerStage.PERSISTED, sentiment=Sentiment(row[9]))
+
+    def run_summary(self) -> dict[str, int]:
+        """Number of articles per stage reached during this run."""
+        with pooled_connection() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute(
+                    "SELECT stage, COUNT(*) FROM processing_ledger WHERE run_id = %s GROUP BY stage",
+                    (self.run_id,),
+                )
+                return dict(cursor.fetchall())
+
+
+def throughput(since: datetime.datetime, bucket: str = "1 minute") -> list[tuple[datetime.datetime, str, int]]:
+    """
+    Count the articles that completed each stage per time bucket.
+
+    Args:
+        since: Only events after this moment are counted
+        bucket: A TimescaleDB time_bucket width, e.g. '1 minute' or '1 hour'
+
+    Returns:
+        (bucket start, stage, count) rows, ordered by bucket
+    """
+    union = " UNION ALL ".join(
+        f"SELECT '{stage.value}' AS stage, {column} AS at FROM processing_ledger WHERE {column} >= %(since)s"
+        for stage, column in _STAGE_TIMESTAMP.items()
+    )
+    with pooled_connection() as conn:
+        with conn.cursor() as cursor:
+            cursor.execute(
+                f"""
+                    SELECT time_bucket(%(bucket)s, at) AS bucket, stage, COUNT(*)
+                    FROM ({union}) AS events
+                    GROUP BY bucket, stage
+                    ORDER BY bucket, stage
+                """,
+                {"since": since, "bucket": bucket},
+            )
+            return cursor.fetchall()
@@ -0,0 +1,118 @@
+import codecs
+import json
+import re
+from typing import Any, Iterable, Iterator
+
+_DECODER = json.JSONDecoder()
+_WHITESPACE = " \t\n\r"
+# What may still follow the part of a number decoded so far, e.g. "3." of "3.5e2"
+_NUMBER_TAIL = re.compile(r"[0-9.eE+-]*")
+
+
+class _ChunkReader:
+    """Incrementally decodes a stream of byte/str chunks into a sliding text buffer.
+
+    Only the unconsumed tail of the stream is kept in memory, so the footprint is
+    bounded by the largest single JSON value rather than the whole document.
+    """
+
+    def __init__(self, chunks: Iterable[bytes | str]):
+        self._chunks = iter(chunks)
+        self._decoder = codecs.getincrementaldecoder("utf-8")()
+        self.buffer = ""
+        self.pos = 0
+        self.eof = False
+
+    def _read_more(self) -> bool:
+        if self.eof:
+            return False
+        # Drop everything that has already been consumed before growing the buffer
+        self.buffer = self.buffer[self.pos:]
+        self.pos = 0
+        for chunk in self._chunks:
+            text = self._decoder.decode(chunk) if isinstance(chunk, bytes) else chunk
+            if text:
+                self.buffer += text
+                return True
+        self.buffer += self._decoder.decode(b"", final=True)
+        self.eof = True
+        return False
+
+    def skip_whitespace(self) -> None:
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buffer) or not self._read_more():
+                return
+
+    def peek(self) -> str:
+        self.skip_whitespace()
+        if self.pos >= len(self.buffer):
+            raise ValueError("Unexpected end of JSON stream")
+        return self.buffer[self.pos]
+
+    def expect(self, char: str) -> None:
+        found = self.peek()
+        if found != char:
+            raise ValueError(f"Expected '{char}' at stream offset {self.pos}, found '{found}'")
+        self.pos += 1
+
+    def read_value(self) -> Any:
+        self.skip_whitespace()
+        while True:
+            try:
+                value, end = _DECODER.raw_decode(self.buffer, self.pos)
+                # A number may go on in the next chunk, whatever was decoded of it so far
+                truncated = self.buffer[self.pos] in "-0123456789" and _NUMBER_TAIL.fullmatch(self.buffer, end)
+                if not truncated or self.eof:
+                    self.pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            self._read_more()
+
+
+def iter_array_items(chunks: Iterable[bytes | str], key: str) -> Iterator[Any]:
+    """Yield the elements of a top-level JSON array one by one from a chunked stream.
+
+    The document must be a JSON object; the elements of ``document[key]`` are decoded
+    and yielded as soon as each one is complete. Every other top-level field is
+    parsed and discarded.
+
+    Args:
+        chunks: The raw document, as an iterable of bytes (UTF-8) or str chunks.
+        key: The top-level key holding the array to stream.
+
+    Yields:
+        Each decoded element of the array, in order.
+
+    Raises:
+        ValueError: If the stream is not a JSON object or is truncated.
+    """
+    reader = _ChunkReader(chunks)
+    reader.expect("{")
+    if reader.peek() == "}":
+        return
+
+    while True:
+        field = reader.read_value()
+        reader.expect(":")
+
+        if field == key:
+            reader.expect("[")
+            if reader.peek() == "]":
+                reader.pos += 1
+            else:
+                while True:
+                    yield reader.read_value()
+                    if reader.peek() == "]":
+                        reader.pos += 1
+                        break
+                    reader.expect(",")
+        else:
+            reader.read_value()
+
+        if reader.peek() == "}":
+            return
+        reader.expect(",")
@@ -1,9 +1,10 @@
-import json
 from pathlib import Path
-from typing import TypeVar
+from typing import Iterable, Iterator, TypeVar
 
 from pydantic import BaseModel
 
+from src.libs.local_helpers.json_stream import iter_array_items
+
 
 def save_model(model: BaseModel, file_path: str | Path) -> None:
     """Save a Pydantic model to a JSON file.
@@ -37,6 +38,41 @@ def load_model(model_class: type[T], file_path: str | Path) -> T:
         ValidationError: If the JSON data doesn't match the model schema.
     """
     path = Path(file_path)
-    data = json.loads(path.read_text(encoding="utf-8"))
-    return model_class.model_validate(data)
+    return model_class.model_validate_json(path.read_bytes())
+
+
+def iter_chunks(file_path: str | Path, chunk_size: int = 64 * 1024) -> Iterator[bytes]:
+    """Read a file lazily as fixed-size binary chunks.
+
+    Args:
+        file_path: The source file path (as string or Path object).
+        chunk_size: The number of bytes per chunk.
+
+    Yields:
+        Consecutive chunks of the file's content.
+    """
+    with Path(file_path).open("rb") as file:
+        while chunk := file.read(chunk_size):
+            yield chunk
 
+
+def stream_models(item_class: type[T], chunks: Iterable[bytes | str], key: str) -> Iterator[T]:
+    """Validate the items of a top-level JSON array one at a time.
+
+    Unlike load_model, the document is never fully materialised: memory stays
+    bounded by a single item regardless of the payload size.
+
+    Args:
+        item_class: The Pydantic model class of the array items.
+        chunks: The raw JSON document as an iterable of chunks (see iter_chunks).
+        key: The top-level key holding the array.
+
+    Yields:
+        An instance of item_class for every element of the array.
+
+    Raises:
+        ValueError: If the document is malformed or truncated.
+        ValidationError: If an item doesn't match the model schema.
+    """
+    for item in iter_array_items(chunks, key):
+        yield item_class.model_validate(item)
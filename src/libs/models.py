@@ -1,3 +1,4 @@
+from datetime import date, datetime
 from pydantic import BaseModel
 from typing import List, Optional
 
@@ -16,7 +17,25 @@ class Article(BaseModel):
     publishedAt:Optional[str]
     content:Optional[str]
 
+    @property
+    def published_datetime(self) -> Optional[datetime]:
+        if self.publishedAt is None:
+            return None
+        return datetime.fromisoformat(self.publishedAt.replace('Z', '+00:00'))
+
 class ParsedArticleList(BaseModel):
     status:str
     totalResults:int
-    articles:List[Article]
\ No newline at end of file
+    articles:List[Article]
+
+class ArticleBatch(BaseModel):
+    topic:str
+    day:date
+    articles:List[Article]
+    # Articles matching none of their query's topics, sent to each of them (see TopicRouter)
+    fanned_out:bool = False
+
+class ApiError(BaseModel):
+    status:str
+    code:Optional[str] = None
+    message:Optional[str] = None
\ No newline at end of file
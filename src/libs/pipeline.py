@@ -0,0 +1,184 @@
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from enum import Enum
+from typing import Any, Callable, Iterable
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+class ExecutorType(str, Enum):
+    THREAD = "thread"
+    PROCESS = "process"
+
+
+class Stage:
+    """One step of a Pipeline.
+
+    ``func`` is called on every item received from the previous stage. Returning
+    ``None`` drops the item; with ``fan_out`` the return value is an iterable whose
+    elements are all forwarded.
+
+    Stages run ``workers`` threads. With ExecutorType.PROCESS each thread hands its
+    item to a process pool of the same size (``func``, the items and the results must
+    then be picklable, so fan-out stages return a list), which is only worth it for
+    CPU-bound work holding the GIL.
+
+    An item ``func`` fails on is logged, counted and passed to ``on_error`` with the
+    exception, if given, for the caller to keep track of.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        func: Callable[[Any], Any],
+        workers: int = 1,
+        executor: ExecutorType = ExecutorType.THREAD,
+        fan_out: bool = False,
+        on_error: Callable[[Any, Exception], None] | None = None,
+    ):
+        self.name = name
+        self.func = func
+        self.workers = workers
+        self.executor = executor
+        self.fan_out = fan_out
+        self.on_error = on_error
+
+        self.processed = 0
+        self.dropped = 0
+        self.failed = 0
+        self.busy_seconds = 0.0
+        self._lock = threading.Lock()
+
+    def _record(self, busy: float, dropped: bool = False, failed: bool = False) -> None:
+        with self._lock:
+            self.processed += 1
+            self.busy_seconds += busy
+            self.dropped += dropped
+            self.failed += failed
+
+    def summary(self, elapsed: float) -> str:
+        rate = self.processed / elapsed if elapsed else 0.0
+        return (
+            f"{self.name}: {self.processed} items ({rate:.2f}/s), {self.dropped} dropped, "
+            f"{self.failed} failed, {self.busy_seconds:.1f}s active over {self.workers} worker(s)"
+        )
+
+
+class Pipeline:
+    """Runs stages concurrently, connected by bounded queues.
+
+    A full queue blocks its producer, so a slow stage applies backpressure upstream
+    instead of letting items pile up in memory. Once the source is exhausted, stop
+    markers travel down the stages so every queued item is drained before run() returns.
+    """
+
+    def __init__(self, stages: list[Stage], queue_size: int = 64):
+        self.stages = stages
+        self.queue_size = queue_size
+        self._cancelled = threading.Event()
+
+    def cancel(self) -> None:
+        """Stop feeding new items; items already in flight are discarded as the stages drain."""
+        self._cancelled.set()
+
+    def run(self, source: Iterable[Any]) -> list[Stage]:
+        """Push every item of ``source`` through the stages and wait for the pipeline to drain.
+
+        Args:
+            source: The items fed to the first stage.
+
+        Returns:
+            The stages, whose counters describe this run.
+        """
+        queues = [queue.Queue(maxsize=self.queue_size) for _ in self.stages]
+        pools = {
+            stage.name: ProcessPoolExecutor(max_workers=stage.workers)
+            for stage in self.stages if stage.executor is ExecutorType.PROCESS
+        }
+        threads = []
+        started = time.monotonic()
+
+        try:
+            for index, stage in enumerate(self.stages):
+                output = queues[index + 1] if index + 1 < len(queues) else None
+                downstream_workers = self.stages[index + 1].workers if output is not None else 0
+                remaining = [stage.workers]
+                for number in range(stage.workers):
+                    thread = threading.Thread(
+                        target=self._work,
+                        args=(stage, queues[index], output, downstream_workers, remaining, pools.get(stage.name)),
+                        name=f"pipeline-{stage.name}-{number}",
+                        daemon=True,
+                    )
+                    thread.start()
+                    threads.append(thread)
+
+            self._feed(source, queues[0], self.stages[0].workers)
+
+            for thread in threads:
+                thread.join()
+        finally:
+            for pool in pools.values():
+                pool.shutdown()
+
+        elapsed = time.monotonic() - started
+        for stage in self.stages:
+            logger.info(stage.summary(elapsed))
+        return self.stages
+
+    def _feed(self, source: Iterable[Any], first: queue.Queue, workers: int) -> None:
+        try:
+            for item in source:
+                if self._cancelled.is_set():
+                    break
+                first.put(item)
+        finally:
+            for _ in range(workers):
+                first.put(_STOP)
+
+    def _work(
+        self,
+        stage: Stage,
+        inbox: queue.Queue,
+        outbox: queue.Queue | None,
+        downstream_workers: int,
+        remaining: list[int],
+        pool: ProcessPoolExecutor | None,
+    ) -> None:
+        while True:
+            item = inbox.get()
+            if item is _STOP:
+                break
+            if self._cancelled.is_set():
+                continue
+
+            started = time.monotonic()
+            forwarded = 0
+            try:
+                result = pool.submit(stage.func, item).result() if pool else stage.func(item)
+                outputs = (result if stage.fan_out else (result,)) if result is not None else ()
+                # Fan-out results are consumed lazily, so a generator keeps streaming under backpressure
+                for output in outputs:
+                    forwarded += 1
+                    if outbox is not None:
+                        outbox.put(output)
+            except Exception as e:
+                logger.error(f"Stage {stage.name} failed on {item!r}: {e}")
+                stage._record(time.monotonic() - started, failed=True)
+                if stage.on_error is not None:
+                    stage.on_error(item, e)
+                continue
+            stage._record(time.monotonic() - started, dropped=not forwarded)
+
+        # The last worker of a stage to finish forwards the stop markers downstream
+        with stage._lock:
+            remaining[0] -= 1
+            last = remaining[0] == 0
+        if last and outbox is not None:
+            for _ in range(downstream_workers):
+                outbox.put(_STOP)
@@ -0,0 +1,136 @@
+import datetime
+import hashlib
+import json
+import logging
+import threading
+from decimal import Decimal
+from typing import Callable, Iterable
+
+import redis
+
+from src.consts import (
+    QUERY_CACHE_HISTORY_TTL,
+    QUERY_CACHE_PREFIX,
+    QUERY_CACHE_VERSIONS_KEY,
+)
+from src.libs.redis_helpers import get_redis_client
+
+logger = logging.getLogger(__name__)
+
+_client: redis.Redis | None = None
+_client_lock = threading.Lock()
+
+
+def _shared_client() -> redis.Redis:
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = get_redis_client()
+        return _client
+
+
+def _utc_day(moment: datetime.datetime) -> str:
+    return moment.astimezone(datetime.timezone.utc).date().isoformat()
+
+
+def publish_versions(moments: Iterable[datetime.datetime], client: redis.Redis | None = None) -> None:
+    """
+    Bump the data version of the UTC days of ``moments``, after articles published then were
+    committed and the rollups refreshed over them (see db_helpers.RollupRefresher).
+
+    Cached results covering one of those days stop matching their key. A Redis failure
+    is only logged: the articles are stored, and the cached results expire on their own.
+    """
+    days = {_utc_day(moment) for moment in moments if moment is not None}
+    if not days:
+        return
+    try:
+        pipeline = (client or _shared_client()).pipeline(transaction=False)
+        for day in days:
+            pipeline.hincrby(QUERY_CACHE_VERSIONS_KEY, day, 1)
+        pipeline.execute()
+    except redis.RedisError as e:
+        logger.warning(f"Could not publish new data versions for {sorted(days)}: {e}")
+
+
+def _encode(value):
+    if isinstance(value, datetime.datetime):
+        return {"$datetime": value.isoformat()}
+    if isinstance(value, datetime.date):
+        return {"$date": value.isoformat()}
+    if isinstance(value, Decimal):
+        return float(value)
+    raise TypeError(f"Cannot cache a {type(value).__name__}")
+
+
+def _decode(obj: dict):
+    if "$datetime" in obj:
+        return datetime.datetime.fromisoformat(obj["$datetime"])
+    if "$date" in obj:
+        return datetime.date.fromisoformat(obj["$date"])
+    return obj
+
+
+class QueryCache:
+    """Query results shared through Redis by every dashboard process.
+
+    A result is keyed by its query, its parameters and the data versions of the UTC
+    days it covers, which the ingest path bumps (publish_versions) once new articles
+    are committed and in the rollups. Results over closed buckets can therefore be kept until they expire
+    on their own, and a changed day only misses the results that include it.
+    """
+
+    def __init__(self, client: redis.Redis | None = None):
+        self.client = client or _shared_client()
+
+    def versions(self, start: datetime.datetime, end: datetime.datetime) -> list[int]:
+        """Data version of every UTC day overlapping [start, end)."""
+        first = start.astimezone(datetime.timezone.utc).date()
+        last = (end - datetime.timedelta(microseconds=1)).astimezone(datetime.timezone.utc).date()
+        days = [(first + datetime.timedelta(days=i)).isoformat() for i in range((last - first).days + 1)]
+        if not days:
+            return []
+        return [int(version or 0) for version in self.client.hmget(QUERY_CACHE_VERSIONS_KEY, days)]
+
+    def fetch(
+        self,
+        query: str,
+        params: tuple,
+        start: datetime.datetime,
+        end: datetime.datetime,
+        compute: Callable[[str, tuple], list[tuple]],
+        ttl: int = QUERY_CACHE_HISTORY_TTL,
+    ) -> list[tuple]:
+        """
+        Get the rows of a query over [start, end), running it only on a cache miss.
+
+        Args:
+            query: The SQL, part of the key
+            params: Its parameters, part of the key
+            start: Start of the time range the query reads
+            end: End (excluded) of the time range the query reads
+            compute: Runs the query, called with (query, params)
+            ttl: Seconds the result is kept
+
+        Returns:
+            The rows
+        """
+        try:
+            versions = self.versions(start, end)
+            key = QUERY_CACHE_PREFIX + hashlib.sha256(
+                json.dumps([query, params, versions], default=_encode).encode()
+            ).hexdigest()
+            cached = self.client.get(key)
+        except redis.RedisError as e:
+            logger.warning(f"Query cache unavailable, querying the database: {e}")
+            return compute(query, params)
+
+        if cached is not None:
+            return json.loads(cached, object_hook=_decode)
+
+        rows = compute(query, params)
+        try:
+            self.client.set(key, json.dumps(rows, default=_encode), ex=ttl)
+        except redis.RedisError as e:
+            logger.warning(f"Could not cache a query result: {e}")
+        return rows
@@ -0,0 +1,235 @@
+import datetime
+import heapq
+import logging
+import threading
+from dataclasses import dataclass, field
+
+from psycopg2.extras import execute_values
+
+from src.consts import (
+    QUOTA_DAILY_BUDGET,
+    QUOTA_MAX_DEFER_DAYS,
+    QUOTA_MAX_PAGES_PER_TOPIC,
+    QUOTA_VOLUME_SMOOTHING,
+    TOPIC_PRIORITIES,
+)
+from src.libs.api_keys import configured_keys
+from src.libs.db_helpers import pooled_connection
+
+logger = logging.getLogger(__name__)
+
+PAGE_SIZE = 100  # the maximum NewsAPI allows
+
+
+@dataclass(slots=True, frozen=True)
+class PageRequest:
+    """One NewsAPI request: a page of a topic's articles for a day."""
+    topic: str
+    day: datetime.date
+    page: int = 1
+
+
+class QuotaExhausted(Exception):
+    """Raised by QuotaPlanner.spend when the day's budget cannot cover the requests."""
+
+
+@dataclass(slots=True)
+class QuotaPlan:
+    requests: list[PageRequest] = field(default_factory=list)
+    deferred: list[PageRequest] = field(default_factory=list)
+
+
+def _window() -> datetime.date:
+    # NewsAPI counts its daily quota in UTC
+    return datetime.datetime.now(datetime.timezone.utc).date()
+
+
+class QuotaPlanner:
+    """Spends the daily NewsAPI request budget where it brings back the most articles.
+
+    Every request made through spend() is counted in api_quota_days, per UTC day, so
+    the daily job, the poller and backfills share one budget across restarts and
+    replicas; spend() refuses requests past it atomically, so consumers racing for the
+    last requests cannot overspend it. api_quota_usage only breaks the same requests
+    down per consumer.
+
+    plan() ranks candidate pages by priority times the articles they are expected to
+    hold (from each topic's smoothed volume in topic_volume) and keeps the best ones;
+    the rest are saved as deferred and offered again, ahead of the new day's pages of
+    equal value, in the next plan.
+    """
+
+    def __init__(self, consumer: str, daily_budget: int | None = None):
+        self.consumer = consumer
+        # Every API key comes with its own daily quota
+        self.daily_budget = daily_budget if daily_budget is not None else QUOTA_DAILY_BUDGET * max(1, len(configured_keys()))
+        self._lock = threading.Lock()
+
+    def used(self, consumer: str | None = None) -> int:
+        """Requests spent today, by every consumer or only by ``consumer``."""
+        with pooled_connection() as conn:
+            with conn.cursor() as cursor:
+                if consumer is None:
+                    # The counter spend() enforces the budget on
+                    cursor.execute("SELECT COALESCE(MAX(requests), 0) FROM api_quota_days WHERE day = %s", (_window(),))
+                    return cursor.fetchone()[0]
+                cursor.execute(
+                    """
+                        SELECT COALESCE(SUM(requests), 0) FROM api_quota_usage
+                        WHERE day = %s AND consumer = %s
+                    """,
+                    (_window(), consumer),
+                )
+                return cursor.fetchone()[0]
+
+    def remaining(self) -> int:
+        return max(0, self.daily_budget - self.used())
+
+    def spend(self, requests: int = 1) -> None:
+        """
+        Count ``requests`` against today's budget, before making them.
+
+        Raises:
+            QuotaExhausted: The budget left today is smaller than ``requests``; nothing is counted
+        """
+        day = _window()
+        with self._lock, pooled_connection() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute("INSERT INTO api_quota_days (day) VALUES (%s) ON CONFLICT (day) DO NOTHING", (day,))
+                # Concurrent spenders queue on the day's row, and the budget is checked again once it is theirs
+                cursor.execute(
+                    """
+                        UPDATE api_quota_days SET requests = requests + %(requests)s
+                        WHERE day = %(day)s AND requests + %(requests)s <= %(budget)s
+                        RETURNING requests
+                    """,
+                    {"day": day, "requests": requests, "budget": self.daily_budget},
+                )
+                if cursor.fetchone() is None:
+                    conn.rollback()
+                    raise QuotaExhausted(f"Daily request budget of {self.daily_budget} spent")
+                cursor.execute(
+                    """
+                        INSERT INTO api_quota_usage (day, consumer, requests) VALUES (%s, %s, %s)
+                        ON CONFLICT (day, consumer) DO UPDATE SET
+                            requests = api_quota_usage.requests + EXCLUDED.requests,
+                            updated_at = NOW()
+                    """,
+                    (day, self.consumer, requests),
+                )
+            conn.commit()
+
+    def observe(self, topic: str, total_results: int) -> None:
+        """Fold a day's totalResults into the topic's smoothed daily volume."""
+        with pooled_connection() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute(
+                    """
+                        INSERT INTO topic_volume (topic, articles_per_day) VALUES (%(topic)s, %(total)s)
+                        ON CONFLICT (topic) DO UPDATE SET
+                            articles_per_day = %(alpha)s * EXCLUDED.articles_per_day
+                                + (1 - %(alpha)s) * topic_volume.articles_per_day,
+                            updated_at = NOW()
+                    """,
+                    {"topic": topic, "total": total_results, "alpha": QUOTA_VOLUME_SMOOTHING},
+                )
+            conn.commit()
+
+    def plan(
+        self,
+        day: datetime.date,
+        topics: list[str],
+        budget: int | None = None,
+        priorities: dict[str, float] | None = None,
+    ) -> QuotaPlan:
+        """
+        Choose which pages to request for ``day`` within the budget.
+
+        Args:
+            day: The day being scraped
+            topics: The topics (or combined queries) of interest
+            budget: Requests to spend, everything left today by default
+            priorities: Weight per topic, TOPIC_PRIORITIES by default; missing topics weigh 1
+
+        Returns:
+            The requests to make, most valuable first, and the pages deferred to the next window
+        """
+        budget = self.remaining() if budget is None else budget
+        priorities = TOPIC_PRIORITIES if priorities is None else priorities
+        volumes = self._load_volumes(topics)
+
+        oldest = day - datetime.timedelta(days=QUOTA_MAX_DEFER_DAYS)
+        pending = [request for request in self._load_deferred() if request.day >= oldest and request.topic in topics]
+        for topic in topics:
+            for page in range(1, QUOTA_MAX_PAGES_PER_TOPIC + 1):
+                pending.append(PageRequest(topic, day, page))
+
+        # (-value, order, request): deferred pages are listed first, so they win ties
+        candidates = []
+        for request in dict.fromkeys(pending):
+            value = self._value(request, volumes, priorities)
+            if value > 0:
+                candidates.append((-value, len(candidates), request))
+        heapq.heapify(candidates)
+
+        plan = QuotaPlan()
+        while candidates:
+            _, _, request = heapq.heappop(candidates)
+            (plan.requests if len(plan.requests) < budget else plan.deferred).append(request)
+
+        self._save_deferred(topics, plan.deferred)
+        if plan.deferred:
+            logger.warning(f"Request budget of {budget} reached, deferring {len(plan.deferred)} pages to the next window")
+        return plan
+
+    @staticmethod
+    def defer(requests: list[PageRequest]) -> None:
+        """Offer pages that could not be requested (e.g. for lack of budget) again in the next plan."""
+        with pooled_connection() as conn:
+            with conn.cursor() as cursor:
+                execute_values(
+                    cursor,
+                    "INSERT INTO deferred_pages (topic, day, page) VALUES %s ON CONFLICT DO NOTHING",
+                    [(request.topic, request.day, request.page) for request in requests],
+                )
+            conn.commit()
+
+    @staticmethod
+    def _value(request: PageRequest, volumes: dict[str, float], priorities: dict[str, float]) -> float:
+        priority = priorities.get(request.topic, 1.0)
+        # A topic never scraped is assumed to fill its first page, so it gets explored
+        volume = volumes.get(request.topic, PAGE_SIZE)
+        expected = min(PAGE_SIZE, max(0.0, volume - (request.page - 1) * PAGE_SIZE))
+        # Never drop a topic's first page, even a quiet one: it is what measures its volume
+        if request.page == 1:
+            expected = max(expected, 1.0)
+        return priority * expected
+
+    @staticmethod
+    def _load_volumes(topics: list[str]) -> dict[str, float]:
+        with pooled_connection() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute("SELECT topic, articles_per_day FROM topic_volume WHERE topic = ANY(%s)", (list(topics),))
+                return dict(cursor.fetchall())
+
+    @staticmethod
+    def _load_deferred() -> list[PageRequest]:
+        with pooled_connection() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute("SELECT topic, day, page FROM deferred_pages ORDER BY day, topic, page")
+                return [PageRequest(*row) for row in cursor.fetchall()]
+
+    @staticmethod
+    def _save_deferred(topics: list[str], deferred: list[PageRequest]) -> None:
+        # Pages taken into a plan (or expired) leave the table: a failed request is not retried automatically.
+        # Only this plan's topics are replaced, the deferred pages of other topics wait for their own plans.
+        with pooled_connection() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute("DELETE FROM deferred_pages WHERE topic = ANY(%s)", (list(topics),))
+                if deferred:
+                    execute_values(
+                        cursor,
+                        "INSERT INTO deferred_pages (topic, day, page) VALUES %s ON CONFLICT DO NOTHING",
+                        [(request.topic, request.day, request.page) for request in deferred],
+                    )
+            conn.commit()
@@ -0,0 +1,25 @@
+import logging
+import os
+
+import redis
+from dotenv import load_dotenv
+
+logger = logging.getLogger(__name__)
+load_dotenv()
+
+
+def get_redis_client() -> redis.Redis:
+    """Get a client for the redis-cache service.
+
+    REDIS_URL takes precedence over REDIS_HOST/REDIS_PORT, which makes it easy to point
+    local runs at another server (e.g. a fakeredis TcpFakeServer).
+    """
+    url = os.getenv("REDIS_URL")
+    if url:
+        logger.debug("Connecting to Redis at " + url)
+        return redis.Redis.from_url(url, decode_responses=True)
+
+    host = os.getenv("REDIS_HOST", "localhost")
+    port = int(os.getenv("REDIS_PORT", "6378"))
+    logger.debug(f"Connecting to Redis at {host}:{port}")
+    return redis.Redis(host=host, port=port, decode_responses=True)
@@ -1,9 +1,9 @@
 import logging
 
-from pydantic import BaseModel, ValidationError
+from pydantic import BaseModel
 from transformers import pipeline
 
-from src.libs.sentiment_analysis.base import SentimentAnalyzer, Sentiment
+from src.libs.sentiment_analysis.base import Scores, SentimentAnalyzer, Sentiment
 
 logger = logging.getLogger(__name__)
 
@@ -13,61 +13,73 @@ LABEL_TO_SENTIMENT = {
     "Negative": Sentiment.NEGATIVE,
 }
 RELEVANCE_THRESHOLD = 0.6
+RELEVANCE_MODEL_NAME = "cross-encoder/nli-deberta-v3-base"
+MODEL_NAME = "yangheng/deberta-v3-large-absa-v1.1"
 
 class ABSASentimentAnalyzer(SentimentAnalyzer):
+    model_version = f"absa:{RELEVANCE_MODEL_NAME}+{MODEL_NAME}@{RELEVANCE_THRESHOLD}"
+
     def __init__(self, topic: str):
         super().__init__(topic)
         self.relevance_model = pipeline(
             "text-classification",
-            model="cross-encoder/nli-deberta-v3-base",
+            model=RELEVANCE_MODEL_NAME,
         )
         self.model = pipeline(
-            "text-classification", model="yangheng/deberta-v3-large-absa-v1.1", use_fast=False
+            "text-classification", model=MODEL_NAME, use_fast=False
         )
 
-    class Input(BaseModel):
-        title: str
-        description: str
-        content: str
-
-    def sentiment_analysis(self, context:dict) -> Sentiment:
-        try:
-            validated_input = self.Input.model_validate(context)
-        except ValidationError as e:
-            logger.error(f"{context}\n{e}")
-            return Sentiment.INVALID
-        return self._sentiment_analysis(self.topic, validated_input)
+    @staticmethod
+    def _prompt(context: SentimentAnalyzer.Input) -> str:
+        return f"Title: {context.title}\nDescription: {context.description}\nInitial Words: {context.content}"
 
-    def _sentiment_analysis(self, topic: str, context: Input) -> Sentiment:
-        prompt = f"Title: {context.title}\nDescription: {context.description}\nInitial Words: {context.content}"
+    def relevance_with_scores(
+        self, context: SentimentAnalyzer.Input, topic: str, threshold: float | None = None
+    ) -> tuple[bool, Scores]:
+        return self._is_relevant(self._prompt(context), topic, RELEVANCE_THRESHOLD if threshold is None else threshold)
 
-        relevance = self._is_relevant(prompt, topic)
-        if not relevance:
-            return Sentiment.UNKNOWN
+    def classify(self, context: SentimentAnalyzer.Input, topic: str) -> Sentiment:
+        return self.classify_with_scores(context, topic)[0]
 
+    def classify_with_scores(self, context: SentimentAnalyzer.Input, topic: str) -> tuple[Sentiment, Scores]:
+        # top_k=None returns the probability of every label, best first
         result = self.model(
-            prompt,
+            self._prompt(context),
             text_pair=topic,
+            top_k=None,
         )
 
         logger.debug(f"{context.title}\n {result}")
 
-        return LABEL_TO_SENTIMENT[result[0]["label"]]
+        probabilities = {LABEL_TO_SENTIMENT[output["label"]]: output["score"] for output in result}
+        return LABEL_TO_SENTIMENT[result[0]["label"]], Scores(
+            sentiment_positive=probabilities[Sentiment.POSITIVE],
+            sentiment_negative=probabilities[Sentiment.NEGATIVE],
+            sentiment_neutral=probabilities[Sentiment.NEUTRAL],
+        )
 
-    def _is_relevant(self, text: str, topic: str, threshold: float = RELEVANCE_THRESHOLD) -> bool:
+    def _is_relevant(self, text: str, topic: str, threshold: float = RELEVANCE_THRESHOLD) -> tuple[bool, Scores]:
         class Output(BaseModel):
             label: str
             score: float
         hypothesis = f"The article discusses {topic}."
 
-        output = self.relevance_model({"text": text, "text_pair": hypothesis})
-        output = Output.model_validate(output)
+        outputs = self.relevance_model({"text": text, "text_pair": hypothesis}, top_k=None)
+        outputs = [Output.model_validate(output) for output in outputs]
+        probabilities = {output.label: output.score for output in outputs}
+        scores = Scores(
+            relevance_entailment=probabilities["entailment"],
+            relevance_neutral=probabilities["neutral"],
+            relevance_contradiction=probabilities["contradiction"],
+        )
 
+        # Mirrored by the is_relevant_by_scores SQL function, which re-applies other thresholds to stored scores
+        output = max(outputs, key=lambda output: output.score)
         if output.label == "contradiction":
-            return False
+            return False, scores
         if output.label == "neutral" and output.score >= threshold:
-            return False
-        return True
+            return False, scores
+        return True, scores
 
 def main():
     sa = ABSASentimentAnalyzer("Cloud Computing")
@@ -1,6 +1,13 @@
+import logging
 from abc import ABC, abstractmethod
 from enum import Enum
 
+from pydantic import BaseModel, ValidationError
+
+from src.libs.models import Article
+
+logger = logging.getLogger(__name__)
+
 
 class Sentiment(str, Enum):
     POSITIVE = "positive"
@@ -9,11 +16,64 @@ class Sentiment(str, Enum):
     UNKNOWN = "unknown"
     INVALID = "invalid"
 
+class Scores(BaseModel):
+    """Probabilities behind a result, stored with the article so that thresholds can be
+    re-applied without running the models again (None where a model was not run)."""
+    relevance_entailment: float | None = None
+    relevance_neutral: float | None = None
+    relevance_contradiction: float | None = None
+    sentiment_positive: float | None = None
+    sentiment_negative: float | None = None
+    sentiment_neutral: float | None = None
+
+    def merge(self, other: "Scores") -> "Scores":
+        return self.model_copy(update=other.model_dump(exclude_none=True))
+
+
 class SentimentAnalyzer(ABC):
+    # Identifies the models (and settings) behind a result, bump it whenever they change
+    model_version: str = "unversioned"
+
     def __init__(self, topic: str):
         self.topic = topic
 
+    class Input(BaseModel):
+        title: str
+        description: str
+        content: str
+
+    def validate(self, context:dict | Article) -> Input | None:
+        try:
+            # Articles are read attribute by attribute, so no dump/re-validate round-trip is needed
+            return self.Input.model_validate(context, from_attributes=True)
+        except ValidationError as e:
+            logger.error(f"{context}\n{e}")
+            return None
+
+    def is_relevant(self, context: Input, topic: str, threshold: float | None = None) -> bool:
+        return self.relevance_with_scores(context, topic, threshold)[0]
+
+    def relevance_with_scores(self, context: Input, topic: str, threshold: float | None = None) -> tuple[bool, Scores]:
+        """Analyzers without a dedicated relevance model leave that call to classify (see Sentiment.UNKNOWN)."""
+        return True, Scores()
+
     @abstractmethod
-    def sentiment_analysis(self, context:dict) -> Sentiment:
+    def classify(self, context: Input, topic: str) -> Sentiment:
         ...
 
+    def classify_with_scores(self, context: Input, topic: str) -> tuple[Sentiment, Scores]:
+        """classify, plus the probabilities behind its label when the model gives them."""
+        return self.classify(context, topic), Scores()
+
+    def sentiment_analysis(self, context:dict | Article) -> Sentiment:
+        return self.scored_sentiment_analysis(context)[0]
+
+    def scored_sentiment_analysis(self, context:dict | Article) -> tuple[Sentiment, Scores]:
+        validated_input = self.validate(context)
+        if validated_input is None:
+            return Sentiment.INVALID, Scores()
+        relevant, scores = self.relevance_with_scores(validated_input, self.topic)
+        if not relevant:
+            return Sentiment.UNKNOWN, scores
+        sentiment, sentiment_scores = self.classify_with_scores(validated_input, self.topic)
+        return sentiment, scores.merge(sentiment_scores)
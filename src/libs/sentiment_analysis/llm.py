@@ -2,14 +2,14 @@ import logging
 
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_ollama import ChatOllama
-from pydantic import BaseModel, ValidationError
 
 from src.libs.sentiment_analysis.base import SentimentAnalyzer, Sentiment
 
 logger = logging.getLogger(__name__)
 
+MODEL_NAME = "llama3.2"
 MODEL = ChatOllama(
-    model="llama3.2",
+    model=MODEL_NAME,
     temperature=0,
 )
 
@@ -40,20 +40,9 @@ Return only the label, no explanation.
 """
 
 class LLMSentimentAnalyzer(SentimentAnalyzer):
-    class Input(BaseModel):
-        title: str
-        description: str
-        content: str
-
-    def sentiment_analysis(self, context:dict) -> Sentiment:
-        try:
-            validated_input = self.Input.model_validate(context)
-        except ValidationError as e:
-            logger.error(f"{context}\n{e}")
-            return Sentiment.INVALID
-        return self._sentiment_analysis(self.topic, validated_input)
-
-    def _sentiment_analysis(self, topic: str, context: Input) -> Sentiment:
+    model_version = f"llm:{MODEL_NAME}"
+
+    def classify(self, context: SentimentAnalyzer.Input, topic: str) -> Sentiment:
         prompt = ChatPromptTemplate.from_template(PROMPT_TEMPLATE)
         args = context.model_dump()
         args['topic'] = topic
@@ -0,0 +1,141 @@
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from enum import Enum
+
+from psycopg2.extras import execute_values
+
+from src.consts import (
+    SENTIMENT_ANALYSIS_MODEL,
+    TOPIC_PRIORITIES,
+    TOPIC_REGISTRY_REFRESH_SECONDS,
+    TOPICS,
+    TypesOfSA,
+)
+from src.libs.db_helpers import pooled_connection
+
+logger = logging.getLogger(__name__)
+
+_registry: "TopicRegistry | None" = None
+_registry_lock = threading.Lock()
+
+
+class Cadence(str, Enum):
+    DAILY = "daily"  # scraped once a day by the scheduled job
+    INTRADAY = "intraday"  # polled throughout the day (see src/scripts/poll_job.py)
+
+
+@dataclass(slots=True, frozen=True)
+class TopicSettings:
+    """One row of the topics table."""
+    name: str
+    query: str
+    cadence: Cadence
+    priority: float
+    analyzer: TypesOfSA
+    relevance_threshold: float | None
+    enabled: bool
+
+
+_COLUMNS = "name, query, cadence, priority, analyzer, relevance_threshold, enabled"
+
+
+class TopicRegistry:
+    """The topics table, read through a snapshot that reloads itself when the table changes.
+
+    Every ``refresh_seconds`` at most, an access compares the table's latest updated_at
+    and row count with the snapshot's and reloads it if they moved, so topics added or
+    retuned by an operator are picked up by running processes without a restart. An
+    empty table is seeded from TOPICS and TOPIC_PRIORITIES.
+    """
+
+    def __init__(self, refresh_seconds: float = TOPIC_REGISTRY_REFRESH_SECONDS):
+        self.refresh_seconds = refresh_seconds
+        self._topics: dict[str, TopicSettings] = {}
+        self._version: tuple | None = None
+        self._checked = float("-inf")
+        self._lock = threading.Lock()
+
+    def snapshot(self) -> dict[str, TopicSettings]:
+        """Every topic by name, disabled ones included."""
+        with self._lock:
+            if time.monotonic() - self._checked >= self.refresh_seconds:
+                try:
+                    self._refresh()
+                except Exception as e:
+                    if self._version is None:
+                        raise
+                    logger.error(f"Could not refresh the topics, keeping the previous snapshot: {e}")
+            return self._topics
+
+    def enabled(self, cadence: Cadence | None = None) -> list[TopicSettings]:
+        """Enabled topics, optionally only those scraped at ``cadence``, by decreasing priority."""
+        topics = [
+            topic for topic in self.snapshot().values()
+            if topic.enabled and (cadence is None or topic.cadence == cadence)
+        ]
+        return sorted(topics, key=lambda topic: -topic.priority)
+
+    def get(self, name: str) -> TopicSettings | None:
+        return self.snapshot().get(name)
+
+    def analyzer_for(self, name: str) -> TypesOfSA:
+        """The analyzer type of a topic, SENTIMENT_ANALYSIS_MODEL for topics not in the registry."""
+        topic = self.get(name)
+        return topic.analyzer if topic else SENTIMENT_ANALYSIS_MODEL
+
+    def relevance_threshold(self, name: str) -> float | None:
+        topic = self.get(name)
+        return topic.relevance_threshold if topic else None
+
+    def reload(self) -> None:
+        """Drop the snapshot, the next access reads the table again."""
+        with self._lock:
+            self._checked = float("-inf")
+            self._version = None
+
+    def _refresh(self) -> None:
+        self._checked = time.monotonic()
+        with pooled_connection() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute("SELECT MAX(updated_at), COUNT(*) FROM topics")
+                version = cursor.fetchone()
+                if version == self._version:
+                    return
+                if not version[1]:
+                    self._seed(cursor)
+                    conn.commit()
+                    cursor.execute("SELECT MAX(updated_at), COUNT(*) FROM topics")
+                    version = cursor.fetchone()
+
+                cursor.execute(f"SELECT {_COLUMNS} FROM topics")
+                rows = cursor.fetchall()
+
+        self._topics = {
+            name: TopicSettings(name, query, Cadence(cadence), priority, TypesOfSA(analyzer), threshold, enabled)
+            for name, query, cadence, priority, analyzer, threshold, enabled in rows
+        }
+        self._version = version
+        logger.info(f"Loaded {len(self._topics)} topics ({sum(t.enabled for t in self._topics.values())} enabled)")
+
+    @staticmethod
+    def _seed(cursor) -> None:
+        logger.info(f"Seeding the topics table with {TOPICS}")
+        execute_values(
+            cursor,
+            f"INSERT INTO topics ({_COLUMNS}) VALUES %s ON CONFLICT (name) DO NOTHING",
+            [
+                (topic, topic, Cadence.DAILY.value, TOPIC_PRIORITIES.get(topic, 1.0), SENTIMENT_ANALYSIS_MODEL.value, None, True)
+                for topic in TOPICS
+            ],
+        )
+
+
+def get_topic_registry() -> TopicRegistry:
+    """Get the process-wide topic registry (created on first use)."""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = TopicRegistry()
+        return _registry
@@ -0,0 +1,91 @@
+import logging
+import re
+from collections import defaultdict
+
+from src.consts import QUERY_MAX_LENGTH
+from src.libs.models import Article
+
+logger = logging.getLogger(__name__)
+
+_SEPARATOR = " OR "
+
+
+def _clause(topic: str) -> str:
+    # Parentheses keep each topic's own semantics (all of its words) inside the OR
+    return f"({topic})"
+
+
+def combined_query(topics: list[str]) -> str:
+    """The boolean NewsAPI ``q`` matching an article about any of the topics."""
+    if len(topics) == 1:
+        return topics[0]
+    return _SEPARATOR.join(_clause(topic) for topic in topics)
+
+
+def pack_topics(topics: list[str], max_length: int = QUERY_MAX_LENGTH) -> list[list[str]]:
+    """
+    Group topics so that each group's combined_query stays within ``max_length`` characters.
+
+    Topics are packed greedily in the given order, so listing related topics next to each
+    other keeps their articles, which tend to overlap, in the same request.
+    """
+    groups: list[list[str]] = []
+    length = 0
+    for topic in topics:
+        clause = len(_clause(topic))
+        if groups and length + len(_SEPARATOR) + clause <= max_length:
+            groups[-1].append(topic)
+            length += len(_SEPARATOR) + clause
+        else:
+            if len(topic) > max_length:
+                logger.warning(f"Topic {topic!r} is longer than the {max_length} characters NewsAPI accepts")
+            groups.append([topic])
+            length = clause
+    return groups
+
+
+def _word_patterns(topic: str) -> list[re.Pattern]:
+    return [re.compile(rf"\b{re.escape(word)}\b", re.IGNORECASE) for word in topic.split()]
+
+
+class TopicRouter:
+    """Assigns the articles of a combined query back to the topics they are about.
+
+    An article goes to every topic whose words all appear in its title, description or
+    content. NewsAPI also matches text we never see (the content is truncated), so an
+    article matching no topic locally is handed to all of them as a fan-out copy, and
+    the relevance stage keeps only the copies its model accepts.
+    """
+
+    def __init__(self, topics: list[str]):
+        self.topics = topics
+        self._patterns = {topic: _word_patterns(topic) for topic in topics}
+
+    def matches(self, article: Article) -> list[str]:
+        text = " ".join(part for part in (article.title, article.description, article.content) if part)
+        return [
+            topic for topic, patterns in self._patterns.items()
+            if all(pattern.search(text) for pattern in patterns)
+        ]
+
+    def route(self, articles: list[Article]) -> tuple[dict[str, list[Article]], list[Article]]:
+        """
+        Split the articles of a query between its topics.
+
+        Returns:
+            The articles matching each topic, and those matching none of several topics,
+            which go to every topic as fan-out copies
+        """
+        routed: dict[str, list[Article]] = defaultdict(list)
+        unmatched = []
+        for article in articles:
+            topics = self.matches(article)
+            # A single topic's query is the topic itself: whatever it returns is about it
+            if not topics and len(self.topics) == 1:
+                topics = self.topics
+            if topics:
+                for topic in topics:
+                    routed[topic].append(article)
+            else:
+                unmatched.append(article)
+        return routed, unmatched
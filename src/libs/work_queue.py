@@ -0,0 +1,122 @@
+import logging
+
+import redis
+
+from src.consts import (
+    WORK_CLAIM_IDLE_MS,
+    WORK_DEAD_LETTER_STREAM,
+    WORK_GROUP,
+    WORK_MAX_DELIVERIES,
+    WORK_STREAM,
+    WORK_STREAM_MAXLEN,
+)
+from src.libs.models import ArticleBatch
+
+logger = logging.getLogger(__name__)
+
+
+class RedisWorkQueue:
+    """Article batches on a Redis stream, consumed by a consumer group of workers.
+
+    Every batch is delivered to a single consumer and stays pending until acknowledged.
+    Batches left pending for ``claim_idle_ms`` (their worker died or hung) are claimed
+    by the next worker asking for work; after ``max_deliveries`` attempts a batch is
+    moved to a dead-letter stream instead of being retried forever.
+
+    Args:
+        client: Any redis-py compatible client (redis.Redis, fakeredis.FakeRedis, ...)
+            created with decode_responses=True.
+    """
+
+    def __init__(
+        self,
+        client: redis.Redis,
+        stream: str = WORK_STREAM,
+        group: str = WORK_GROUP,
+        claim_idle_ms: int = WORK_CLAIM_IDLE_MS,
+        max_deliveries: int = WORK_MAX_DELIVERIES,
+    ):
+        self.client = client
+        self.stream = stream
+        self.group = group
+        self.claim_idle_ms = claim_idle_ms
+        self.max_deliveries = max_deliveries
+        self._ensure_group()
+
+    def _ensure_group(self) -> None:
+        try:
+            self.client.xgroup_create(self.stream, self.group, id="0", mkstream=True)
+        except redis.ResponseError as e:
+            if "BUSYGROUP" not in str(e):
+                raise
+
+    def enqueue(self, batch: ArticleBatch) -> str:
+        """Add a batch to the stream and return its entry id."""
+        return self.client.xadd(
+            self.stream, {"batch": batch.model_dump_json()}, maxlen=WORK_STREAM_MAXLEN, approximate=True
+        )
+
+    def claim(self, consumer: str, count: int = 1, block_ms: int = 5000) -> list[tuple[str, ArticleBatch]]:
+        """
+        Get up to ``count`` batches for ``consumer``, stale ones from dead workers first.
+
+        Args:
+            consumer: A name unique to the calling worker
+            count: Maximum number of batches to return
+            block_ms: How long to wait for new batches when there are none
+
+        Returns:
+            (entry id, batch) pairs, to be passed to ack() once processed
+        """
+        _, entries, *_ = self.client.xautoclaim(
+            self.stream, self.group, consumer, min_idle_time=self.claim_idle_ms, start_id="0-0", count=count
+        )
+        entries = self._drop_poisoned(entries, consumer)
+
+        if not entries:
+            response = self.client.xreadgroup(
+                self.group, consumer, {self.stream: ">"}, count=count, block=block_ms
+            )
+            entries = [entry for _, stream_entries in response or [] for entry in stream_entries]
+
+        batches = []
+        for entry_id, fields in entries:
+            try:
+                batches.append((entry_id, ArticleBatch.model_validate_json(fields["batch"])))
+            except (KeyError, ValueError) as e:
+                logger.error(f"Malformed batch {entry_id}: {e}")
+                self._dead_letter(entry_id, fields)
+        return batches
+
+    def ack(self, entry_id: str) -> None:
+        self.client.xack(self.stream, self.group, entry_id)
+
+    def pending(self) -> int:
+        """Number of batches delivered but not acknowledged yet."""
+        return self.client.xpending(self.stream, self.group)["pending"]
+
+    def _drop_poisoned(self, entries: list, consumer: str) -> list:
+        if not entries:
+            return entries
+
+        # Only this consumer's pending entries: other consumers' in the same ID range would use up the count
+        details = self.client.xpending_range(
+            self.stream, self.group, entries[0][0], entries[-1][0], len(entries), consumername=consumer
+        )
+        deliveries = {detail["message_id"]: detail["times_delivered"] for detail in details}
+
+        kept = []
+        for entry_id, fields in entries:
+            if fields is None:
+                # Trimmed from the stream while pending, nothing left to process
+                self.ack(entry_id)
+            elif deliveries.get(entry_id, 0) > self.max_deliveries:
+                logger.error(f"Batch {entry_id} failed {self.max_deliveries} times, moving it to {WORK_DEAD_LETTER_STREAM}")
+                self._dead_letter(entry_id, fields)
+            else:
+                kept.append((entry_id, fields))
+        return kept
+
+    def _dead_letter(self, entry_id: str, fields: dict) -> None:
+        self.client.xadd(WORK_DEAD_LETTER_STREAM, {**fields, "source_id": entry_id})
+        self.ack(entry_id)
@@ -0,0 +1,171 @@
+import datetime
+import itertools
+import logging
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Iterator
+
+from src.consts import BACKFILL_CHUNK_DAYS, BACKFILL_MAX_FAILED_DAYS, BACKFILL_WORKERS
+from src.libs.db_helpers import load_completed_units, mark_unit_completed
+from src.libs.quota import QuotaExhausted, QuotaPlanner
+from src.libs.topic_registry import get_topic_registry
+from src.scripts.modular.generate_one_time_data import NewsApiError
+from src.scripts.modular.stages import Deduplicator, Scorers, check_relevance, fetch, persist, score_sentiment
+
+logger = logging.getLogger(__name__)
+
+
+class Backfill:
+    """Scrapes and scores past days in parallel, one (topic, day) unit at a time.
+
+    The range, walked backwards from ``ending_date``, is cut into chunks of
+    ``chunk_days`` consecutive days that a pool of ``workers`` threads processes.
+    Completed units are recorded in the backfill_checkpoints table and skipped on the
+    next run, so an interrupted backfill resumes where it stopped. With ``days=None``
+    the backfill runs until NewsAPI reports that older history is out of reach. It also
+    stops once the day's request budget is spent, to resume on the next run, and after
+    ``max_failed_days`` days in a row with failed units, which point at a persistent error.
+    """
+
+    def __init__(
+        self,
+        ending_date: datetime.date,
+        days: int | None = None,
+        topics: list[str] | None = None,
+        workers: int = BACKFILL_WORKERS,
+        chunk_days: int = BACKFILL_CHUNK_DAYS,
+        max_failed_days: int = BACKFILL_MAX_FAILED_DAYS,
+    ):
+        self.ending_date = ending_date
+        self.days = days
+        self.registry = get_topic_registry()
+        self.topics = topics if topics is not None else [topic.name for topic in self.registry.enabled()]
+        self.workers = workers
+        self.chunk_days = chunk_days
+        self.max_failed_days = max_failed_days
+
+        self.planner = QuotaPlanner("backfill")
+        self._lock = threading.Lock()
+        self._history_limit: datetime.date | None = None
+        self._out_of_budget = False
+        self._failed_days_in_row = 0
+        self._too_many_failures = False
+        self._days_done = 0
+        self._started = 0.0
+
+    def run(self) -> None:
+        self._started = time.monotonic()
+
+        # The rollups are refreshed once, over every day written, when the scorers are closed
+        with Scorers(refresh_interval=None) as scorers, ThreadPoolExecutor(self.workers, thread_name_prefix="backfill") as pool:
+            in_flight: set[Future] = set()
+            for chunk in self._chunks():
+                while len(in_flight) >= self.workers:
+                    done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                    self._check(done)
+                # Chunks come newest first, so once history ran out every later chunk is out of reach
+                if self._history_limit is not None or self._out_of_budget or self._too_many_failures:
+                    break
+                in_flight.add(pool.submit(self._run_chunk, chunk, scorers))
+            self._check(wait(in_flight).done)
+
+        if self._history_limit is not None:
+            logger.info(f"Backfill stopped: NewsAPI has no history on or before {self._history_limit}")
+        if self._out_of_budget:
+            logger.info("Backfill stopped: the daily request budget is spent, run it again tomorrow to continue")
+        if self._too_many_failures:
+            logger.error(f"Backfill stopped: units failed on {self.max_failed_days} days in a row, see the errors above")
+        logger.info(f"Backfill finished: {self._days_done} days in {time.monotonic() - self._started:.0f}s")
+
+    def _chunks(self) -> Iterator[list[datetime.date]]:
+        offsets = range(self.days) if self.days else itertools.count()
+        days = (self.ending_date - datetime.timedelta(days=offset) for offset in offsets)
+        while chunk := list(itertools.islice(days, self.chunk_days)):
+            yield chunk
+
+    @staticmethod
+    def _check(done: set[Future]) -> None:
+        for future in done:
+            future.result()
+
+    def _run_chunk(self, days: list[datetime.date], scorers: Scorers) -> None:
+        completed = load_completed_units(self.topics, min(days), max(days))
+
+        for day in days:
+            failed = False
+            for topic in self.topics:
+                if self._beyond_history(day) or self._too_many_failures:
+                    return
+                if (topic, day) in completed:
+                    continue
+                if self.planner.remaining() <= 0:
+                    self._out_of_budget = True
+                    return
+                try:
+                    self._run_unit(topic, day, scorers)
+                except QuotaExhausted:
+                    # Another consumer spent the last requests: the unit is left undone for the next run
+                    self._out_of_budget = True
+                    return
+                except NewsApiError as e:
+                    if e.is_history_limit:
+                        self._reached_history_limit(day)
+                        return
+                    logger.error(f"Backfill of {topic} on {day} failed, it will be retried next run: {e}")
+                    failed = True
+                except Exception as e:
+                    logger.error(f"Backfill of {topic} on {day} failed, it will be retried next run: {e}")
+                    failed = True
+            if failed:
+                self._day_failed(day)
+            else:
+                self._day_done(day)
+
+    def _run_unit(self, topic: str, day: datetime.date, scorers: Scorers) -> None:
+        settings = self.registry.get(topic)
+        scorer = scorers(self.registry.analyzer_for(topic))
+        deduplicator = Deduplicator()
+        failed_before = scorer.writer.rows_failed
+        count = 0
+
+        for item in fetch(topic, day, scorer.ledger, planner=self.planner, query=settings.query if settings else None):
+            if deduplicator(item) is None or check_relevance(scorer.analyzer, item, scorer.ledger, self.registry) is None:
+                continue
+            persist(scorer.writer, score_sentiment(scorer.analyzer, item, scorer.ledger))
+            count += 1
+
+        # Only checkpoint once the rows are committed; a dropped batch may have held some of them
+        scorer.writer.flush()
+        if scorer.writer.rows_failed != failed_before:
+            raise RuntimeError("the DB writer dropped rows")
+        mark_unit_completed(topic, day, count)
+
+    def _beyond_history(self, day: datetime.date) -> bool:
+        with self._lock:
+            return self._history_limit is not None and day <= self._history_limit
+
+    def _reached_history_limit(self, day: datetime.date) -> None:
+        with self._lock:
+            if self._history_limit is None or day > self._history_limit:
+                self._history_limit = day
+
+    def _day_failed(self, day: datetime.date) -> None:
+        with self._lock:
+            self._failed_days_in_row += 1
+            if self._failed_days_in_row >= self.max_failed_days:
+                self._too_many_failures = True
+
+    def _day_done(self, day: datetime.date) -> None:
+        with self._lock:
+            self._days_done += 1
+            self._failed_days_in_row = 0
+            done = self._days_done
+
+        elapsed = time.monotonic() - self._started
+        rate = done / elapsed if elapsed else 0.0
+        if self.days and rate:
+            eta = datetime.timedelta(seconds=round((self.days - done) / rate))
+            logger.info(f"Backfill progress: {done}/{self.days} days, {rate:.3f} days/s, ETA {eta}")
+        else:
+            logger.info(f"Backfill progress: {done} days, {rate:.3f} days/s")
@@ -0,0 +1,99 @@
+import logging
+import sys
+
+from src.consts import (
+    ARTICLES_CHUNK_INTERVAL,
+    ARTICLES_COMPRESS_AFTER,
+    ARTICLES_TEXT_RETENTION,
+    ARTICLES_TEXT_TIER_AFTER,
+    LOGGING_LOCATION,
+)
+from src.libs.db_helpers import get_db_connection
+
+logger = logging.getLogger(__name__)
+
+
+def configure_storage(
+    chunk_interval: str = ARTICLES_CHUNK_INTERVAL,
+    compress_after: str = ARTICLES_COMPRESS_AFTER,
+    tier_after: str | None = ARTICLES_TEXT_TIER_AFTER,
+    text_retention: str | None = ARTICLES_TEXT_RETENTION,
+) -> None:
+    """
+    Apply the storage settings of the articles hypertable (safe to run again).
+
+    Args:
+        chunk_interval: Time range of the chunks created from now on
+        compress_after: Age after which chunks are compressed
+        tier_after: Age after which the description and content of articles move to
+            articles_text_archive, None to keep them in articles
+        text_retention: Age after which archived text is dropped, None to keep it
+
+    Raises:
+        ValueError: If text would be tiered out of chunks already compressed
+    """
+    conn = get_db_connection()
+    conn.autocommit = True
+    try:
+        with conn.cursor() as cursor:
+            if tier_after:
+                cursor.execute("SELECT %s::INTERVAL >= %s::INTERVAL", (tier_after, compress_after))
+                if cursor.fetchone()[0]:
+                    raise ValueError(
+                        f"Text tiering after {tier_after} would rewrite chunks compressed after {compress_after}, "
+                        "tier the text earlier"
+                    )
+
+            logger.info(f"New articles chunks will span {chunk_interval}")
+            cursor.execute("SELECT set_chunk_time_interval('articles', %s::INTERVAL)", (chunk_interval,))
+
+            # The segmenting cannot change once chunks are compressed, init.sql sets it up front
+            cursor.execute(
+                "SELECT compression_enabled FROM timescaledb_information.hypertables WHERE hypertable_name = 'articles'"
+            )
+            if not cursor.fetchone()[0]:
+                logger.info("Enabling compression of articles, segmented by topic")
+                cursor.execute("""
+                    ALTER TABLE articles SET (
+                        timescaledb.compress,
+                        timescaledb.compress_segmentby = 'topic_id',
+                        timescaledb.compress_orderby = 'published_at DESC'
+                    )
+                """)
+            logger.info(f"Compressing articles chunks older than {compress_after}")
+            cursor.execute("SELECT remove_compression_policy('articles', if_exists => true)")
+            cursor.execute("SELECT add_compression_policy('articles', compress_after => %s::INTERVAL)", (compress_after,))
+
+            cursor.execute(
+                "SELECT delete_job(job_id) FROM timescaledb_information.jobs WHERE proc_name = 'tier_article_text'"
+            )
+            if tier_after:
+                logger.info(f"Archiving the text of articles older than {tier_after}")
+                cursor.execute(
+                    "SELECT add_job('tier_article_text', INTERVAL '1 day', config => jsonb_build_object('older_than', %s))",
+                    (tier_after,),
+                )
+
+            cursor.execute("SELECT remove_retention_policy('articles_text_archive', if_exists => true)")
+            if text_retention:
+                logger.info(f"Dropping archived text older than {text_retention}")
+                cursor.execute(
+                    "SELECT add_retention_policy('articles_text_archive', drop_after => %s::INTERVAL)",
+                    (text_retention,),
+                )
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(
+            level=logging.INFO,
+            format="%(asctime)s - %(levelname)s - %(name)s - %(message)s",
+            datefmt="%Y-%m-%d %H:%M",
+            handlers=[
+                logging.FileHandler(LOGGING_LOCATION, mode='a'),
+                logging.StreamHandler(sys.stdout)
+            ]
+    )
+
+    configure_storage()
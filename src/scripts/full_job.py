@@ -1,22 +1,255 @@
 import datetime
 import logging
+import threading
+from collections import defaultdict
+from enum import Enum
+from functools import partial
+from typing import Callable
 
-from src.consts import TOPICS
-from src.scripts.modular import scrape, process
+from src.consts import (
+    PACKED_QUERIES,
+    PIPELINE_QUEUE_SIZE,
+    PIPELINE_WORKERS,
+    SCHEDULER_MAX_PAGE_ATTEMPTS,
+    WORK_BATCH_SIZE,
+    TypesOfSA,
+)
+from src.libs.db_helpers import load_failed_pages, save_failed_pages
+from src.libs.db_writer import BackgroundDBWriter
+from src.libs.ledger import ProcessingLedger
+from src.libs.models import ArticleBatch
+from src.libs.pipeline import Pipeline, Stage
+from src.libs.quota import PageRequest, QuotaExhausted, QuotaPlan, QuotaPlanner
+from src.libs.redis_helpers import get_redis_client
+from src.libs.sentiment_analysis.base import SentimentAnalyzer
+from src.libs.topic_registry import Cadence, TopicRegistry, TopicSettings, get_topic_registry
+from src.libs.topic_routing import TopicRouter, combined_query, pack_topics
+from src.libs.work_queue import RedisWorkQueue
+from src.scripts.modular.generate_one_time_data import NewsApiError, scrape
+from src.scripts.modular.stages import Deduplicator, Scorers, check_relevance, fetch_packed, persist, score_sentiment
 
 logger = logging.getLogger(__name__)
 
-def job(date_to_use:datetime.date|None = None):
+
+def build_pipeline(
+    analyzer: SentimentAnalyzer,
+    writer: BackgroundDBWriter,
+    routers: dict[str, TopicRouter],
+    ledger: ProcessingLedger | None = None,
+    planner: QuotaPlanner | None = None,
+    registry: TopicRegistry | None = None,
+    on_fetch_error: Callable[[PageRequest, Exception], None] | None = None,
+) -> Pipeline:
+    """Wire the fetch -> dedup -> relevance -> sentiment -> persist stages, fed with PageRequests.
+
+    Requests are made per query of ``routers`` (see plan_requests), whose articles are
+    routed back to their topics before the relevance stage. Requests that fail are passed
+    to ``on_fetch_error`` with their exception.
+
+    Every stage runs on threads: fetching waits on the network, persisting only hands
+    rows to the background writer, and the torch models release the GIL during
+    inference, so a process pool would only add the cost of pickling articles and
+    loading the models once per process.
+    """
+    return Pipeline(
+        [
+            Stage(
+                "fetch",
+                partial(fetch_packed, routers=routers, ledger=ledger, planner=planner),
+                workers=PIPELINE_WORKERS["fetch"],
+                fan_out=True,
+                on_error=on_fetch_error,
+            ),
+            Stage("dedup", Deduplicator(), workers=PIPELINE_WORKERS["dedup"]),
+            Stage("relevance", partial(check_relevance, analyzer, ledger=ledger, registry=registry), workers=PIPELINE_WORKERS["relevance"]),
+            Stage("sentiment", partial(score_sentiment, analyzer, ledger=ledger), workers=PIPELINE_WORKERS["sentiment"]),
+            Stage("persist", partial(persist, writer), workers=PIPELINE_WORKERS["persist"]),
+        ],
+        queue_size=PIPELINE_QUEUE_SIZE,
+    )
+
+
+def plan_requests(
+    planner: QuotaPlanner,
+    date_to_use: datetime.date,
+    topics: list[TopicSettings],
+    packed: bool = PACKED_QUERIES,
+) -> tuple[QuotaPlan, dict[str, TopicRouter]]:
+    """
+    Plan the day's requests, one per topic query or, when ``packed``, per combined query of several topics.
+
+    Returns:
+        The plan, and the router of each planned query, keyed by the query
+    """
+    routers, priorities = _route_queries(topics, packed)
+    if packed:
+        logger.info(f"Packed {len(topics)} topics into {len(routers)} queries")
+    return planner.plan(date_to_use, list(routers), priorities=priorities), routers
+
+
+def _route_queries(topics: list[TopicSettings], packed: bool) -> tuple[dict[str, TopicRouter], dict[str, float]]:
+    """The router and the priority of each query of ``topics``, keyed by the query."""
+    routers: dict[str, TopicRouter] = {}
+    priorities: dict[str, float] = {}
+
+    # Topics scored by different analyzers never share a query, so each request feeds one pipeline
+    by_analyzer: dict[TypesOfSA, dict[str, list[TopicSettings]]] = defaultdict(lambda: defaultdict(list))
+    for topic in topics:
+        by_analyzer[topic.analyzer][topic.query].append(topic)
+
+    for by_query in by_analyzer.values():
+        groups = pack_topics(list(by_query)) if packed else [[query] for query in by_query]
+        for group in groups:
+            members = [topic for query in group for topic in by_query[query]]
+            query = combined_query(group)
+            routers[query] = TopicRouter([topic.name for topic in members])
+            priorities[query] = max(topic.priority for topic in members)
+    return routers, priorities
+
+
+class RunStatus(str, Enum):
+    SUCCEEDED = "succeeded"
+    PARTIAL = "partial"  # done, without some pages that could not be fetched
+    FAILED = "failed"  # pages are left to retry
+
+
+def is_retriable(error: Exception) -> bool:
+    """Whether a page request that failed with ``error`` may succeed if made again later."""
+    if isinstance(error, QuotaExhausted):
+        return False
+    if isinstance(error, NewsApiError):
+        # Other client errors are NewsAPI rejecting the request itself
+        return error.status_code == 429 or error.status_code >= 500
+    return True
+
+
+class RunPages:
+    """The page requests of one scheduled run, across the scheduler's retries of it (thread-safe).
+
+    A run's first attempt makes the day's plan. Its failed requests are saved in
+    scheduler_failed_pages, and a retried run only makes those again, so it neither
+    re-plans nor re-spends the budget on the pages already fetched. A page is given up
+    once it failed SCHEDULER_MAX_PAGE_ATTEMPTS times, or at once when retrying cannot
+    help (see is_retriable); pages refused for lack of budget go to the next plan instead.
+    """
+
+    def __init__(self, job_name: str, run_date: datetime.date, planner: QuotaPlanner):
+        self.job_name = job_name
+        self.run_date = run_date
+        self.planner = planner
+        self._retry: dict[PageRequest, tuple[int, str]] = {}
+        self._given_up: dict[PageRequest, tuple[int, str]] = {}
+        for topic, day, page, attempts, error, retry in load_failed_pages(job_name, run_date):
+            (self._retry if retry else self._given_up)[PageRequest(topic, day, page)] = (attempts, error)
+        self._failed: dict[PageRequest, tuple[int, str]] = {}
+        self._deferred: list[PageRequest] = []
+        self._lock = threading.Lock()
+
+    def requests(self, topics: list[TopicSettings]) -> tuple[list[PageRequest], dict[str, TopicRouter]]:
+        """The requests to make in this attempt, and the router of each of their queries (see plan_requests)."""
+        # Any failed page saved means the run was attempted already, and its plan made
+        if not self._retry and not self._given_up:
+            plan, routers = plan_requests(self.planner, self.run_date, topics)
+            return plan.requests, routers
+
+        routers, _ = _route_queries(topics, PACKED_QUERIES)
+        requests = []
+        for request, (attempts, error) in self._retry.items():
+            if request.topic in routers:
+                requests.append(request)
+            else:
+                logger.warning(f"Dropping the failed request for {request.topic!r}, its topics changed since")
+                self._given_up[request] = (attempts, error)
+        logger.info(f"Retrying {len(requests)} failed page requests of {self.job_name} for {self.run_date}")
+        return requests, routers
+
+    def failed(self, request: PageRequest, error: Exception) -> None:
+        with self._lock:
+            attempts = self._retry.get(request, (0, None))[0] + 1
+            if isinstance(error, QuotaExhausted):
+                self._deferred.append(request)
+                self._given_up[request] = (attempts, "deferred to the next plan: request budget spent")
+            elif not is_retriable(error) or attempts >= SCHEDULER_MAX_PAGE_ATTEMPTS:
+                logger.error(f"Giving up on page {request.page} of {request.topic!r} after {attempts} attempts: {error}")
+                self._given_up[request] = (attempts, str(error))
+            else:
+                self._failed[request] = (attempts, str(error))
+
+    def finish(self) -> RunStatus:
+        """Save the failed requests for the next attempt, and tell how this one went."""
+        if self._deferred:
+            logger.warning(f"Request budget spent, deferring {len(self._deferred)} pages to the next plan")
+            self.planner.defer(self._deferred)
+        save_failed_pages(self.job_name, self.run_date, [
+            (request.topic, request.day, request.page, attempts, error, retry)
+            for pages, retry in ((self._failed, True), (self._given_up, False))
+            for request, (attempts, error) in pages.items()
+        ])
+        if self._failed:
+            logger.error(f"{self.job_name} for {self.run_date} failed: {len(self._failed)} page requests are left to retry")
+            return RunStatus.FAILED
+        if self._given_up:
+            logger.warning(f"{self.job_name} for {self.run_date} done without {len(self._given_up)} pages")
+            return RunStatus.PARTIAL
+        return RunStatus.SUCCEEDED
+
+
+def enqueue_job(date_to_use:datetime.date|None = None) -> RunStatus:
+    """Distributed counterpart of job: scrape every topic and leave the scoring to the workers (see worker.py)."""
+    if date_to_use is None:
+        date_to_use = datetime.date.today()
+
+    logger.info(f"Enqueue job started at {datetime.datetime.now()} for {date_to_use}")
+    queue = RedisWorkQueue(get_redis_client())
+    planner = QuotaPlanner("enqueue_job")
+    run = RunPages("enqueue_job", date_to_use, planner)
+    requests, routers = run.requests(get_topic_registry().enabled(Cadence.DAILY))
+    for request in requests:
+        try:
+            scraped = scrape(request.topic, request.day, request.page, planner)
+            if request.page == 1:
+                planner.observe(request.topic, scraped.totalResults)
+            router = routers[request.topic]
+            routed, unmatched = router.route(scraped.articles)
+            batches = [(topic, articles, False) for topic, articles in routed.items()]
+            if unmatched:
+                batches += [(topic, unmatched, True) for topic in router.topics]
+            for topic, articles, fanned_out in batches:
+                for start in range(0, len(articles), WORK_BATCH_SIZE):
+                    queue.enqueue(ArticleBatch(
+                        topic=topic, day=request.day, articles=articles[start:start + WORK_BATCH_SIZE], fanned_out=fanned_out,
+                    ))
+                logger.info(f"Enqueued {len(articles)} articles on {topic} ({request.day}, page {request.page})")
+        except Exception as e:
+            logger.error(e)
+            run.failed(request, e)
+    return run.finish()
+
+
+def job(date_to_use:datetime.date|None = None) -> RunStatus:
     if date_to_use is None:
         date_to_use = datetime.date.today()
 
     logger.info(f"Job started at {datetime.datetime.now()} for {date_to_use}")
     try:
-        for topic in TOPICS:
-            scraped = scrape(topic, date_to_use)
-            process(scraped, topic)
+        registry = get_topic_registry()
+        planner = QuotaPlanner("job")
+        run = RunPages("job", date_to_use, planner)
+        requests, routers = run.requests(registry.enabled(Cadence.DAILY))
+
+        requests_by_analyzer: dict[TypesOfSA, list[PageRequest]] = defaultdict(list)
+        for request in requests:
+            requests_by_analyzer[registry.analyzer_for(routers[request.topic].topics[0])].append(request)
+
+        with Scorers(refresh_interval=None) as scorers:
+            for kind, requests in requests_by_analyzer.items():
+                scorer = scorers(kind)
+                build_pipeline(scorer.analyzer, scorer.writer, routers, scorer.ledger, planner, registry, run.failed).run(requests)
+        # A failed page is missing data: it is retried with the run, unless retrying cannot help
+        return run.finish()
     except Exception as e:
         logger.error(e)
+        return RunStatus.FAILED
 
 
 if __name__ == "__main__":
@@ -27,4 +260,4 @@ if __name__ == "__main__":
     )
     logging.getLogger("httpx").setLevel(logging.WARNING)
 
-    job()
\ No newline at end of file
+    job()
@@ -3,7 +3,7 @@ import logging
 import sys
 
 from src.consts import LOGGING_LOCATION
-from src.scripts.full_job import job
+from src.scripts.backfill import Backfill
 
 logger = logging.getLogger(__name__)
 
@@ -12,14 +12,9 @@ def fill_database(ending_date:datetime.date|None=None, days:int=None):
     try:
         if days:
             logger.info("Filling database with {} days".format(days))
-            for _ in range(days):
-                job(date_to_use=date_to_use)
-                date_to_use -= datetime.timedelta(days=1)
         else:
             logger.info("Filling database with as many days as possible")
-            while True:
-                job(date_to_use=date_to_use)
-                date_to_use -= datetime.timedelta(days=1)
+        Backfill(date_to_use, days).run()
 
     except Exception as e:
         logger.error(e)
@@ -1,4 +1,4 @@
-from src.scripts.modular.generate_one_time_data import scrape
+from src.scripts.modular.generate_one_time_data import scrape, scrape_stream
 from src.scripts.modular.parse_data import process
 
-__all__ = ["scrape", "process"]
\ No newline at end of file
+__all__ = ["scrape", "scrape_stream", "process"]
\ No newline at end of file
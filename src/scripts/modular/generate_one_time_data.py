@@ -4,44 +4,143 @@ from dotenv import load_dotenv
 import os
 import requests
 from datetime import date, timedelta, datetime
+from typing import Iterator
 
-from src.consts import DEFAULT_TOPIC
-from src.libs.models import ParsedArticleList
-from src.libs.local_helpers.pydantic_helpers import save_model
+from src.consts import DEFAULT_TOPIC, HTTP_REQUESTS_PER_SECOND
+from src.libs.api_keys import configured_keys, get_api_key_pool
+from src.libs.http_client import HttpClient
+from src.libs.models import ApiError, Article, ParsedArticleList
+from src.libs.quota import PAGE_SIZE, QuotaPlanner
+from src.libs.local_helpers.pydantic_helpers import save_model, stream_models
 from src.libs.local_helpers.path_helpers import get_project_path
 
 logger = logging.getLogger(__name__)
 load_dotenv()
 
 
-API_KEY = os.getenv("NEWS_API_KEY")
-URL = "https://newsapi.org/v2/everything"
+URL = os.getenv("NEWS_API_URL", "https://newsapi.org/v2/everything")
 DAYS_OF_INTEREST = 1
+STREAM_CHUNK_SIZE = 64 * 1024
 
+# Shared by every thread, so they all draw from the same rate limit; NewsAPI limits each key separately
+_client = HttpClient(HTTP_REQUESTS_PER_SECOND * max(1, len(configured_keys())))
 
-def scrape(topic, date_given) -> ParsedArticleList:
+
+class NewsApiError(Exception):
+    """A non-200 answer from NewsAPI."""
+
+    def __init__(self, status_code: int, text: str):
+        try:
+            error = ApiError.model_validate_json(text)
+        except ValueError:
+            error = ApiError(status="error", message=text)
+        self.status_code = status_code
+        self.code = error.code
+        self.message = error.message
+        super().__init__(f"{status_code} {self.code}: {self.message}")
+
+    @property
+    def is_history_limit(self) -> bool:
+        """Whether the request went further back than the plan's history allows."""
+        return self.code == "parameterInvalid" and "too far in the past" in (self.message or "")
+
+
+def _build_params(topic, date_given, page: int = 1) -> dict:
     query_data = date_given - timedelta(days=DAYS_OF_INTEREST)
 
-    params = {
+    return {
         "q": topic,
         "from": query_data.isoformat(),
-        "apiKey": API_KEY,
+        "to": date_given.isoformat(),
+        "language": "en",
+        "sortBy": "publishedAt",
+        "pageSize": PAGE_SIZE,
+        "page": page,
+    }
+
+
+def scrape(topic, date_given, page: int = 1, planner: QuotaPlanner | None = None) -> ParsedArticleList:
+    """Get one page of the articles on a topic for a day; every request it takes is spent from ``planner``'s budget."""
+    return _request(_build_params(topic, date_given, page), planner)
+
+
+def scrape_since(
+    topic,
+    since: datetime,
+    page: int = 1,
+    until: datetime | None = None,
+    planner: QuotaPlanner | None = None,
+) -> ParsedArticleList:
+    """Get one page of the articles on a topic published after ``since`` (and up to ``until``), newest first."""
+    params = {
+        "q": topic,
+        "from": since.isoformat(timespec="seconds"),
         "language": "en",
         "sortBy": "publishedAt",
+        "pageSize": PAGE_SIZE,
+        "page": page,
     }
+    if until is not None:
+        params["to"] = until.isoformat(timespec="seconds")
+    return _request(params, planner)
+
+
+def _get(params: dict, stream: bool = False, planner: QuotaPlanner | None = None) -> requests.Response:
+    """
+    Send a NewsAPI request, moving to another API key when one is rate limited or rejected.
+
+    Every attempt, whether a retry or one on another key, is a request NewsAPI counts: each
+    is spent from ``planner``'s budget and counted on its key before it is sent.
+
+    Raises:
+        QuotaExhausted: The budget ran out before a response came back
+    """
+    keys = get_api_key_pool()
+    while True:
+        api_key = keys.acquire()
+        attempts = 0
+
+        def charge() -> None:
+            nonlocal attempts
+            if planner:
+                planner.spend()
+            # acquire() already counted the first attempt on the key
+            if attempts:
+                keys.count(api_key)
+            attempts += 1
 
-    response = requests.get(URL, params=params)
+        # With another key to fall back on, a rate limit is not worth waiting out
+        spare = keys.has_spare(api_key)
+        response = _client.get(
+            URL, {**params, "apiKey": api_key}, key=params["q"], stream=stream, retry_rate_limited=not spare, on_attempt=charge,
+        )
+        if not (keys.report(api_key, response) and spare):
+            return response
+        response.close()
+
+
+def _request(params: dict, planner: QuotaPlanner | None = None) -> ParsedArticleList:
+    response = _get(params, planner=planner)
 
     if response.status_code != 200:
         logging.error(f"{response.status_code}\n{response.text}")
-        exit(1)
-
-    data = response.json()
+        raise NewsApiError(response.status_code, response.text)
 
-    validated_data = ParsedArticleList.model_validate(data)
+    # Validate straight from the raw bytes, skipping the intermediate dict built by response.json()
+    validated_data = ParsedArticleList.model_validate_json(response.content)
     return validated_data
 
 
+def scrape_stream(topic, date_given, planner: QuotaPlanner | None = None) -> Iterator[Article]:
+    """Same query as scrape, but yields articles as the response body arrives instead of buffering it."""
+    with _get(_build_params(topic, date_given), stream=True, planner=planner) as response:
+        if response.status_code != 200:
+            logging.error(f"{response.status_code}\n{response.text}")
+            raise NewsApiError(response.status_code, response.text)
+
+        yield from stream_models(Article, response.iter_content(chunk_size=STREAM_CHUNK_SIZE), "articles")
+
+
 if __name__ == "__main__":
     logging.basicConfig(
         level=logging.INFO, format="%(levelname)s - %(name)s - %(message)s"
@@ -1,39 +1,41 @@
 import logging
+from typing import Iterable
 
 from dotenv import load_dotenv
 
-from src.libs.db_helpers import add_to_db
-from src.libs.models import ParsedArticleList
+from src.libs.db_helpers import RollupRefresher, article_row
+from src.libs.db_writer import BackgroundDBWriter
+from src.libs.models import Article, ParsedArticleList
 from src.libs.local_helpers.path_helpers import get_project_path
-from src.libs.local_helpers.pydantic_helpers import load_model
+from src.libs.local_helpers.pydantic_helpers import iter_chunks, stream_models
 from src.libs.sentiment_analysis import get_sentiment_analyzer
 from src.libs.sentiment_analysis.base import SentimentAnalyzer, Sentiment
-from src.consts import DEFAULT_TOPIC, SENTIMENT_ANALYSIS_MODEL
+from src.libs.topic_registry import get_topic_registry
+from src.scripts.modular.stages import retry_unknown
+from src.consts import DEFAULT_TOPIC
 
 logger = logging.getLogger(__name__)
 load_dotenv()
 
-def _retry_unknown(article) -> Sentiment:
-    # TODO: Add scraping for UNKNOWN to improve
-    return Sentiment.UNKNOWN
+def process(model:ParsedArticleList | Iterable[Article], topic:str) -> None:
+    sentiment_analyser: SentimentAnalyzer = get_sentiment_analyzer(get_topic_registry().analyzer_for(topic).value, topic)
 
+    articles = model.articles if isinstance(model, ParsedArticleList) else model
+    # Rows are queued for the background writer, so scoring the next article doesn't wait on the DB
+    with RollupRefresher(interval=None) as refresher, BackgroundDBWriter(on_flush=refresher.record) as writer:
+        for article in articles:
+            answer, scores = sentiment_analyser.scored_sentiment_analysis(article)
+            if answer is Sentiment.INVALID:
+                continue
 
-def process(model:ParsedArticleList, topic:str) -> None:
-    sentiment_analyser: SentimentAnalyzer = get_sentiment_analyzer(SENTIMENT_ANALYSIS_MODEL.value, DEFAULT_TOPIC)
+            if answer is Sentiment.UNKNOWN:
+                answer_t = retry_unknown(article)
+                logger.debug(f"Retrying unknown article previous {answer}, current {answer_t}")
+                answer = answer_t
 
-    for article in model.articles:
-        answer = sentiment_analyser.sentiment_analysis(article.model_dump())
-        if answer is Sentiment.INVALID:
-            continue
+            logger.info(f"{article.title}\n{answer}")
 
-        if answer is Sentiment.UNKNOWN:
-            answer_t = _retry_unknown(article)
-            logger.debug(f"Retrying unknown article previous {answer}, current {answer_t}")
-            answer = answer_t
-
-        logger.info(f"{article.title}\n{answer}")
-
-        add_to_db(article, answer, topic)
+            writer.submit(article_row(article, answer, topic, scores, sentiment_analyser.model_version))
 
 
 if __name__ == "__main__":
@@ -45,8 +47,7 @@ if __name__ == "__main__":
     )
     logging.getLogger("httpx").setLevel(logging.WARNING)
 
-    parsed_list: ParsedArticleList = load_model(
-        ParsedArticleList, get_project_path(f".examples/{TMP_NAME}")
-    )
-    process(parsed_list, DEFAULT_TOPIC)
+    # Replays are streamed so that arbitrarily large saved payloads fit in constant memory
+    articles = stream_models(Article, iter_chunks(get_project_path(f".examples/{TMP_NAME}")), "articles")
+    process(articles, DEFAULT_TOPIC)
 
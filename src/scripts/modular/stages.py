@@ -0,0 +1,212 @@
+import datetime
+import logging
+import threading
+from contextlib import ExitStack
+from dataclasses import dataclass, field
+from typing import Iterator
+
+from src.consts import DEFAULT_TOPIC, TypesOfSA
+from src.consts import ROLLUP_REFRESH_INTERVAL
+from src.libs.db_helpers import RollupRefresher, article_row
+from src.libs.db_writer import BackgroundDBWriter
+from src.libs.ledger import LedgerStage, ProcessingLedger
+from src.libs.models import Article, ParsedArticleList
+from src.libs.quota import PageRequest, QuotaPlanner
+from src.libs.sentiment_analysis import get_sentiment_analyzer
+from src.libs.sentiment_analysis.base import Scores, Sentiment, SentimentAnalyzer
+from src.libs.topic_registry import TopicRegistry
+from src.libs.topic_routing import TopicRouter
+from src.scripts.modular.generate_one_time_data import scrape
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(slots=True, repr=False)
+class WorkItem:
+    """An article travelling through the pipeline, with the results gathered so far."""
+    topic: str
+    article: Article
+    context: SentimentAnalyzer.Input | None = None
+    relevant: bool | None = None
+    sentiment: Sentiment | None = None
+    scores: Scores = field(default_factory=Scores)
+    model_version: str | None = None
+    # A copy of an article matching none of its query's topics, kept only if found relevant
+    fanned_out: bool = False
+
+    def __repr__(self) -> str:
+        return f"WorkItem({self.topic!r}, {self.article.url!r})"
+
+
+@dataclass(slots=True)
+class Scorer:
+    analyzer: SentimentAnalyzer
+    ledger: ProcessingLedger
+    writer: BackgroundDBWriter
+
+
+class Scorers:
+    """The analyzer, ledger and DB writer of each analyzer type, created on first use (thread-safe).
+
+    Topics may each use their own analyzer (see topic_registry), so only the models of
+    the types actually needed get loaded. Leaving the context flushes and closes every
+    writer, then every ledger, and finally refreshes the rollups over the days written.
+
+    Args:
+        refresh_interval: Seconds between refreshes of the rollups while running, None to
+            refresh them only on leaving (see db_helpers.RollupRefresher)
+    """
+
+    def __init__(self, refresh_interval: float | None = ROLLUP_REFRESH_INTERVAL):
+        self._stack = ExitStack()
+        self._scorers: dict[TypesOfSA, Scorer] = {}
+        self._lock = threading.Lock()
+        self._refresher = RollupRefresher(refresh_interval)
+
+    def __enter__(self) -> "Scorers":
+        self._stack.__enter__()
+        # Entered first so that it is closed last, once the writers have recorded their final rows
+        self._stack.enter_context(self._refresher)
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        return self._stack.__exit__(exc_type, exc_val, exc_tb)
+
+    def __call__(self, kind: TypesOfSA) -> Scorer:
+        with self._lock:
+            if kind not in self._scorers:
+                analyzer = get_sentiment_analyzer(kind.value, DEFAULT_TOPIC)
+                ledger = self._stack.enter_context(ProcessingLedger(analyzer.model_version))
+                writer = self._stack.enter_context(BackgroundDBWriter(on_flush=_after_flush(ledger, self._refresher)))
+                self._scorers[kind] = Scorer(analyzer, ledger, writer)
+            return self._scorers[kind]
+
+
+def _after_flush(ledger: ProcessingLedger, refresher: RollupRefresher):
+    def hook(rows: list[tuple]) -> None:
+        # Committed rows invalidate the dashboard's cached results for their days, once in the rollups
+        refresher.record(rows)
+        ledger.record_persisted(rows)
+    return hook
+
+
+def retry_unknown(article: Article) -> Sentiment:
+    # TODO: Add scraping for UNKNOWN to improve
+    return Sentiment.UNKNOWN
+
+
+def fetch(
+    topic: str,
+    date_given: datetime.date,
+    ledger: ProcessingLedger | None = None,
+    page: int = 1,
+    planner: QuotaPlanner | None = None,
+    query: str | None = None,
+) -> Iterator[WorkItem]:
+    yield from to_work_items(topic, _scrape_page(query or topic, date_given, page, planner).articles, ledger)
+
+
+def fetch_packed(
+    request: PageRequest,
+    routers: dict[str, TopicRouter],
+    ledger: ProcessingLedger | None = None,
+    planner: QuotaPlanner | None = None,
+) -> Iterator[WorkItem]:
+    """Fetch a page of a query (see full_job.plan_requests) and route its articles to their topics."""
+    scraped = _scrape_page(request.topic, request.day, request.page, planner)
+    router = routers[request.topic]
+    routed, unmatched = router.route(scraped.articles)
+    for topic, articles in routed.items():
+        yield from to_work_items(topic, articles, ledger)
+    if unmatched:
+        for topic in router.topics:
+            yield from to_work_items(topic, unmatched, ledger, fanned_out=True)
+
+
+def _scrape_page(query: str, date_given: datetime.date, page: int, planner: QuotaPlanner | None) -> ParsedArticleList:
+    scraped = scrape(query, date_given, page, planner)
+    if planner and page == 1:
+        planner.observe(query, scraped.totalResults)
+    return scraped
+
+
+def to_work_items(
+    topic: str,
+    articles: list[Article],
+    ledger: ProcessingLedger | None = None,
+    fanned_out: bool = False,
+) -> Iterator[WorkItem]:
+    # Resume from the ledger: persisted articles are skipped, partial results are reused
+    known = ledger.lookup(topic, [article.url for article in articles if article.url]) if ledger else {}
+
+    for article in articles:
+        entry = known.get(article.url)
+        if entry is None:
+            if ledger and article.url:
+                ledger.record(article.url, topic, LedgerStage.FETCHED)
+            yield WorkItem(topic, article, fanned_out=fanned_out)
+        elif entry.stage is not LedgerStage.PERSISTED:
+            yield WorkItem(topic, article, relevant=entry.relevant, sentiment=entry.sentiment, fanned_out=fanned_out)
+
+
+class Deduplicator:
+    """Drops articles already seen for the same topic during this run (thread-safe)."""
+
+    def __init__(self):
+        self._seen: set[tuple[str, str | None]] = set()
+        self._lock = threading.Lock()
+
+    def __call__(self, item: WorkItem) -> WorkItem | None:
+        key = (item.topic, item.article.url)
+        with self._lock:
+            if key in self._seen:
+                return None
+            self._seen.add(key)
+        return item
+
+
+def check_relevance(
+    analyzer: SentimentAnalyzer,
+    item: WorkItem,
+    ledger: ProcessingLedger | None = None,
+    registry: TopicRegistry | None = None,
+) -> WorkItem | None:
+    item.context = analyzer.validate(item.article)
+    if item.context is None:
+        return None
+
+    item.model_version = analyzer.model_version
+    if item.relevant is None:
+        threshold = registry.relevance_threshold(item.topic) if registry else None
+        item.relevant, scores = analyzer.relevance_with_scores(item.context, item.topic, threshold)
+        item.scores = item.scores.merge(scores)
+        if ledger and item.article.url:
+            ledger.record(item.article.url, item.topic, LedgerStage.RELEVANCE_SCORED, relevant=item.relevant)
+
+    if not item.relevant:
+        # A fan-out copy the model rejects belongs to another topic of its query
+        if item.fanned_out:
+            return None
+        item.sentiment = Sentiment.UNKNOWN
+    return item
+
+
+def score_sentiment(analyzer: SentimentAnalyzer, item: WorkItem, ledger: ProcessingLedger | None = None) -> WorkItem:
+    if item.sentiment is None:
+        item.sentiment, scores = analyzer.classify_with_scores(item.context, item.topic)
+        item.scores = item.scores.merge(scores)
+        if ledger and item.article.url:
+            ledger.record(item.article.url, item.topic, LedgerStage.SENTIMENT_SCORED, sentiment=item.sentiment)
+
+    if item.sentiment is Sentiment.UNKNOWN:
+        answer_t = retry_unknown(item.article)
+        logger.debug(f"Retrying unknown article previous {item.sentiment}, current {answer_t}")
+        item.sentiment = answer_t
+
+    logger.info(f"{item.article.title}\n{item.sentiment}")
+    return item
+
+
+def persist(writer: BackgroundDBWriter, item: WorkItem) -> WorkItem:
+    writer.submit(article_row(item.article, item.sentiment, item.topic, item.scores, item.model_version))
+    return item
@@ -0,0 +1,217 @@
+import datetime
+import logging
+import sys
+import time
+from dataclasses import dataclass
+
+from src.consts import (
+    LOGGING_LOCATION,
+    POLL_DAILY_REQUEST_BUDGET,
+    POLL_MAX_INTERVAL,
+    POLL_MAX_PAGES,
+    POLL_MIN_INTERVAL,
+    POLL_RATE_SMOOTHING,
+    POLL_TARGET_ARTICLES,
+    SCHEDULER_LEASE_SECONDS,
+    SCHEDULER_POLL_SECONDS,
+)
+from src.libs.db_helpers import load_watermarks, save_watermark
+from src.libs.leader import LeaderLock
+from src.libs.models import Article
+from src.libs.quota import PAGE_SIZE, QuotaExhausted, QuotaPlanner
+from src.libs.redis_helpers import get_redis_client
+from src.libs.topic_registry import Cadence, TopicRegistry, TopicSettings, get_topic_registry
+from src.scripts.modular.generate_one_time_data import scrape_since
+from src.scripts.modular.stages import Scorers, check_relevance, persist, score_sentiment, to_work_items
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(slots=True)
+class TopicState:
+    topic: str
+    watermark: datetime.datetime
+    interval: float
+    arrival_rate: float  # articles per second
+    last_poll: datetime.datetime | None = None
+    next_poll: datetime.datetime | None = None
+    # Set while a burst overflowed POLL_MAX_PAGES: the articles between the watermark and gap_end
+    # are still to be fetched, those up to gap_head were fetched already
+    gap_end: datetime.datetime | None = None
+    gap_head: datetime.datetime | None = None
+
+
+class DailyQuota:
+    """The poller's share of the shared request budget: at most POLL_DAILY_REQUEST_BUDGET a day."""
+
+    def __init__(self, planner: QuotaPlanner, budget: int = POLL_DAILY_REQUEST_BUDGET):
+        self.planner = planner
+        self.budget = budget
+
+    def remaining(self) -> int:
+        own = self.budget - self.planner.used(self.planner.consumer)
+        return max(0, min(own, self.planner.remaining()))
+
+    def min_interval(self, topics: int) -> float:
+        """Shortest per-topic interval that spreads the remaining requests over the rest of the quota day."""
+        now = datetime.datetime.now(datetime.timezone.utc)
+        midnight = datetime.datetime.combine(now.date() + datetime.timedelta(days=1), datetime.time(), datetime.timezone.utc)
+        seconds_left = (midnight - now).total_seconds()
+        remaining = self.remaining()
+        return seconds_left * topics / remaining if remaining else seconds_left
+
+
+def next_interval(arrival_rate: float, quota_floor: float) -> float:
+    """Poll often enough to bring back about POLL_TARGET_ARTICLES each time, within the quota."""
+    interval = POLL_TARGET_ARTICLES / arrival_rate if arrival_rate > 0 else POLL_MAX_INTERVAL
+    interval = min(max(interval, POLL_MIN_INTERVAL), POLL_MAX_INTERVAL)
+    return max(interval, quota_floor)
+
+
+def _fetch_new(state: TopicState, query: str, quota: DailyQuota) -> tuple[list[Article], bool]:
+    """
+    Fetch the articles published since the watermark, or only those of the open gap if there is one.
+
+    Returns:
+        The articles, and whether they reach down to the watermark
+    """
+    articles = []
+    for page in range(1, POLL_MAX_PAGES + 1):
+        try:
+            if not quota.remaining():
+                raise QuotaExhausted
+            page_articles = scrape_since(query, state.watermark, page, until=state.gap_end, planner=quota.planner).articles
+        except QuotaExhausted:
+            logger.warning(f"Daily request budget spent, {state.topic} may miss articles until tomorrow")
+            return articles, False
+        # 'from' is inclusive: articles at the watermark itself come back and are skipped by the ledger
+        fresh = [a for a in page_articles if a.published_datetime and a.published_datetime >= state.watermark]
+        articles.extend(fresh)
+        # Results are newest first, so a short page or one reaching the watermark means nothing is left
+        if len(page_articles) < PAGE_SIZE or len(fresh) < len(page_articles):
+            return articles, True
+    return articles, False
+
+
+def poll_topic(
+    state: TopicState,
+    settings: TopicSettings,
+    scorers: Scorers,
+    registry: TopicRegistry,
+    quota: DailyQuota,
+    topics: int,
+) -> None:
+    """Score and persist the articles published on a topic since its watermark, then reschedule it."""
+    now = datetime.datetime.now(datetime.timezone.utc)
+    articles, complete = _fetch_new(state, settings.query, quota)
+
+    scorer = scorers(settings.analyzer)
+    failed_before = scorer.writer.rows_failed
+    for item in to_work_items(state.topic, articles, scorer.ledger):
+        if check_relevance(scorer.analyzer, item, scorer.ledger, registry) is None:
+            continue
+        persist(scorer.writer, score_sentiment(scorer.analyzer, item, scorer.ledger))
+    scorer.writer.flush()
+    if scorer.writer.rows_failed != failed_before:
+        raise RuntimeError("the DB writer dropped rows")
+
+    arrived = sum(1 for article in articles if article.published_datetime > state.watermark)
+    if complete:
+        # Everything up to the newest article fetched, before the gap if one was being filled, is stored
+        state.watermark = state.gap_head or max((article.published_datetime for article in articles), default=state.watermark)
+        state.gap_end = state.gap_head = None
+    elif articles:
+        # The pages ran out before the watermark: keep it, and fetch what lies below the oldest article next time
+        if state.gap_head is None:
+            state.gap_head = max(article.published_datetime for article in articles)
+        state.gap_end = min(article.published_datetime for article in articles)
+        logger.warning(f"Burst on {state.topic}: articles from {state.watermark} to {state.gap_end} left for the next poll")
+
+    elapsed = (now - state.last_poll).total_seconds() if state.last_poll else state.interval
+    observed_rate = arrived / elapsed if elapsed > 0 else 0.0
+    state.arrival_rate = POLL_RATE_SMOOTHING * observed_rate + (1 - POLL_RATE_SMOOTHING) * state.arrival_rate
+    state.interval = next_interval(state.arrival_rate, quota.min_interval(topics))
+    state.last_poll = now
+    state.next_poll = now + datetime.timedelta(seconds=state.interval)
+
+    save_watermark(state.topic, state.watermark, round(state.interval), state.arrival_rate)
+    logger.info(
+        f"Polled {state.topic}: {arrived} new articles, {state.arrival_rate * 3600:.1f}/h, "
+        f"next poll in {state.interval / 60:.0f} min ({quota.remaining()} requests left today)"
+    )
+
+
+def _sync_states(states: dict[str, TopicState], topics: list[TopicSettings]) -> None:
+    """Follow the registry: start tracking new intraday topics, forget the ones no longer polled."""
+    names = {topic.name for topic in topics}
+    for name in set(states) - names:
+        del states[name]
+
+    new = [name for name in names if name not in states]
+    if not new:
+        return
+    saved = load_watermarks(new)
+    now = datetime.datetime.now(datetime.timezone.utc)
+    for name in new:
+        if name in saved:
+            watermark, interval, rate = saved[name]
+            states[name] = TopicState(name, watermark, interval, rate, next_poll=now)
+        else:
+            states[name] = TopicState(name, now - datetime.timedelta(days=1), POLL_MIN_INTERVAL, 0.0, next_poll=now)
+
+
+def _poll_while_leader(lock: LeaderLock, scorers: Scorers, quota: DailyQuota) -> None:
+    registry = get_topic_registry()
+    states: dict[str, TopicState] = {}
+
+    while not lock.lost.is_set():
+        topics = {topic.name: topic for topic in registry.enabled(Cadence.INTRADAY)}
+        _sync_states(states, list(topics.values()))
+
+        now = datetime.datetime.now(datetime.timezone.utc)
+        for state in states.values():
+            if state.next_poll <= now:
+                try:
+                    poll_topic(state, topics[state.topic], scorers, registry, quota, len(states))
+                except Exception as e:
+                    logger.error(f"Polling {state.topic} failed: {e}")
+                    state.next_poll = now + datetime.timedelta(seconds=state.interval)
+
+        next_due = min((state.next_poll for state in states.values()), default=now + datetime.timedelta(seconds=SCHEDULER_POLL_SECONDS))
+        wait = (next_due - datetime.datetime.now(datetime.timezone.utc)).total_seconds()
+        time.sleep(min(max(wait, 1.0), SCHEDULER_POLL_SECONDS))
+
+
+def run_polling():
+    """
+    Poll every intraday topic of the registry continuously for articles newer than its watermark.
+
+    Each topic's interval adapts to its observed arrival rate (busy topics are polled
+    more often) and is stretched when the day's remaining request budget would not
+    cover it. Only one replica polls at a time, the others stand by on the lease.
+    """
+    lock = LeaderLock(get_redis_client(), "newsapi:poller", SCHEDULER_LEASE_SECONDS)
+    quota = DailyQuota(QuotaPlanner("poller"))
+
+    with Scorers() as scorers:
+        while True:
+            with lock.hold() as leader:
+                if leader:
+                    logger.info(f"Poller {lock.owner} is leading")
+                    _poll_while_leader(lock, scorers, quota)
+            time.sleep(SCHEDULER_POLL_SECONDS)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(
+            level=logging.INFO,
+            format="%(asctime)s - %(levelname)s - %(name)s - %(message)s",
+            datefmt="%Y-%m-%d %H:%M",
+            handlers=[
+                logging.FileHandler(LOGGING_LOCATION, mode='a'),
+                logging.StreamHandler(sys.stdout)
+            ]
+    )
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    run_polling()
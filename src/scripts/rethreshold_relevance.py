@@ -0,0 +1,66 @@
+import argparse
+import datetime
+import logging
+import sys
+
+from src.consts import LOGGING_LOCATION
+from src.libs.db_helpers import pooled_connection, refresh_rollups
+from src.libs.query_cache import publish_versions
+from src.libs.topic_registry import get_topic_registry
+
+logger = logging.getLogger(__name__)
+
+
+def rethreshold(topic: str, threshold: float) -> int:
+    """
+    Change the relevance threshold of a topic, for the articles to come and for those stored.
+
+    The stored articles are relabelled from their NLI and ABSA scores (see the rethreshold_relevance
+    SQL function), then the dashboard rollups and cached results of their days are refreshed.
+
+    Args:
+        topic: The topic, as named in the registry
+        threshold: Probability of the neutral NLI label from which an article is irrelevant
+
+    Returns:
+        The number of articles relabelled
+    """
+    with pooled_connection() as conn:
+        with conn.cursor() as cursor:
+            cursor.execute("UPDATE topics SET relevance_threshold = %s WHERE name = %s", (threshold, topic))
+            if cursor.rowcount == 0:
+                raise ValueError(f"Unknown topic: {topic}")
+            cursor.execute("SELECT * FROM rethreshold_relevance(%s, %s)", (topic, threshold))
+            relabelled, first, last = cursor.fetchone()
+        conn.commit()
+    get_topic_registry().reload()
+
+    logger.info(f"Relabelled {relabelled} articles of {topic} at threshold {threshold}")
+    if relabelled:
+        # Whole UTC days, the buckets of the daily rollup
+        utc = datetime.timezone.utc
+        start = datetime.datetime.combine(first.astimezone(utc).date(), datetime.time.min, tzinfo=utc)
+        end = datetime.datetime.combine(last.astimezone(utc).date(), datetime.time.min, tzinfo=utc) + datetime.timedelta(days=1)
+        refresh_rollups(start, end)
+        publish_versions(start + datetime.timedelta(days=i) for i in range((end - start).days))
+    return relabelled
+
+
+if __name__ == "__main__":
+    logging.basicConfig(
+            level=logging.INFO,
+            format="%(asctime)s - %(levelname)s - %(name)s - %(message)s",
+            datefmt="%Y-%m-%d %H:%M",
+            handlers=[
+                logging.FileHandler(LOGGING_LOCATION, mode='a'),
+                logging.StreamHandler(sys.stdout)
+            ]
+    )
+
+    parser = argparse.ArgumentParser(description="Re-apply a topic's relevance threshold to its stored model scores")
+    parser.add_argument('--topic', required=True, help="Topic to change")
+    parser.add_argument('--threshold', type=float, required=True,
+                        help="Neutral NLI probability from which an article is irrelevant, between 0 and 1")
+    args = parser.parse_args()
+
+    rethreshold(args.topic, args.threshold)
@@ -1,21 +1,98 @@
+import datetime
 import logging
+import random
 import sys
-
-import schedule
 import time
+from typing import Callable
 
-from src.consts import LOGGING_LOCATION
-from src.scripts.full_job import job
+from src.consts import (
+    LOGGING_LOCATION,
+    SCHEDULER_JITTER_SECONDS,
+    SCHEDULER_LEASE_SECONDS,
+    SCHEDULER_MAX_CATCH_UP_DAYS,
+    SCHEDULER_POLL_SECONDS,
+    SCHEDULER_RETRY_SECONDS,
+    SCHEDULER_RUN_TIME,
+)
+from src.libs.db_helpers import last_successful_run, record_run
+from src.libs.leader import LeaderLock
+from src.libs.redis_helpers import get_redis_client
+from src.scripts.full_job import RunStatus, enqueue_job, job
 
 logger = logging.getLogger(__name__)
 
 
-def run_schedule():
-    schedule.every().day.at("00:05").do(job)
+def due_run_dates(last_success: datetime.date | None, now: datetime.datetime, jitter: datetime.timedelta) -> list[datetime.date]:
+    """
+    List the run dates that should have happened by ``now`` but never succeeded.
+
+    Args:
+        last_success: The latest successful run date, None if the job never ran
+        now: The current local time
+        jitter: This replica's delay after SCHEDULER_RUN_TIME
+
+    Returns:
+        The missed run dates, oldest first, at most SCHEDULER_MAX_CATCH_UP_DAYS of them
+    """
+    latest_due = now.date()
+    if now < datetime.datetime.combine(latest_due, SCHEDULER_RUN_TIME) + jitter:
+        latest_due -= datetime.timedelta(days=1)
+
+    if last_success is None:
+        return [latest_due]
+
+    first_missed = max(last_success + datetime.timedelta(days=1), latest_due - datetime.timedelta(days=SCHEDULER_MAX_CATCH_UP_DAYS - 1))
+    return [first_missed + datetime.timedelta(days=offset) for offset in range((latest_due - first_missed).days + 1)]
+
+
+def run_due(job_name: str, job_to_run: Callable[[datetime.date], RunStatus], lock: LeaderLock, jitter: datetime.timedelta) -> bool:
+    """Run every missed date of the job if this replica can take the leader lease; False if a run failed.
+
+    A partial run (see full_job.RunPages) counts as done: its missing pages are not worth retrying.
+    """
+    with lock.hold() as leader:
+        if not leader:
+            logger.debug(f"Another replica holds {lock.name}")
+            return True
+
+        # Read after taking the lease, so a run finished by the previous leader isn't repeated
+        for run_date in due_run_dates(last_successful_run(job_name), datetime.datetime.now(), jitter):
+            if lock.lost.is_set():
+                return True
+            logger.info(f"Running {job_name} for {run_date} as {lock.owner}")
+            record_run(job_name, run_date, "running", lock.owner)
+            status = job_to_run(run_date)
+            record_run(job_name, run_date, status.value)
+            if status is RunStatus.FAILED:
+                # Retried later rather than skipped, so catch-up stays in date order; only its failed pages are requested again
+                return False
+    return True
+
+
+def run_schedule(distributed: bool = False):
+    """
+    Run the daily job forever, safely from any number of replicas.
+
+    Replicas compete for a Redis lease: only the leader runs, missed days since the last
+    successful run are caught up, and a run still in progress keeps its lease renewed so
+    it never overlaps with the next one. Each replica starts its day at SCHEDULER_RUN_TIME
+    plus a random jitter and polls at jittered intervals.
+    """
+    # In distributed mode this node only scrapes, the scoring happens on the workers
+    job_to_run = enqueue_job if distributed else job
+    job_name = job_to_run.__name__
+    lock = LeaderLock(get_redis_client(), f"newsapi:scheduler:{job_name}", SCHEDULER_LEASE_SECONDS)
+    jitter = datetime.timedelta(seconds=random.uniform(0, SCHEDULER_JITTER_SECONDS))
+    logger.info(f"Scheduler {lock.owner} started, running {job_name} daily at {SCHEDULER_RUN_TIME} + {jitter}")
 
     while True:
-        schedule.run_pending()
-        time.sleep(60)  # wait one minute
+        try:
+            succeeded = run_due(job_name, job_to_run, lock, jitter)
+        except Exception as e:
+            logger.error(e)
+            succeeded = False
+        delay = SCHEDULER_POLL_SECONDS if succeeded else SCHEDULER_RETRY_SECONDS
+        time.sleep(delay * random.uniform(0.5, 1.5))
 
 
 if __name__ == "__main__":
@@ -30,4 +107,4 @@ if __name__ == "__main__":
     )
     logging.getLogger("httpx").setLevel(logging.WARNING)
 
-    run_schedule()
\ No newline at end of file
+    run_schedule()
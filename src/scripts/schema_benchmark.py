@@ -0,0 +1,149 @@
+import argparse
+import logging
+import statistics
+import sys
+import time
+
+from src.consts import LOGGING_LOCATION
+from src.libs.db_helpers import get_db_connection
+from src.scripts.storage_benchmark import report
+
+logger = logging.getLogger(__name__)
+
+# The same sample of articles in the former layout (text topic, source and sentiment) and in the stored one
+LAYOUTS = {
+    "text": {
+        "create": """
+            CREATE TEMP TABLE bench_articles AS
+            SELECT id, published_at, topic, source_name, sentiment, title, url
+            FROM sample WITH NO DATA
+        """,
+        "load": """
+            INSERT INTO bench_articles
+            SELECT * FROM sample
+        """,
+        "indexes": [
+            "CREATE INDEX ON bench_articles (topic, published_at DESC)",
+            "CREATE INDEX ON bench_articles (sentiment)",
+        ],
+        "topic": "topic = %(topic)s",
+        "queries": {
+            "topic breakdown": """
+                SELECT topic, sentiment, COUNT(*) FROM bench_articles
+                WHERE sentiment IN ('positive', 'negative', 'neutral')
+                GROUP BY topic, sentiment
+            """,
+        },
+    },
+    "normalized": {
+        "create": """
+            CREATE TEMP TABLE bench_articles AS
+            SELECT a.id, a.published_at, a.topic_id, a.source_id, a.sentiment, a.title, a.url
+            FROM articles a WITH NO DATA
+        """,
+        "load": """
+            INSERT INTO bench_articles
+            SELECT sample.id, sample.published_at, t.id, s.id, sample.sentiment::sentiment, sample.title, sample.url
+            FROM sample
+            JOIN article_topics t ON t.name = sample.topic
+            LEFT JOIN article_sources s ON s.name = sample.source_name
+        """,
+        "indexes": [
+            "CREATE INDEX ON bench_articles (topic_id, published_at DESC)",
+            "CREATE INDEX ON bench_articles (published_at DESC) WHERE sentiment IN ('unknown', 'invalid')",
+        ],
+        "topic": "topic_id = (SELECT id FROM article_topics WHERE name = %(topic)s)",
+        "queries": {
+            "topic breakdown": """
+                SELECT t.name, b.sentiment, COUNT(*) FROM bench_articles b
+                JOIN article_topics t ON t.id = b.topic_id
+                WHERE b.sentiment IN ('positive', 'negative', 'neutral')
+                GROUP BY t.name, b.sentiment
+            """,
+        },
+    },
+}
+
+
+def _queries(layout: dict) -> dict[str, str]:
+    return {
+        "topic count": f"SELECT COUNT(*) FROM bench_articles WHERE {layout['topic']}",
+        "unscored lookup": """
+            SELECT id, published_at FROM bench_articles
+            WHERE sentiment IN ('unknown', 'invalid')
+            ORDER BY published_at DESC LIMIT 500
+        """,
+        **layout["queries"],
+    }
+
+
+def measure(conn, layout: dict, topic: str, runs: int) -> dict[str, float]:
+    """Size, load time and median query times of the sample in one layout."""
+    with conn.cursor() as cursor:
+        cursor.execute("DROP TABLE IF EXISTS bench_articles")
+        cursor.execute(layout["create"])
+        began = time.perf_counter()
+        cursor.execute(layout["load"])
+        results = {"load (ms)": (time.perf_counter() - began) * 1000}
+        for index in layout["indexes"]:
+            cursor.execute(index)
+        cursor.execute("ANALYZE bench_articles")
+
+        cursor.execute("""
+            SELECT AVG(pg_column_size(b.*)), pg_table_size('bench_articles'), pg_indexes_size('bench_articles')
+            FROM bench_articles b
+        """)
+        row_size, table, indexes = cursor.fetchone()
+        mb = 1024 * 1024
+        results.update({
+            "average row (bytes)": float(row_size or 0),
+            "table (MB)": table / mb,
+            "indexes (MB)": indexes / mb,
+        })
+
+        for name, query in _queries(layout).items():
+            timings = []
+            for _ in range(runs):
+                began = time.perf_counter()
+                cursor.execute(query, {"topic": topic})
+                cursor.fetchall()
+                timings.append((time.perf_counter() - began) * 1000)
+            results[f"{name} (ms)"] = statistics.median(timings)
+    return results
+
+
+if __name__ == "__main__":
+    logging.basicConfig(
+            level=logging.INFO,
+            format="%(asctime)s - %(levelname)s - %(name)s - %(message)s",
+            datefmt="%Y-%m-%d %H:%M",
+            handlers=[
+                logging.FileHandler(LOGGING_LOCATION, mode='a'),
+                logging.StreamHandler(sys.stdout)
+            ]
+    )
+
+    parser = argparse.ArgumentParser(
+        description="Compare text topic, source and sentiment columns with dimension ids and the sentiment enum"
+    )
+    parser.add_argument('--topic', required=True, help="Topic filtered by the queries")
+    parser.add_argument('--sample', type=int, default=100_000, help="Latest articles copied into each layout")
+    parser.add_argument('--runs', type=int, default=5, help="Runs of each query, the median is reported")
+    args = parser.parse_args()
+
+    connection = get_db_connection()
+    connection.autocommit = True
+    try:
+        with connection.cursor() as cursor:
+            logger.info(f"Sampling the latest {args.sample} articles")
+            cursor.execute("""
+                CREATE TEMP TABLE sample AS
+                SELECT id, published_at, topic, source_name, sentiment, title, url
+                FROM articles_named ORDER BY published_at DESC LIMIT %s
+            """, (args.sample,))
+        before = measure(connection, LAYOUTS["text"], args.topic, args.runs)
+        after = measure(connection, LAYOUTS["normalized"], args.topic, args.runs)
+    finally:
+        connection.close()
+
+    print(report(before, after))
@@ -0,0 +1,140 @@
+import argparse
+import datetime
+import logging
+import statistics
+import sys
+import time
+
+from src.consts import ARTICLES_COMPRESS_AFTER, ARTICLES_TEXT_TIER_AFTER, LOGGING_LOCATION
+from src.libs.db_helpers import get_db_connection
+from src.scripts.configure_storage import configure_storage
+
+logger = logging.getLogger(__name__)
+
+# Representative reads, each over (start, end) and, when it takes one, the topic
+QUERIES = {
+    "topic sentiment counts": """
+        SELECT sentiment, COUNT(*) FROM articles
+        WHERE topic_id = (SELECT id FROM article_topics WHERE name = %(topic)s)
+            AND published_at >= %(start)s AND published_at < %(end)s
+        GROUP BY sentiment
+    """,
+    "explorer first page": """
+        SELECT id, published_at, title, description FROM articles
+        WHERE published_at >= %(start)s AND published_at < %(end)s
+        ORDER BY published_at DESC, id DESC
+        LIMIT 50
+    """,
+    "full-text search count": """
+        SELECT COUNT(*) FROM articles
+        WHERE search_vector @@ websearch_to_tsquery('english', %(topic)s)
+            AND published_at >= %(start)s AND published_at < %(end)s
+    """,
+}
+
+
+def _sizes(cursor) -> dict[str, float]:
+    cursor.execute("SELECT table_bytes, index_bytes, toast_bytes, total_bytes FROM hypertable_detailed_size('articles')")
+    table, index, toast, total = (value or 0 for value in cursor.fetchone())
+    cursor.execute("SELECT COALESCE(hypertable_size('articles_text_archive'), 0)")
+    archive = cursor.fetchone()[0]
+    cursor.execute("""
+        SELECT COUNT(*) FILTER (WHERE is_compressed), COUNT(*)
+        FROM timescaledb_information.chunks WHERE hypertable_name = 'articles'
+    """)
+    compressed, chunks = cursor.fetchone()
+    mb = 1024 * 1024
+    return {
+        "articles total (MB)": total / mb,
+        "articles heap (MB)": table / mb,
+        "articles indexes (MB)": index / mb,
+        "articles toast (MB)": toast / mb,
+        "text archive (MB)": archive / mb,
+        "compressed chunks": compressed,
+        "chunks": chunks,
+    }
+
+
+def _ranges(cursor) -> dict[str, tuple[datetime.datetime, datetime.datetime]]:
+    cursor.execute("SELECT MIN(published_at), MAX(published_at) FROM articles")
+    first, last = cursor.fetchone()
+    month = datetime.timedelta(days=30)
+    return {"oldest month": (first, first + month), "latest month": (last - month, last + datetime.timedelta(seconds=1))}
+
+
+def measure(conn, topic: str, runs: int) -> dict[str, float]:
+    """Disk usage of the articles and the median time of each query over the oldest and the latest month."""
+    with conn.cursor() as cursor:
+        results = _sizes(cursor)
+        for range_name, (start, end) in _ranges(cursor).items():
+            for query_name, query in QUERIES.items():
+                timings = []
+                for _ in range(runs):
+                    began = time.perf_counter()
+                    cursor.execute(query, {"topic": topic, "start": start, "end": end})
+                    cursor.fetchall()
+                    timings.append((time.perf_counter() - began) * 1000)
+                results[f"{query_name}, {range_name} (ms)"] = statistics.median(timings)
+    return results
+
+
+def apply(conn) -> None:
+    """Apply the storage settings, then tier and compress the eligible chunks now instead of waiting for the jobs."""
+    configure_storage()
+    with conn.cursor() as cursor:
+        if ARTICLES_TEXT_TIER_AFTER:
+            logger.info(f"Archiving the text of articles older than {ARTICLES_TEXT_TIER_AFTER}")
+            cursor.execute(
+                "CALL tier_article_text(NULL, jsonb_build_object('older_than', %s))", (ARTICLES_TEXT_TIER_AFTER,)
+            )
+        logger.info(f"Compressing the articles chunks older than {ARTICLES_COMPRESS_AFTER}")
+        cursor.execute(
+            "SELECT compress_chunk(chunk, if_not_compressed => true) "
+            "FROM show_chunks('articles', older_than => %s::INTERVAL) chunk",
+            (ARTICLES_COMPRESS_AFTER,),
+        )
+        cursor.execute("VACUUM ANALYZE articles")
+
+
+def report(before: dict[str, float], after: dict[str, float] | None = None) -> str:
+    width = max(len(name) for name in before)
+    lines = [f"{'':<{width}}  {'before':>12}" + (f"  {'after':>12}  {'change':>8}" if after else "")]
+    for name, value in before.items():
+        line = f"{name:<{width}}  {value:>12,.1f}"
+        if after:
+            change = f"{(after[name] - value) / value:+.0%}" if value else ""
+            line += f"  {after[name]:>12,.1f}  {change:>8}"
+        lines.append(line)
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(
+            level=logging.INFO,
+            format="%(asctime)s - %(levelname)s - %(name)s - %(message)s",
+            datefmt="%Y-%m-%d %H:%M",
+            handlers=[
+                logging.FileHandler(LOGGING_LOCATION, mode='a'),
+                logging.StreamHandler(sys.stdout)
+            ]
+    )
+
+    parser = argparse.ArgumentParser(description="Disk usage and query times of the articles hypertable")
+    parser.add_argument('--topic', required=True, help="Topic filtered and searched by the queries")
+    parser.add_argument('--runs', type=int, default=5, help="Runs of each query, the median is reported")
+    parser.add_argument('--apply', action='store_true',
+                        help="Apply the storage settings and compress the eligible chunks, then measure again")
+    args = parser.parse_args()
+
+    connection = get_db_connection()
+    connection.autocommit = True
+    try:
+        before = measure(connection, args.topic, args.runs)
+        after = None
+        if args.apply:
+            apply(connection)
+            after = measure(connection, args.topic, args.runs)
+    finally:
+        connection.close()
+
+    print(report(before, after))
@@ -0,0 +1,100 @@
+import argparse
+import datetime
+import json
+import logging
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+logger = logging.getLogger(__name__)
+
+
+class StubNewsApi:
+    """Just enough of NewsAPI's /v2/everything to exercise API key rotation locally.
+
+    Every key in ``keys`` may make ``quota`` requests, after which it gets NewsAPI's
+    429 rateLimited answer; unknown keys get 401 apiKeyInvalid. Point the scraper at it
+    with NEWS_API_URL=http://localhost:<port>/v2/everything and NEWS_API_KEYS set to
+    some of the keys (add a wrong one to see it rejected).
+    """
+
+    def __init__(self, keys: list[str], quota: int, articles: int):
+        self.keys = set(keys)
+        self.quota = quota
+        self.articles = articles
+        self.used: dict[str, int] = {key: 0 for key in keys}
+        self._lock = threading.Lock()
+
+    def answer(self, query: dict[str, list[str]]) -> tuple[int, dict]:
+        key = query.get("apiKey", [""])[0]
+        if key not in self.keys:
+            return 401, {"status": "error", "code": "apiKeyInvalid", "message": "Your API key is invalid or incorrect."}
+
+        with self._lock:
+            if self.used[key] >= self.quota:
+                return 429, {
+                    "status": "error",
+                    "code": "rateLimited",
+                    "message": f"You have made too many requests recently ({self.quota} allowed).",
+                }
+            self.used[key] += 1
+            logger.info(f"Key {key}: {self.used[key]}/{self.quota} requests")
+
+        topic = query.get("q", ["stub"])[0]
+        page = int(query.get("page", ["1"])[0])
+        published = datetime.datetime.now(datetime.timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+        articles = [
+            {
+                "source": {"id": None, "name": "Stub News"},
+                "author": "Stub",
+                "title": f"{topic} article {page}-{i}",
+                "description": f"A generated article about {topic}.",
+                "url": f"https://stub.local/{topic.replace(' ', '-')}/{page}/{i}",
+                "urlToImage": None,
+                "publishedAt": published,
+                "content": f"Generated content about {topic}.",
+            }
+            for i in range(self.articles)
+        ]
+        return 200, {"status": "ok", "totalResults": self.articles, "articles": articles}
+
+
+def make_server(port: int, stub: StubNewsApi) -> ThreadingHTTPServer:
+    """The stub's HTTP server, not started yet; port 0 picks a free one."""
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            url = urlparse(self.path)
+            if url.path != "/v2/everything":
+                status, body = 404, {"status": "error", "code": "notFound", "message": url.path}
+            else:
+                status, body = stub.answer(parse_qs(url.query))
+            payload = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, format, *args):
+            logger.debug(format % args)
+
+    return ThreadingHTTPServer(("localhost", port), Handler)
+
+
+def serve(port: int, stub: StubNewsApi) -> None:
+    server = make_server(port, stub)
+    logger.info(f"Stub NewsAPI listening on http://localhost:{server.server_port}/v2/everything")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s - %(name)s - %(message)s")
+
+    parser = argparse.ArgumentParser(description="Local stand-in for NewsAPI, to test API key exhaustion and failover")
+    parser.add_argument('--port', type=int, default=8081)
+    parser.add_argument('--keys', default="key-1,key-2", help="Comma-separated keys the stub accepts")
+    parser.add_argument('--quota', type=int, default=5, help="Requests each key may make before being rate limited")
+    parser.add_argument('--articles', type=int, default=3, help="Articles returned per request")
+    args = parser.parse_args()
+
+    serve(args.port, StubNewsApi(args.keys.split(","), args.quota, args.articles))
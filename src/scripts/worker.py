@@ -0,0 +1,96 @@
+import logging
+import multiprocessing
+import os
+import socket
+import sys
+
+import redis
+
+from src.consts import LOGGING_LOCATION
+from src.libs.models import ArticleBatch
+from src.libs.redis_helpers import get_redis_client
+from src.libs.topic_registry import TopicRegistry, get_topic_registry
+from src.libs.work_queue import RedisWorkQueue
+from src.scripts.modular.stages import Scorer, Scorers, check_relevance, persist, score_sentiment, to_work_items
+
+logger = logging.getLogger(__name__)
+
+
+def process_batch(batch: ArticleBatch, scorer: Scorer, registry: TopicRegistry | None = None) -> None:
+    """Score and persist a batch, returning only once its rows are committed."""
+    failed_before = scorer.writer.rows_failed
+
+    for item in to_work_items(batch.topic, batch.articles, scorer.ledger, batch.fanned_out):
+        if check_relevance(scorer.analyzer, item, scorer.ledger, registry) is None:
+            continue
+        persist(scorer.writer, score_sentiment(scorer.analyzer, item, scorer.ledger))
+
+    scorer.writer.flush()
+    if scorer.writer.rows_failed != failed_before:
+        raise RuntimeError("the DB writer dropped rows")
+
+
+def run_worker(consumer: str | None = None, client: redis.Redis | None = None) -> None:
+    """
+    Consume article batches from the work queue until interrupted.
+
+    A batch is acknowledged only after its rows are committed, so the batches of a
+    worker that dies are redelivered to another one; the processing ledger keeps
+    the articles it had already scored from being inferred twice.
+
+    Args:
+        consumer: Name of this worker in the consumer group, unique per process
+        client: The Redis client to use, get_redis_client() by default
+    """
+    consumer = consumer or f"{socket.gethostname()}-{os.getpid()}"
+    queue = RedisWorkQueue(client or get_redis_client())
+    registry = get_topic_registry()
+    logger.info(f"Worker {consumer} started")
+
+    # Each topic is scored by the analyzer the registry assigns it, loaded the first time it is needed
+    with Scorers() as scorers:
+        try:
+            while True:
+                work_once(queue, consumer, scorers, registry)
+        except KeyboardInterrupt:
+            logger.info(f"Worker {consumer} stopping")
+
+
+def work_once(queue: RedisWorkQueue, consumer: str, scorers: Scorers, registry: TopicRegistry) -> None:
+    """Claim the next batches and acknowledge each one once processed; failed ones are left for redelivery."""
+    for entry_id, batch in queue.claim(consumer):
+        try:
+            process_batch(batch, scorers(registry.analyzer_for(batch.topic)), registry)
+            queue.ack(entry_id)
+            logger.info(f"Worker {consumer} processed {len(batch.articles)} articles on {batch.topic}")
+        except Exception as e:
+            logger.error(f"Worker {consumer} failed batch {entry_id}, it will be redelivered: {e}")
+
+
+def run_workers(count: int) -> None:
+    """Run ``count`` worker processes on this node and wait for them."""
+    processes = [multiprocessing.Process(target=run_worker, name=f"worker-{i}") for i in range(count)]
+    for process in processes:
+        process.start()
+    try:
+        for process in processes:
+            process.join()
+    except KeyboardInterrupt:
+        # The children received the interrupt too and are flushing their writers
+        for process in processes:
+            process.join()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(
+            level=logging.INFO,
+            format="%(asctime)s - %(levelname)s - %(name)s - %(message)s",
+            datefmt="%Y-%m-%d %H:%M",
+            handlers=[
+                logging.FileHandler(LOGGING_LOCATION, mode='a'),
+                logging.StreamHandler(sys.stdout)
+            ]
+    )
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    run_worker()
@@ -0,0 +1,22 @@
+import os
+
+import psycopg2
+import pytest
+
+
+@pytest.fixture
+def db_connection():
+    """A connection to the POSTGRES_* database, rolled back after the test; the test is skipped without one."""
+    from src.libs.db_helpers import get_db_connection
+
+    if not os.getenv("POSTGRES_DB"):
+        pytest.skip("POSTGRES_DB is not set, no database to test against")
+    try:
+        conn = get_db_connection()
+    except psycopg2.OperationalError as e:
+        pytest.skip(f"Database unavailable: {e}")
+    try:
+        yield conn
+    finally:
+        conn.rollback()
+        conn.close()
@@ -0,0 +1,141 @@
+import datetime
+import threading
+import uuid
+
+import pytest
+
+from src.libs import http_client
+from src.libs.api_keys import ApiKeyPool, _key_id, _today
+from src.libs.quota import QuotaExhausted
+from src.scripts.modular import generate_one_time_data
+from src.scripts.stub_news_api import StubNewsApi, make_server
+
+
+class InMemoryKeyPool(ApiKeyPool):
+    """ApiKeyPool with its api_key_usage rows kept in memory."""
+
+    def _load_if_new_day(self) -> None:
+        self._day = _today()
+
+    def _reserve(self) -> tuple[str, int] | None:
+        now = datetime.datetime.now(datetime.timezone.utc)
+        available = [
+            state for state in self._states.values()
+            if state.requests < self.daily_quota and (state.cooldown_until is None or state.cooldown_until <= now)
+        ]
+        if not available:
+            return None
+        state = min(available, key=lambda s: s.requests)
+        return state.key_id, state.requests + 1
+
+    def _increment(self, state) -> int:
+        return state.requests + 1
+
+    def _save(self, state) -> None:
+        pass
+
+
+class CountingPlanner:
+    """QuotaPlanner.spend over a budget kept in memory."""
+
+    def __init__(self, budget: int):
+        self.budget = budget
+        self.spent = 0
+
+    def spend(self, requests: int = 1) -> None:
+        if self.spent + requests > self.budget:
+            raise QuotaExhausted(f"Daily request budget of {self.budget} spent")
+        self.spent += requests
+
+
+@pytest.fixture
+def stub_api(monkeypatch):
+    stub = StubNewsApi(["key-1", "key-2"], quota=5, articles=2)
+    server = make_server(0, stub)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    monkeypatch.setattr(generate_one_time_data, "URL", f"http://localhost:{server.server_port}/v2/everything")
+    yield stub
+    server.shutdown()
+    server.server_close()
+
+
+def test_rate_limited_key_fails_over_to_the_next(stub_api, monkeypatch):
+    pool = InMemoryKeyPool(["key-1", "key-2"])
+    monkeypatch.setattr(generate_one_time_data, "get_api_key_pool", lambda: pool)
+    # key-1 spent its quota elsewhere, the pool does not know it yet and hands it out first
+    stub_api.used["key-1"] = stub_api.quota
+
+    scraped = generate_one_time_data.scrape("stub", datetime.date.today())
+
+    assert len(scraped.articles) == 2
+    assert stub_api.used == {"key-1": stub_api.quota, "key-2": 1}
+    assert not pool.has_spare("key-2")
+
+    # key-1 is cooling down, so the next request goes straight to key-2
+    generate_one_time_data.scrape("stub", datetime.date.today())
+    assert stub_api.used == {"key-1": stub_api.quota, "key-2": 2}
+
+
+def test_every_attempt_is_charged_to_the_budget(stub_api, monkeypatch):
+    pool = InMemoryKeyPool(["key-1", "key-2"])
+    monkeypatch.setattr(generate_one_time_data, "get_api_key_pool", lambda: pool)
+    stub_api.used["key-1"] = stub_api.quota
+    planner = CountingPlanner(budget=10)
+
+    # The rate limited attempt on key-1 is a request too
+    generate_one_time_data.scrape("stub", datetime.date.today(), planner=planner)
+    assert planner.spent == 2
+
+
+def test_retries_stop_when_the_budget_runs_out(stub_api, monkeypatch):
+    pool = InMemoryKeyPool(["key-1"])
+    monkeypatch.setattr(generate_one_time_data, "get_api_key_pool", lambda: pool)
+    # A client of its own, as 429s slow down the shared one's rate
+    monkeypatch.setattr(generate_one_time_data, "_client", http_client.HttpClient(requests_per_second=1000))
+    monkeypatch.setattr(http_client, "HTTP_BACKOFF_BASE", 0.01)
+    stub_api.used["key-1"] = stub_api.quota
+    planner = CountingPlanner(budget=3)
+
+    # With no other key the rate limit is retried, each retry spending a request of the budget and of the key
+    with pytest.raises(QuotaExhausted):
+        generate_one_time_data.scrape("stub", datetime.date.today(), planner=planner)
+    assert planner.spent == 3
+    assert pool.usage() == {_key_id("key-1"): 3}
+
+
+@pytest.fixture
+def stored_keys(db_connection):
+    """Two fresh keys, with their api_key_usage rows removed after the test."""
+    keys = [f"test-key-{uuid.uuid4()}" for _ in range(2)]
+    yield keys
+    with db_connection.cursor() as cursor:
+        cursor.execute("DELETE FROM api_key_usage WHERE key_id = ANY(%s)", ([_key_id(key) for key in keys],))
+    db_connection.commit()
+
+
+def test_rate_limited_key_fails_over_in_the_database(stored_keys, db_connection, monkeypatch):
+    stub = StubNewsApi(stored_keys, quota=5, articles=2)
+    server = make_server(0, stub)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    monkeypatch.setattr(generate_one_time_data, "URL", f"http://localhost:{server.server_port}/v2/everything")
+    pool = ApiKeyPool(stored_keys)
+    monkeypatch.setattr(generate_one_time_data, "get_api_key_pool", lambda: pool)
+    # Both keys are unused: the query breaks the tie on the fingerprint, make that key the spent one
+    spent, spare = sorted(stored_keys, key=_key_id)
+    stub.used[spent] = stub.quota
+
+    try:
+        generate_one_time_data.scrape("stub", datetime.date.today())
+        generate_one_time_data.scrape("stub", datetime.date.today())
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    assert stub.used == {spent: stub.quota, spare: 2}
+    with db_connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT key_id, requests, cooldown_until IS NOT NULL FROM api_key_usage WHERE key_id = ANY(%s)",
+            ([_key_id(key) for key in stored_keys],),
+        )
+        usage = {key_id: (requests, cooling) for key_id, requests, cooling in cursor.fetchall()}
+    assert usage == {_key_id(spent): (1, True), _key_id(spare): (2, False)}
@@ -0,0 +1,69 @@
+import datetime
+import json
+
+from visual.database import query_builder as queries
+
+TOPIC = "chunk exclusion test"
+# A week apart or more, each day lands in a chunk of its own (ARTICLES_CHUNK_INTERVAL is 7 days)
+SEEDED_DAYS = [datetime.date(2001, 1, 1), datetime.date(2001, 2, 1), datetime.date(2001, 3, 1)]
+
+
+def scanned_chunks(plan: dict) -> set[str]:
+    """Names of the chunks an EXPLAIN (FORMAT JSON) plan reads."""
+    chunks = set()
+    relation = plan.get('Relation Name')
+    if relation and relation.startswith('_hyper_'):
+        chunks.add(relation)
+    for child in plan.get('Plans', []):
+        chunks |= scanned_chunks(child)
+    return chunks
+
+
+def _seed(cursor) -> None:
+    cursor.execute("INSERT INTO article_topics (name) VALUES (%s) RETURNING id", (TOPIC,))
+    topic_id = cursor.fetchone()[0]
+    for day in SEEDED_DAYS:
+        cursor.execute(
+            """
+                INSERT INTO articles (published_at, topic_id, sentiment, title, url)
+                VALUES (%s, %s, 'positive', 'Seeded article', %s)
+            """,
+            (datetime.datetime.combine(day, datetime.time(12), datetime.timezone.utc), topic_id, f"https://test.local/{day}"),
+        )
+
+
+def test_single_day_queries_skip_chunks(db_connection):
+    with db_connection.cursor() as cursor:
+        _seed(cursor)
+        cursor.execute("SELECT chunk_name, hypertable_name FROM timescaledb_information.chunks")
+        hypertable_of = dict(cursor.fetchall())
+        chunk_counts: dict[str, int] = {}
+        for hypertable in hypertable_of.values():
+            chunk_counts[hypertable] = chunk_counts.get(hypertable, 0) + 1
+        assert chunk_counts.get("articles", 0) >= len(SEEDED_DAYS)
+
+        start, end = queries.time_range(SEEDED_DAYS[1], SEEDED_DAYS[1])
+        statements = {
+            f'dashboard by {label.lower()}': queries.dashboard(start, end, [TOPIC], time_bucket, 10)
+            for label, time_bucket in queries.TIME_BUCKETS.items()
+        }
+        statements['source analysis'] = queries.source_analysis(start, end, [TOPIC], 10)
+        statements['article page'] = queries.article_page(start, end, [TOPIC])
+
+        failures = []
+        for name, (query, params) in statements.items():
+            cursor.execute(f"EXPLAIN (FORMAT JSON) {query}", params)
+            plan = cursor.fetchone()[0]
+            if isinstance(plan, str):
+                plan = json.loads(plan)
+
+            scanned: dict[str, int] = {}
+            for chunk in scanned_chunks(plan[0]['Plan']):
+                hypertable = hypertable_of.get(chunk)
+                if hypertable:
+                    scanned[hypertable] = scanned.get(hypertable, 0) + 1
+            for hypertable, count in scanned.items():
+                if chunk_counts[hypertable] > 1 and count >= chunk_counts[hypertable]:
+                    failures.append(f"{name} reads all {count} chunks of {hypertable}")
+
+    assert failures == []
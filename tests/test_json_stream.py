@@ -0,0 +1,50 @@
+import json
+
+import pytest
+
+from src.libs.local_helpers.json_stream import iter_array_items
+
+DOCUMENT = json.dumps({
+    "status": "ok",
+    "totalResults": 3.5e2,
+    "articles": [
+        {"title": "Quotes \"inside\", a back\\slash and a tab\t", "score": -0.25, "tags": ["a", "b"]},
+        {"title": "café \U0001f600", "nested": {"depth": {"values": [1, 2.5, -3e-2, 1E+3, 0]}}},
+        3.5e2,
+        -12,
+        0.125,
+        "plain string",
+        [],
+        {},
+        None,
+        True,
+        False,
+    ],
+    "trailing": {"ignored": [1, {"x": "y"}]},
+}, ensure_ascii=False)
+
+
+def _chunks(document: str | bytes, size: int) -> list:
+    return [document[start:start + size] for start in range(0, len(document), size)]
+
+
+@pytest.mark.parametrize("encoded", [False, True], ids=["str", "bytes"])
+def test_items_match_json_loads_at_every_chunk_size(encoded):
+    document = DOCUMENT.encode() if encoded else DOCUMENT
+    expected = json.loads(DOCUMENT)["articles"]
+
+    for size in range(1, len(document) + 1):
+        assert list(iter_array_items(_chunks(document, size), "articles")) == expected, f"chunk size {size}"
+
+
+@pytest.mark.parametrize("number", ["3", "3.5", "3.5e2", "-0.25", "1E+3", "12e-1"])
+def test_number_split_at_chunk_boundary(number):
+    document = f'{{"articles": [{number}, {number}]}}'
+
+    for size in range(1, len(document) + 1):
+        assert list(iter_array_items(_chunks(document, size), "articles")) == [json.loads(number)] * 2
+
+
+def test_truncated_stream_is_rejected():
+    with pytest.raises(ValueError):
+        list(iter_array_items(_chunks('{"articles": [1, 2', 1), "articles"))
@@ -0,0 +1,53 @@
+import datetime
+
+import psycopg2
+
+from src.libs import db_helpers
+from src.libs.db_helpers import RollupRefresher
+
+
+def _row(day: datetime.date) -> tuple:
+    return ("url-hash", datetime.datetime.combine(day, datetime.time(12), datetime.timezone.utc))
+
+
+def _utc(day: datetime.date) -> datetime.datetime:
+    return datetime.datetime.combine(day, datetime.time(), datetime.timezone.utc)
+
+
+def test_days_are_refreshed_once_per_run_of_days_then_published(monkeypatch):
+    calls = []
+    monkeypatch.setattr(db_helpers, "refresh_rollups", lambda start, end: calls.append(("refresh", start, end)))
+    monkeypatch.setattr(db_helpers, "publish_versions", lambda moments: calls.append(("publish", list(moments))))
+    march = [datetime.date(2026, 3, day) for day in (1, 2, 3, 7)]
+
+    with RollupRefresher(interval=None) as refresher:
+        for day in march:
+            refresher.record([_row(day), _row(day)])
+        # Flushes only record the days, nothing is refreshed before the refresher is closed
+        assert calls == []
+
+    assert calls == [
+        ("refresh", _utc(march[0]), _utc(datetime.date(2026, 3, 4))),
+        ("publish", [_utc(day) for day in march[:3]]),
+        ("refresh", _utc(march[3]), _utc(datetime.date(2026, 3, 8))),
+        ("publish", [_utc(march[3])]),
+    ]
+
+
+def test_days_whose_refresh_failed_are_kept_for_the_next_one(monkeypatch):
+    published = []
+    failures = [psycopg2.OperationalError("server closed the connection unexpectedly")]
+
+    def refresh_rollups(start, end):
+        if failures:
+            raise failures.pop()
+
+    monkeypatch.setattr(db_helpers, "refresh_rollups", refresh_rollups)
+    monkeypatch.setattr(db_helpers, "publish_versions", lambda moments: published.extend(moments))
+    refresher = RollupRefresher(interval=None)
+    refresher.record([_row(datetime.date(2026, 3, 1))])
+
+    refresher.refresh()
+    assert published == []
+    refresher.refresh()
+    assert published == [_utc(datetime.date(2026, 3, 1))]
@@ -0,0 +1,100 @@
+import datetime
+
+import fakeredis
+import pytest
+
+from src.consts import SCHEDULER_MAX_PAGE_ATTEMPTS, TypesOfSA
+from src.libs.models import ParsedArticleList
+from src.libs.quota import PageRequest, QuotaExhausted, QuotaPlan
+from src.libs.topic_registry import Cadence, TopicSettings
+from src.scripts import full_job
+from src.scripts.full_job import RunStatus, enqueue_job
+from src.scripts.modular.generate_one_time_data import NewsApiError
+
+RUN_DATE = datetime.date(2026, 3, 2)
+TOPICS = ["electric cars", "solar power", "wind farms"]
+
+
+class Planner:
+    """QuotaPlanner planning page 1 of every topic, with its deferred pages kept in memory."""
+
+    def __init__(self, consumer: str):
+        self.consumer = consumer
+        self.deferred: list[PageRequest] = []
+
+    def plan(self, day, topics, priorities=None) -> QuotaPlan:
+        return QuotaPlan(requests=[PageRequest(topic, day) for topic in topics])
+
+    def observe(self, topic, total_results) -> None:
+        pass
+
+    def defer(self, requests) -> None:
+        self.deferred.extend(requests)
+
+
+class Registry:
+    def enabled(self, cadence):
+        return [TopicSettings(topic, topic, Cadence.DAILY, 1.0, TypesOfSA.ABSA, None, True) for topic in TOPICS]
+
+
+class NewsApi:
+    """scrape() answering with the error queued for a topic, if any, and an empty page otherwise."""
+
+    def __init__(self):
+        self.errors: dict[str, list[Exception]] = {}
+        self.requested: list[str] = []
+
+    def scrape(self, topic, date_given, page=1, planner=None) -> ParsedArticleList:
+        self.requested.append(topic)
+        if self.errors.get(topic):
+            raise self.errors[topic].pop(0)
+        return ParsedArticleList(status="ok", totalResults=0, articles=[])
+
+
+@pytest.fixture
+def news_api(monkeypatch):
+    api = NewsApi()
+    stored: dict[tuple, list] = {}
+    monkeypatch.setattr(full_job, "load_failed_pages", lambda job_name, run_date: list(stored.get((job_name, run_date), [])))
+    monkeypatch.setattr(full_job, "save_failed_pages", lambda job_name, run_date, pages: stored.__setitem__((job_name, run_date), pages))
+    monkeypatch.setattr(full_job, "QuotaPlanner", Planner)
+    monkeypatch.setattr(full_job, "get_topic_registry", Registry)
+    monkeypatch.setattr(full_job, "get_redis_client", lambda: fakeredis.FakeRedis(decode_responses=True))
+    monkeypatch.setattr(full_job, "PACKED_QUERIES", False)
+    monkeypatch.setattr(full_job, "scrape", api.scrape)
+    return api
+
+
+def _server_error() -> NewsApiError:
+    return NewsApiError(500, '{"status": "error", "code": "unexpectedError", "message": "Try again later"}')
+
+
+def test_retried_run_only_requests_the_failed_pages(news_api):
+    news_api.errors["solar power"] = [_server_error()]
+
+    assert enqueue_job(RUN_DATE) is RunStatus.FAILED
+    news_api.requested.clear()
+    assert enqueue_job(RUN_DATE) is RunStatus.SUCCEEDED
+    assert news_api.requested == ["solar power"]
+
+
+def test_page_is_given_up_after_max_attempts(news_api):
+    news_api.errors["solar power"] = [_server_error() for _ in range(SCHEDULER_MAX_PAGE_ATTEMPTS)]
+
+    statuses = [enqueue_job(RUN_DATE) for _ in range(SCHEDULER_MAX_PAGE_ATTEMPTS)]
+
+    assert statuses == [RunStatus.FAILED] * (SCHEDULER_MAX_PAGE_ATTEMPTS - 1) + [RunStatus.PARTIAL]
+    news_api.requested.clear()
+    # The run is done: another attempt has nothing left to request, and stays partial
+    assert enqueue_job(RUN_DATE) is RunStatus.PARTIAL
+    assert news_api.requested == []
+
+
+def test_rejected_and_unbudgeted_pages_are_not_retried(news_api, monkeypatch):
+    planners = []
+    monkeypatch.setattr(full_job, "QuotaPlanner", lambda consumer: planners.append(Planner(consumer)) or planners[-1])
+    news_api.errors["electric cars"] = [NewsApiError(400, '{"status": "error", "code": "parameterInvalid", "message": "Bad query"}')]
+    news_api.errors["wind farms"] = [QuotaExhausted("Daily request budget of 100 spent")]
+
+    assert enqueue_job(RUN_DATE) is RunStatus.PARTIAL
+    assert planners[0].deferred == [PageRequest("wind farms", RUN_DATE)]
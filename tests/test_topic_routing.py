@@ -0,0 +1,90 @@
+import pytest
+
+from src.libs import db_helpers
+from src.libs.models import Article, Source
+from src.libs.sentiment_analysis.base import Scores, Sentiment, SentimentAnalyzer
+from src.libs.topic_routing import TopicRouter
+from src.scripts.modular.stages import check_relevance, persist, score_sentiment, to_work_items
+
+TOPICS = ["electric cars", "solar power"]
+
+
+class TopicAnalyzer(SentimentAnalyzer):
+    """Finds an article relevant to ``relevant_topic`` only, and positive."""
+    model_version = "test"
+
+    def __init__(self, relevant_topic: str):
+        super().__init__(relevant_topic)
+        self.relevant_topic = relevant_topic
+
+    def relevance_with_scores(self, context, topic, threshold=None):
+        return topic == self.relevant_topic, Scores()
+
+    def classify(self, context, topic):
+        return Sentiment.POSITIVE
+
+
+class ListWriter:
+    def __init__(self):
+        self.rows = []
+
+    def submit(self, row):
+        self.rows.append(row)
+
+
+def _article(title: str) -> Article:
+    return Article(
+        source=Source(id=None, name="Wire"),
+        author=None,
+        title=title,
+        description="More on the story.",
+        url="https://news.example/story",
+        urlToImage=None,
+        publishedAt="2026-03-02T10:00:00Z",
+        content="The full story.",
+    )
+
+
+@pytest.fixture
+def stored(monkeypatch):
+    """The rows insert_article_rows sends to the database, with topic names in place of their ids."""
+    statements = []
+    monkeypatch.setattr(db_helpers, "dimension_ids", lambda table, names: {name: name for name in names if name})
+    monkeypatch.setattr(db_helpers, "execute_values", lambda cursor, sql, rows: statements.append(rows))
+    return statements
+
+
+def _score_and_store(router: TopicRouter, article: Article, analyzer: SentimentAnalyzer, stored: list) -> list[tuple]:
+    routed, unmatched = router.route([article])
+    items = [item for topic, articles in routed.items() for item in to_work_items(topic, articles)]
+    items += [item for topic in router.topics for item in to_work_items(topic, unmatched, fanned_out=True)]
+
+    writer = ListWriter()
+    for item in items:
+        if check_relevance(analyzer, item) is not None:
+            persist(writer, score_sentiment(analyzer, item))
+    db_helpers.insert_article_rows(None, writer.rows)
+    return stored[0]
+
+
+def test_fan_out_copy_of_another_topic_is_not_stored(stored):
+    router = TopicRouter(TOPICS)
+    article = _article("A quiet week on the markets")
+
+    rows = _score_and_store(router, article, TopicAnalyzer("electric cars"), stored)
+
+    assert len(rows) == 1
+    assert rows[0][0] == "electric cars"
+    assert rows[0][9] == Sentiment.POSITIVE.value
+
+
+def test_article_about_two_topics_is_stored_for_each(stored):
+    router = TopicRouter(TOPICS)
+    article = _article("Electric cars charged by solar power")
+
+    rows = _score_and_store(router, article, TopicAnalyzer("solar power"), stored)
+
+    assert sorted((row[0], row[9]) for row in rows) == [
+        ("electric cars", Sentiment.UNKNOWN.value),
+        ("solar power", Sentiment.POSITIVE.value),
+    ]
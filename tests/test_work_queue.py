@@ -0,0 +1,177 @@
+import datetime
+import threading
+import time
+from contextlib import contextmanager
+
+import fakeredis
+import pytest
+
+from src.consts import WORK_DEAD_LETTER_STREAM
+from src.libs import db_writer
+from src.libs.db_writer import BackgroundDBWriter
+from src.libs.models import Article, ArticleBatch, Source
+from src.libs.sentiment_analysis.base import Sentiment, SentimentAnalyzer
+from src.libs.work_queue import RedisWorkQueue
+from src.scripts.modular.stages import Scorer
+from src.scripts.worker import work_once
+
+IDLE_MS = 50
+
+
+class PositiveAnalyzer(SentimentAnalyzer):
+    model_version = "test"
+
+    def classify(self, context, topic):
+        return Sentiment.POSITIVE
+
+
+class Registry:
+    def analyzer_for(self, topic):
+        return None
+
+    def relevance_threshold(self, topic):
+        return None
+
+
+class FakeConnection:
+    @contextmanager
+    def cursor(self):
+        yield None
+
+    def commit(self):
+        pass
+
+
+@pytest.fixture(autouse=True)
+def no_database(monkeypatch):
+    @contextmanager
+    def pooled_connection():
+        yield FakeConnection()
+    monkeypatch.setattr(db_writer, "pooled_connection", pooled_connection)
+
+
+@pytest.fixture
+def client():
+    return fakeredis.FakeRedis(decode_responses=True)
+
+
+def _queue(client, max_deliveries: int = 5) -> RedisWorkQueue:
+    return RedisWorkQueue(client, claim_idle_ms=IDLE_MS, max_deliveries=max_deliveries)
+
+
+def _batch(articles: int = 3) -> ArticleBatch:
+    return ArticleBatch(topic="electric cars", day=datetime.date(2026, 3, 2), articles=[
+        Article(
+            source=Source(id=None, name="Wire"),
+            author=None,
+            title=f"Electric cars story {i}",
+            description="More on the story.",
+            url=f"https://news.example/{i}",
+            urlToImage=None,
+            publishedAt="2026-03-02T10:00:00Z",
+            content="The full story.",
+        )
+        for i in range(articles)
+    ])
+
+
+def _scorer(write_batch) -> Scorer:
+    writer = BackgroundDBWriter(write_batch=write_batch, on_flush=None, flush_interval=0.05, max_retries=0)
+    writer.start()
+    return Scorer(PositiveAnalyzer("electric cars"), None, writer)
+
+
+def test_batch_of_a_dead_worker_is_redelivered_to_another(client):
+    queue = _queue(client)
+    entry_id = queue.enqueue(_batch())
+
+    # The first worker takes the batch and dies before acknowledging it
+    assert [claimed_id for claimed_id, _ in queue.claim("worker-1", block_ms=10)] == [entry_id]
+    assert queue.claim("worker-2", block_ms=10) == []
+
+    time.sleep(IDLE_MS / 1000 * 2)
+    committed = []
+    scorer = _scorer(lambda cursor, rows: committed.extend(rows))
+    work_once(queue, "worker-2", lambda kind: scorer, Registry())
+    scorer.writer.close()
+
+    assert len(committed) == 3
+    assert queue.pending() == 0
+
+
+def test_batch_is_dead_lettered_after_max_deliveries(client):
+    queue = _queue(client, max_deliveries=2)
+    entry_id = queue.enqueue(_batch())
+
+    for worker in ("worker-1", "worker-2"):
+        assert [claimed_id for claimed_id, _ in queue.claim(worker, block_ms=10)] == [entry_id]
+        time.sleep(IDLE_MS / 1000 * 2)
+
+    assert queue.claim("worker-3", block_ms=10) == []
+    assert queue.pending() == 0
+    dead = client.xrange(WORK_DEAD_LETTER_STREAM)
+    assert [fields["source_id"] for _, fields in dead] == [entry_id]
+
+
+def test_batch_is_acknowledged_only_after_its_rows_are_flushed(client):
+    queue = _queue(client)
+    queue.enqueue(_batch())
+    committed = []
+    acked_after = []
+    ack = queue.ack
+
+    def slow_write(cursor, rows):
+        time.sleep(0.2)
+        committed.extend(rows)
+
+    def recording_ack(entry_id):
+        acked_after.append(len(committed))
+        ack(entry_id)
+
+    queue.ack = recording_ack
+    scorer = _scorer(slow_write)
+    work_once(queue, "worker-1", lambda kind: scorer, Registry())
+    scorer.writer.close()
+
+    assert acked_after == [3]
+    assert queue.pending() == 0
+
+
+def test_batch_whose_rows_fail_stays_pending(client):
+    queue = _queue(client)
+    entry_id = queue.enqueue(_batch())
+
+    def failing_write(cursor, rows):
+        raise ValueError("value too long for type character varying(255)")
+
+    scorer = _scorer(failing_write)
+    work_once(queue, "worker-1", lambda kind: scorer, Registry())
+    scorer.writer.close()
+
+    assert queue.pending() == 1
+    time.sleep(IDLE_MS / 1000 * 2)
+    assert [claimed_id for claimed_id, _ in queue.claim("worker-2", block_ms=10)] == [entry_id]
+
+
+def test_workers_share_the_stream_without_duplicates(client):
+    queue = _queue(client)
+    entry_ids = {queue.enqueue(_batch(articles=1)) for _ in range(20)}
+    claimed = []
+    lock = threading.Lock()
+
+    def worker(name):
+        own = _queue(client)
+        while batches := own.claim(name, count=3, block_ms=10):
+            for claimed_id, _ in batches:
+                own.ack(claimed_id)
+                with lock:
+                    claimed.append(claimed_id)
+
+    threads = [threading.Thread(target=worker, args=(f"worker-{i}",)) for i in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(claimed) == sorted(entry_ids)
+    assert queue.pending() == 0
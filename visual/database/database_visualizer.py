@@ -14,8 +14,14 @@ from pathlib import Path
 # Add parent directory to path for imports
 sys.path.append(str(Path(__file__).parent.parent.parent))
 
-from src.libs.db_helpers import get_db_connection
-from src.consts import TOPICS
+from src.libs.db_helpers import get_db_connection, pooled_connection
+from src.libs.topic_registry import get_topic_registry
+from src.consts import QUERY_CACHE_HISTORY_TTL, QUERY_CACHE_OPEN_TTL, TOPICS
+from src.libs.query_cache import QueryCache
+
+import query_builder as queries
+from downsampling import downsample
+from query_builder import TIME_BUCKETS
 
 # Page Configuration
 st.set_page_config(
@@ -26,6 +32,20 @@ st.set_page_config(
 )
 
 # Constants
+# Points drawn per time series chart, about one every two pixels of a full-width chart
+CHART_MAX_POINTS = 600
+# Bars of the volume chart beyond which their values are not printed on them
+BAR_LABEL_MAX_POINTS = 60
+
+AUTO_BUCKET = 'Auto'
+
+REFRESH_INTERVALS = {
+    'Off': None,
+    '30 seconds': 30,
+    '1 minute': 60,
+    '5 minutes': 300
+}
+
 SENTIMENT_COLORS = {
     'positive': '#28a745',
     'negative': '#dc3545',
@@ -34,12 +54,6 @@ SENTIMENT_COLORS = {
     'invalid': '#e83e8c'
 }
 
-TIME_BUCKETS = {
-    'Day': '1 day',
-    'Week': '1 week',
-    'Month': '1 month'
-}
-
 
 # Database Query Functions (with caching)
 
@@ -75,204 +89,147 @@ def get_date_range():
         return today - timedelta(days=30), today
 
 
-@st.cache_data(ttl=300)
-def fetch_approval_rate_over_time(start_date, end_date, topics, time_bucket):
-    """
-    Fetch approval rate over time.
-    Approval rate = positive / (positive + negative + neutral) * 100
-    Excludes 'unknown' and 'invalid' sentiments.
-    """
+@st.cache_data(ttl=60)
+def fetch_topics():
+    """Get every topic of the registry, and the enabled ones."""
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-
-        query = """
-            SELECT
-                time_bucket(%s, published_at) AS time_bucket,
-                COUNT(*) AS total_articles,
-                SUM(CASE WHEN sentiment = 'positive' THEN 1 ELSE 0 END) AS positive_articles,
-                ROUND(100.0 * SUM(CASE WHEN sentiment = 'positive' THEN 1 ELSE 0 END) /
-                      NULLIF(SUM(CASE WHEN sentiment IN ('positive', 'negative', 'neutral') THEN 1 ELSE 0 END), 0), 2) AS approval_rate
-            FROM articles
-            WHERE published_at::date BETWEEN %s AND %s
-                AND topic = ANY(%s)
-                AND sentiment IN ('positive', 'negative', 'neutral')
-            GROUP BY time_bucket
-            ORDER BY time_bucket
-        """
-
-        cursor.execute(query, (time_bucket, start_date, end_date, topics))
-        results = cursor.fetchall()
-
-        cursor.close()
-        conn.close()
-
-        if results:
-            df = pd.DataFrame(results, columns=['time_bucket', 'total_articles', 'positive_articles', 'approval_rate'])
-            return df
-        else:
-            return pd.DataFrame()
-
+        registry = get_topic_registry()
+        return sorted(registry.snapshot()), [topic.name for topic in registry.enabled()]
     except Exception as e:
-        st.error(f"Error fetching approval rate data: {e}")
-        return pd.DataFrame()
+        st.error(f"Error fetching topics: {e}")
+        return TOPICS, TOPICS
 
 
-@st.cache_data(ttl=300)
-def fetch_sentiment_distribution(start_date, end_date, topics):
-    """Fetch sentiment distribution for positive, negative, and neutral sentiments only."""
-    try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
+DASHBOARD_COLUMNS = ['panel', 'time_bucket', 'label', 'sentiment', 'total', 'positive', 'approval_rate']
 
-        query = """
-            SELECT
-                sentiment,
-                COUNT(*) AS count
-            FROM articles
-            WHERE published_at::date BETWEEN %s AND %s
-                AND topic = ANY(%s)
-                AND sentiment IN ('positive', 'negative', 'neutral')
-            GROUP BY sentiment
-            ORDER BY count DESC
-        """
-
-        cursor.execute(query, (start_date, end_date, topics))
-        results = cursor.fetchall()
-
-        cursor.close()
-        conn.close()
-
-        if results:
-            df = pd.DataFrame(results, columns=['sentiment', 'count'])
-            return df
-        else:
-            return pd.DataFrame()
-
-    except Exception as e:
-        st.error(f"Error fetching sentiment distribution: {e}")
-        return pd.DataFrame()
-
-
-@st.cache_data(ttl=300)
-def fetch_topic_comparison(start_date, end_date):
-    """Compare approval rates across topics."""
-    try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
 
-        query = """
-            SELECT
-                topic,
-                COUNT(*) AS total_articles,
-                SUM(CASE WHEN sentiment = 'positive' THEN 1 ELSE 0 END) AS positive_articles,
-                ROUND(100.0 * SUM(CASE WHEN sentiment = 'positive' THEN 1 ELSE 0 END) /
-                      NULLIF(SUM(CASE WHEN sentiment IN ('positive', 'negative', 'neutral') THEN 1 ELSE 0 END), 0), 2) AS approval_rate
-            FROM articles
-            WHERE published_at::date BETWEEN %s AND %s
-                AND sentiment IN ('positive', 'negative', 'neutral')
-            GROUP BY topic
-            ORDER BY approval_rate DESC
-        """
+@st.cache_resource
+def get_query_cache():
+    """The Redis result cache shared by every dashboard process."""
+    return QueryCache()
 
-        cursor.execute(query, (start_date, end_date))
-        results = cursor.fetchall()
 
-        cursor.close()
-        conn.close()
+def run_query(query, params):
+    with pooled_connection() as conn:
+        with conn.cursor() as cursor:
+            cursor.execute(query, params)
+            return cursor.fetchall()
 
-        if results:
-            df = pd.DataFrame(results, columns=['topic', 'total_articles', 'positive_articles', 'approval_rate'])
-            return df
-        else:
-            return pd.DataFrame()
 
-    except Exception as e:
-        st.error(f"Error fetching topic comparison: {e}")
-        return pd.DataFrame()
+def fetch_dashboard_data(start_date, end_date, topics, time_bucket, limit, delta=False):
+    """
+    Fetch every panel of the dashboard through the shared query cache.
+
+    Closed buckets are read in one query whose result is kept until the ingest path
+    publishes new data for one of its days. The bucket still being filled is read in a
+    short-lived query of its own, and the source ranking, which cannot be merged from
+    two ranges, over the whole range.
+
+    With delta, the closed buckets and the source ranking of the previous call with the
+    same filters are reused from the session state: only the open bucket is queried,
+    plus the buckets that closed in between, when the source ranking is refreshed too.
+    They are dropped once new data is published for one of their days.
+
+    Returns a dict of DataFrames:
+    - approval: approval rate over time, approval rate = positive / (positive + negative + neutral) * 100
+    - volume: article volume over time
+    - sentiment: sentiment distribution
+    - topics: approval rates across all topics
+    - sources: top N sources with sentiment breakdown
+    Only positive, negative and neutral sentiments are counted.
+    """
+    start, end = queries.time_range(start_date, end_date)
+    open_start = min(max(queries.open_bucket_start(time_bucket), start), end)
+    live_ttl = QUERY_CACHE_OPEN_TTL if open_start < end else QUERY_CACHE_HISTORY_TTL
 
+    key = (start, end, tuple(topics), time_bucket, limit)
+    previous = st.session_state.get('dashboard_closed') if delta else None
+    if previous is not None and (previous['key'] != key or previous['open_start'] > open_start):
+        previous = None
 
-@st.cache_data(ttl=300)
-def fetch_article_volume_over_time(start_date, end_date, topics, time_bucket):
-    """Fetch article volume over time (positive, negative, neutral only)."""
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-
-        query = """
-            SELECT
-                time_bucket(%s, published_at) AS time_bucket,
-                COUNT(*) AS article_count
-            FROM articles
-            WHERE published_at::date BETWEEN %s AND %s
-                AND topic = ANY(%s)
-                AND sentiment IN ('positive', 'negative', 'neutral')
-            GROUP BY time_bucket
-            ORDER BY time_bucket
-        """
-
-        cursor.execute(query, (time_bucket, start_date, end_date, topics))
-        results = cursor.fetchall()
-
-        cursor.close()
-        conn.close()
-
-        if results:
-            df = pd.DataFrame(results, columns=['time_bucket', 'article_count'])
-            return df
+        cache = get_query_cache()
+        if previous is not None and previous['versions'] != cache.versions(start, previous['open_start']):
+            previous = None
+        # Read before the queries, so that data published while they run invalidates their result
+        versions = cache.versions(start, open_start)
+        if previous is None:
+            closed = []
+            if start < open_start:
+                closed = cache.fetch(
+                    *queries.dashboard(start, open_start, topics, time_bucket), start, open_start, run_query
+                )
+            sources = cache.fetch(*queries.source_analysis(start, end, topics, limit), start, end, run_query, ttl=live_ttl)
         else:
-            return pd.DataFrame()
-
+            closed, sources = previous['closed'], previous['sources']
+            if previous['open_start'] < open_start:
+                # The buckets that closed since the previous call
+                closed = closed + cache.fetch(
+                    *queries.dashboard(previous['open_start'], open_start, topics, time_bucket),
+                    previous['open_start'], open_start, run_query
+                )
+                sources = cache.fetch(
+                    *queries.source_analysis(start, end, topics, limit), start, end, run_query, ttl=live_ttl
+                )
+
+        live = []
+        if open_start < end:
+            live = cache.fetch(
+                *queries.dashboard(open_start, end, topics, time_bucket), open_start, end, run_query,
+                ttl=QUERY_CACHE_OPEN_TTL
+            )
+        st.session_state['dashboard_closed'] = {
+            'key': key, 'open_start': open_start, 'versions': versions, 'closed': closed, 'sources': sources
+        }
+        results = closed + live + sources
     except Exception as e:
-        st.error(f"Error fetching article volume: {e}")
-        return pd.DataFrame()
-
-
-@st.cache_data(ttl=300)
-def fetch_source_analysis(start_date, end_date, topics, limit):
-    """Fetch top N sources with sentiment breakdown (positive, negative, neutral only)."""
-    try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-
-        query = """
-            SELECT
-                source_name,
-                sentiment,
-                COUNT(*) AS count
-            FROM articles
-            WHERE published_at::date BETWEEN %s AND %s
-                AND topic = ANY(%s)
-                AND source_name IS NOT NULL
-                AND sentiment IN ('positive', 'negative', 'neutral')
-            GROUP BY source_name, sentiment
-            HAVING COUNT(*) >= 5
-            ORDER BY source_name, sentiment
-        """
-
-        cursor.execute(query, (start_date, end_date, topics))
-        results = cursor.fetchall()
-
-        cursor.close()
-        conn.close()
-
-        if results:
-            df = pd.DataFrame(results, columns=['source_name', 'sentiment', 'count'])
-
-            # Get top N sources by total article count
-            source_totals = df.groupby('source_name')['count'].sum().sort_values(ascending=False).head(limit)
-            top_sources = source_totals.index.tolist()
-
-            # Filter to only top sources
-            df = df[df['source_name'].isin(top_sources)]
+        st.error(f"Error fetching dashboard data: {e}")
+        results = []
+
+    df = pd.DataFrame(results, columns=DASHBOARD_COLUMNS)
+    df['time_bucket'] = pd.to_datetime(df['time_bucket'], utc=True).dt.tz_convert(queries.DASHBOARD_TIMEZONE)
+    df[['total', 'positive', 'approval_rate']] = df[['total', 'positive', 'approval_rate']].astype(float)
+
+    # A topic or sentiment has rows in both the closed and the open range, add them up
+    sources = df[df['panel'] == 'source']
+    df = (
+        df[df['panel'] != 'source']
+        .groupby(['panel', 'time_bucket', 'label', 'sentiment'], dropna=False)[['total', 'positive']]
+        .sum(min_count=1)
+        .reset_index()
+    )
+    df['approval_rate'] = (100 * df['positive'] / df['total']).round(2)
+    df = pd.concat([df, sources], ignore_index=True)
+    df['total'] = df['total'].astype(int)
+    panels = {panel: rows for panel, rows in df.groupby('panel')}
 
-            return df
-        else:
+    def panel(name, columns, renames, sort_by, ascending=True):
+        if name not in panels:
             return pd.DataFrame()
+        return (
+            panels[name]
+            .rename(columns=renames)[columns]
+            .sort_values(sort_by, ascending=ascending)
+            .reset_index(drop=True)
+        )
 
-    except Exception as e:
-        st.error(f"Error fetching source analysis: {e}")
-        return pd.DataFrame()
+    return {
+        'approval': panel(
+            'series', ['time_bucket', 'total_articles', 'positive_articles', 'approval_rate'],
+            {'total': 'total_articles', 'positive': 'positive_articles'}, 'time_bucket'
+        ),
+        'volume': panel('series', ['time_bucket', 'article_count'], {'total': 'article_count'}, 'time_bucket'),
+        'sentiment': panel('distribution', ['sentiment', 'count'], {'total': 'count'}, 'count', ascending=False),
+        'topics': panel(
+            'topic', ['topic', 'total_articles', 'positive_articles', 'approval_rate'],
+            {'label': 'topic', 'total': 'total_articles', 'positive': 'positive_articles'},
+            'approval_rate', ascending=False
+        ),
+        'sources': panel(
+            'source', ['source_name', 'sentiment', 'count'],
+            {'label': 'source_name', 'total': 'count'}, ['source_name', 'sentiment']
+        ),
+    }
 
 
 # Chart Creation Functions
@@ -390,7 +347,7 @@ def create_volume_chart(df, time_bucket):
         title=f'Article Volume Over Time (by {time_bucket})',
         color='article_count',
         color_continuous_scale='Blues',
-        text='article_count'
+        text='article_count' if len(df) <= BAR_LABEL_MAX_POINTS else None
     )
 
     fig.update_traces(textposition='outside')
@@ -473,11 +430,12 @@ def render_sidebar():
         start_date = end_date = date_range if not isinstance(date_range, tuple) else date_range[0]
 
     # Topic multi-select
+    all_topics, enabled_topics = fetch_topics()
     st.sidebar.subheader("Topics")
     selected_topics = st.sidebar.multiselect(
         "Select topics",
-        options=TOPICS,
-        default=TOPICS,
+        options=all_topics,
+        default=enabled_topics,
         key="topics"
     )
 
@@ -485,11 +443,16 @@ def render_sidebar():
     st.sidebar.subheader("Time Bucket")
     time_bucket_label = st.sidebar.selectbox(
         "Select aggregation period",
-        options=list(TIME_BUCKETS.keys()),
+        options=[AUTO_BUCKET] + list(TIME_BUCKETS.keys()),
         index=0,
-        key="time_bucket"
+        key="time_bucket",
+        help=f"{AUTO_BUCKET} picks the finest period drawing the date range in at most {CHART_MAX_POINTS} points"
     )
-    time_bucket = TIME_BUCKETS[time_bucket_label]
+    if time_bucket_label == AUTO_BUCKET:
+        time_bucket = queries.auto_bucket(start_date, end_date, CHART_MAX_POINTS)
+        time_bucket_label = next(label for label, bucket in TIME_BUCKETS.items() if bucket == time_bucket)
+    else:
+        time_bucket = TIME_BUCKETS[time_bucket_label]
 
     # Chart type toggle for sentiment distribution
     st.sidebar.subheader("Chart Options")
@@ -500,6 +463,13 @@ def render_sidebar():
         key="chart_type"
     )
 
+    downsample_series = st.sidebar.checkbox(
+        "Downsample long time series",
+        value=True,
+        key="downsample",
+        help=f"Draw at most {CHART_MAX_POINTS} points per chart, keeping peaks and dips (LTTB)"
+    )
+
     # Top N sources slider
     top_n_sources = st.sidebar.slider(
         "Top N sources to display",
@@ -510,6 +480,15 @@ def render_sidebar():
         key="top_n_sources"
     )
 
+    # Live refresh, only the latest bucket is queried again
+    st.sidebar.subheader("Live Refresh")
+    refresh_label = st.sidebar.selectbox(
+        "Refresh the charts every",
+        options=list(REFRESH_INTERVALS.keys()),
+        index=0,
+        key="refresh_interval"
+    )
+
     return {
         'start_date': start_date,
         'end_date': end_date,
@@ -517,7 +496,9 @@ def render_sidebar():
         'time_bucket': time_bucket,
         'time_bucket_label': time_bucket_label,
         'chart_type': chart_type,
-        'top_n_sources': top_n_sources
+        'downsample': downsample_series,
+        'top_n_sources': top_n_sources,
+        'refresh_seconds': REFRESH_INTERVALS[refresh_label]
     }
 
 
@@ -567,26 +548,37 @@ def render_main_dashboard():
         st.warning("Please select at least one topic from the sidebar.")
         return
 
-    # Fetch data
-    df_sentiment = fetch_sentiment_distribution(
-        filters['start_date'],
-        filters['end_date'],
-        filters['topics']
-    )
+    # Count full runs, to tell them apart from the live refreshes of the panels alone
+    st.session_state['full_runs'] = st.session_state.get('full_runs', 0) + 1
 
-    df_volume = fetch_article_volume_over_time(
-        filters['start_date'],
-        filters['end_date'],
-        filters['topics'],
-        filters['time_bucket']
-    )
+    if filters['refresh_seconds']:
+        st.fragment(run_every=filters['refresh_seconds'])(render_panels)(filters)
+    else:
+        render_panels(filters)
 
-    df_approval = fetch_approval_rate_over_time(
+
+def render_panels(filters):
+    """Render the metrics and charts, refreshed on their own in live mode."""
+    # Fetch data, only the latest bucket when the panels are refreshed on their own
+    delta = st.session_state.get('panels_run') == st.session_state['full_runs']
+    st.session_state['panels_run'] = st.session_state['full_runs']
+    data = fetch_dashboard_data(
         filters['start_date'],
         filters['end_date'],
         filters['topics'],
-        filters['time_bucket']
+        filters['time_bucket'],
+        filters['top_n_sources'],
+        delta=delta
     )
+    df_sentiment = data['sentiment']
+    df_volume = data['volume']
+    df_approval = data['approval']
+
+    # The metrics use the full series, the charts may get fewer points
+    df_volume_chart = df_volume
+    if filters['downsample']:
+        df_approval = downsample(df_approval, 'time_bucket', 'approval_rate', CHART_MAX_POINTS)
+        df_volume_chart = downsample(df_volume, 'time_bucket', 'article_count', CHART_MAX_POINTS)
 
     # Render metrics row
     st.markdown("---")
@@ -614,7 +606,7 @@ def render_main_dashboard():
 
     with col2:
         st.header("Topic Comparison")
-        df_topics = fetch_topic_comparison(filters['start_date'], filters['end_date'])
+        df_topics = data['topics']
         fig_topics = create_topic_comparison_chart(df_topics)
         if fig_topics:
             st.plotly_chart(fig_topics, width='stretch')
@@ -623,7 +615,7 @@ def render_main_dashboard():
 
     # Article Volume Over Time
     st.header("Article Volume Over Time")
-    fig_volume = create_volume_chart(df_volume, filters['time_bucket_label'])
+    fig_volume = create_volume_chart(df_volume_chart, filters['time_bucket_label'])
     if fig_volume:
         st.plotly_chart(fig_volume, width='stretch')
 
@@ -631,13 +623,8 @@ def render_main_dashboard():
 
     # Source Analysis (collapsible)
     with st.expander("Source Analysis", expanded=False):
-        st.markdown(f"Showing top {filters['top_n_sources']} sources with at least 5 articles.")
-        df_sources = fetch_source_analysis(
-            filters['start_date'],
-            filters['end_date'],
-            filters['topics'],
-            filters['top_n_sources']
-        )
+        st.markdown(f"Showing top {filters['top_n_sources']} sources with at least {queries.MIN_SOURCE_ARTICLES} articles.")
+        df_sources = data['sources']
         fig_sources = create_source_analysis_chart(df_sources)
         if fig_sources:
             st.plotly_chart(fig_sources, width='stretch')
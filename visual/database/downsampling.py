@@ -0,0 +1,62 @@
+"""
+Largest-Triangle-Three-Buckets (LTTB) downsampling of time series for the charts.
+
+LTTB keeps the first and last points and, for every bucket of points in between, the
+one forming the largest triangle with the point kept before it and the average of the
+next bucket. Peaks and dips survive, which evenly spaced sampling would drop.
+"""
+
+import numpy as np
+import pandas as pd
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """Positions of the points LTTB keeps out of ``len(x)``, at most ``threshold`` of them, in order."""
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    kept = np.empty(threshold, dtype=np.int64)
+    kept[0], kept[-1] = 0, n - 1
+    # The points between the first and the last, split into threshold - 2 buckets
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+
+    previous = 0
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+        next_start, next_end = end, edges[i + 2] if i + 2 < len(edges) else n
+        average_x = x[next_start:next_end].mean()
+        average_y = y[next_start:next_end].mean()
+
+        areas = np.abs(
+            (x[previous] - average_x) * (y[start:end] - y[previous])
+            - (x[previous] - x[start:end]) * (average_y - y[previous])
+        )
+        previous = start + int(np.argmax(areas))
+        kept[i + 1] = previous
+    return kept
+
+
+def downsample(df: pd.DataFrame, x: str, y: str, threshold: int) -> pd.DataFrame:
+    """
+    Keep at most ``threshold`` rows of a series sorted by ``x``, chosen by LTTB on ``y``.
+
+    Args:
+        df: The series, one row per point
+        x: Column of the x values, datetimes or numbers
+        y: Column of the plotted values
+        threshold: Number of rows to keep
+
+    Returns:
+        The kept rows, other columns included, or df itself if it is short enough
+    """
+    if len(df) <= threshold:
+        return df
+
+    x_values = df[x]
+    if pd.api.types.is_datetime64_any_dtype(x_values):
+        x_values = x_values.astype('int64')
+    x_values = x_values.to_numpy(dtype=float)
+    y_values = df[y].astype(float).fillna(0).to_numpy()
+
+    return df.iloc[lttb_indices(x_values, y_values, threshold)].reset_index(drop=True)
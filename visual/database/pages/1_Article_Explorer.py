@@ -0,0 +1,162 @@
+"""
+Article explorer: the articles behind the dashboard's aggregates.
+Full-text search with filters by date, topic, sentiment and source, browsed page by page.
+"""
+
+import streamlit as st
+import pandas as pd
+from datetime import datetime, timedelta
+import sys
+from pathlib import Path
+
+# Add the dashboard and project directories to path for imports
+sys.path.append(str(Path(__file__).parent.parent))
+sys.path.append(str(Path(__file__).parent.parent.parent.parent))
+
+from src.libs.db_helpers import pooled_connection
+from src.libs.topic_registry import get_topic_registry
+from src.consts import TOPICS
+
+import query_builder as queries
+from query_builder import EXPLORER_COLUMNS
+
+# Page Configuration
+st.set_page_config(
+    page_title="Article Explorer",
+    page_icon="🔎",
+    layout="wide",
+    initial_sidebar_state="expanded"
+)
+
+PAGE_SIZE = 50
+SENTIMENTS = ['positive', 'negative', 'neutral', 'unknown', 'invalid']
+
+
+def run_query(query, params):
+    with pooled_connection() as conn:
+        with conn.cursor() as cursor:
+            cursor.execute(query, params)
+            return cursor.fetchall()
+
+
+@st.cache_data(ttl=60)
+def fetch_topics():
+    """Get every topic of the registry."""
+    try:
+        return sorted(get_topic_registry().snapshot())
+    except Exception as e:
+        st.error(f"Error fetching topics: {e}")
+        return TOPICS
+
+
+@st.cache_data(ttl=300)
+def fetch_sources(start_date, end_date):
+    """Get the sources with articles between the dates."""
+    try:
+        return [row[0] for row in run_query(*queries.source_names(*queries.time_range(start_date, end_date)))]
+    except Exception as e:
+        st.error(f"Error fetching sources: {e}")
+        return []
+
+
+def fetch_page(filters, after):
+    """Fetch the page of articles following ``after``, plus whether another page follows it."""
+    start, end = queries.time_range(filters['start_date'], filters['end_date'])
+    try:
+        rows = run_query(*queries.article_page(
+            start,
+            end,
+            topics=filters['topics'],
+            sentiments=filters['sentiments'],
+            sources=filters['sources'],
+            search=filters['search'],
+            after=after,
+            page_size=PAGE_SIZE + 1
+        ))
+    except Exception as e:
+        st.error(f"Error fetching articles: {e}")
+        rows = []
+    return pd.DataFrame(rows[:PAGE_SIZE], columns=EXPLORER_COLUMNS), len(rows) > PAGE_SIZE
+
+
+def render_sidebar():
+    """Render sidebar with filters and return selected values."""
+    st.sidebar.header("Filters")
+
+    today = datetime.now().date()
+    date_range = st.sidebar.date_input(
+        "Published between",
+        value=(today - timedelta(days=7), today),
+        key="explorer_date_range"
+    )
+    if isinstance(date_range, tuple) and len(date_range) == 2:
+        start_date, end_date = date_range
+    else:
+        start_date = end_date = date_range if not isinstance(date_range, tuple) else date_range[0]
+
+    search = st.sidebar.text_input(
+        "Search title, description and content",
+        key="explorer_search",
+        help='Words must all appear; use "quotes" for phrases, or for alternatives, -word to exclude'
+    )
+    topics = st.sidebar.multiselect("Topics", options=fetch_topics(), key="explorer_topics")
+    sentiments = st.sidebar.multiselect("Sentiments", options=SENTIMENTS, key="explorer_sentiments")
+    sources = st.sidebar.multiselect("Sources", options=fetch_sources(start_date, end_date), key="explorer_sources")
+
+    return {
+        'start_date': start_date,
+        'end_date': end_date,
+        'search': search.strip(),
+        'topics': topics,
+        'sentiments': sentiments,
+        'sources': sources
+    }
+
+
+def render_explorer():
+    st.title("🔎 Article Explorer")
+    st.markdown("Browse the articles behind the dashboard, newest first.")
+
+    filters = render_sidebar()
+
+    # The (published_at, id) of the last article of every page before the current one
+    if st.session_state.get('explorer_filters') != filters:
+        st.session_state['explorer_filters'] = filters
+        st.session_state['explorer_cursors'] = []
+    cursors = st.session_state['explorer_cursors']
+
+    df, has_next = fetch_page(filters, cursors[-1] if cursors else None)
+
+    if df.empty:
+        st.info("No articles match the selected filters.")
+    else:
+        st.dataframe(
+            df.drop(columns=['id']),
+            column_config={
+                'published_at': st.column_config.DatetimeColumn("Published", format="YYYY-MM-DD HH:mm"),
+                'url': st.column_config.LinkColumn("Link", display_text="Open"),
+            },
+            hide_index=True,
+            width='stretch'
+        )
+
+    col1, col2, col3 = st.columns([1, 2, 1])
+    with col1:
+        if st.button("← Newer", disabled=not cursors):
+            cursors.pop()
+            st.rerun()
+    with col2:
+        st.markdown(f"Page {len(cursors) + 1}")
+    with col3:
+        if st.button("Older →", disabled=not has_next):
+            last = df.iloc[-1]
+            cursors.append((last['published_at'].to_pydatetime(), int(last['id'])))
+            st.rerun()
+
+
+if __name__ == "__main__":
+    try:
+        render_explorer()
+    except Exception as e:
+        st.error(f"An error occurred while rendering the explorer: {e}")
+        st.exception(e)
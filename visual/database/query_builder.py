@@ -0,0 +1,260 @@
+"""
+SQL for the dashboard, written so that TimescaleDB can prune chunks.
+
+Every time filter is a half-open range on the partitioning column itself
+(``bucket >= start AND bucket < end``), never a cast of it: a condition like
+``published_at::date BETWEEN ...`` hides the column from chunk exclusion and from
+idx_topic_time, and turns every render into a scan of every chunk. Date pickers give
+whole days, which are turned into midnights in DASHBOARD_TIMEZONE.
+tests/test_chunk_exclusion.py EXPLAINs the queries to check that they keep doing so.
+"""
+
+import os
+from datetime import date, datetime, time, timedelta
+from zoneinfo import ZoneInfo
+
+DASHBOARD_TIMEZONE = os.getenv("DASHBOARD_TIMEZONE", "UTC")
+
+TIME_BUCKETS = {
+    'Hour': '1 hour',
+    'Day': '1 day',
+    'Week': '1 week',
+    'Month': '1 month'
+}
+
+# Approximate length of each bucket, to count the points of a chart
+BUCKET_LENGTHS = {
+    '1 hour': timedelta(hours=1),
+    '1 day': timedelta(days=1),
+    '1 week': timedelta(weeks=1),
+    '1 month': timedelta(days=30)
+}
+
+# Continuous aggregates maintained by TimescaleDB (see services/timescale_db/init.sql)
+HOURLY_ROLLUP = 'articles_hourly'
+DAILY_ROLLUP = 'articles_daily'
+
+# Sentiments that count towards the approval rate, 'unknown' and 'invalid' are left out
+SCORED_SENTIMENTS = "sentiment IN ('positive', 'negative', 'neutral')"
+
+MIN_SOURCE_ARTICLES = 5
+
+
+def time_range(start_date: date, end_date: date, timezone: str = DASHBOARD_TIMEZONE) -> tuple[datetime, datetime]:
+    """Half-open bounds covering start_date to end_date included, as local midnights."""
+    tz = ZoneInfo(timezone)
+    return (
+        datetime.combine(start_date, time.min, tzinfo=tz),
+        datetime.combine(end_date + timedelta(days=1), time.min, tzinfo=tz),
+    )
+
+
+def auto_bucket(start_date: date, end_date: date, max_points: int) -> str:
+    """The finest of TIME_BUCKETS drawing start_date to end_date included in at most max_points points."""
+    span = end_date - start_date + timedelta(days=1)
+    for time_bucket in TIME_BUCKETS.values():
+        if span / BUCKET_LENGTHS[time_bucket] <= max_points:
+            return time_bucket
+    return TIME_BUCKETS['Month']
+
+
+def rollup_for(time_bucket: str | None = None, timezone: str = DASHBOARD_TIMEZONE) -> str:
+    """
+    Pick the coarsest rollup that can still be bucketed by time_bucket.
+
+    articles_daily is bucketed on UTC days, so local days of any other timezone are
+    summed from articles_hourly.
+    """
+    if time_bucket == TIME_BUCKETS['Hour'] or timezone != 'UTC':
+        return HOURLY_ROLLUP
+    return DAILY_ROLLUP
+
+
+def open_bucket_start(time_bucket: str, now: datetime | None = None, timezone: str = DASHBOARD_TIMEZONE) -> datetime:
+    """Start of the time_bucket still being filled, as time_bucket(time_bucket, now, timezone) computes it."""
+    tz = ZoneInfo(timezone)
+    local = (now or datetime.now(tz)).astimezone(tz)
+    if time_bucket == TIME_BUCKETS['Hour']:
+        return local.replace(minute=0, second=0, microsecond=0)
+
+    day = local.date()
+    if time_bucket == TIME_BUCKETS['Week']:
+        day -= timedelta(days=day.weekday())  # TimescaleDB weeks start on Mondays
+    elif time_bucket == TIME_BUCKETS['Month']:
+        day = day.replace(day=1)
+    return datetime.combine(day, time.min, tzinfo=tz)
+
+
+def _base(time_bucket, timezone):
+    return f"""
+        base AS MATERIALIZED (
+            SELECT
+                time_bucket(%s, r.bucket, %s) AS time_bucket,
+                t.name AS topic,
+                s.name AS source_name,
+                r.sentiment,
+                t.name = ANY(%s) AS selected,
+                SUM(r.article_count) AS article_count
+            FROM {rollup_for(time_bucket, timezone)} r
+            JOIN article_topics t ON t.id = r.topic_id
+            LEFT JOIN article_sources s ON s.id = r.source_id
+            WHERE r.bucket >= %s AND r.bucket < %s
+                AND {SCORED_SENTIMENTS}
+            GROUP BY 1, 2, 3, 4
+        )"""
+
+
+_SOURCE_CTES = """
+        per_sentiment AS (
+            SELECT source_name, sentiment, SUM(article_count) AS total
+            FROM base
+            WHERE selected AND source_name IS NOT NULL
+            GROUP BY source_name, sentiment
+            HAVING SUM(article_count) >= %s
+        ),
+        ranked AS (
+            SELECT *, DENSE_RANK() OVER (ORDER BY source_total DESC, source_name) AS source_rank
+            FROM (
+                SELECT *, SUM(total) OVER (PARTITION BY source_name) AS source_total
+                FROM per_sentiment
+            ) totals
+        )"""
+
+_SOURCE_SELECT = """
+        SELECT 'source', NULL::TIMESTAMPTZ, source_name, sentiment, total, NULL::NUMERIC, NULL::NUMERIC
+        FROM ranked
+        WHERE source_rank <= %s"""
+
+
+def dashboard(start, end, topics, time_bucket, limit=None, timezone=DASHBOARD_TIMEZONE):
+    """
+    Every panel of the dashboard over [start, end) in one statement.
+
+    The rollup rows of the range are read once into ``base``, and each panel is a CTE
+    over it. Rows come back as (panel, time_bucket, label, sentiment, total, positive,
+    approval_rate), with the columns a panel does not use left NULL:
+
+    - series: total and positive articles per time_bucket, for the selected topics
+    - distribution: articles per sentiment, for the selected topics
+    - topic: total and positive articles per topic (label), for every topic
+    - source: articles per source (label) and sentiment, for the ``limit`` sources with
+      the most articles among the selected topics; left out when limit is None, since
+      the ranking of two ranges cannot be merged (see source_analysis)
+
+    Use time_range() for bounds of whole days.
+    """
+    with_sources = limit is not None
+    query = f"""
+        WITH {_base(time_bucket, timezone)},
+        series AS (
+            SELECT
+                time_bucket,
+                SUM(article_count) AS total,
+                COALESCE(SUM(article_count) FILTER (WHERE sentiment = 'positive'), 0) AS positive
+            FROM base
+            WHERE selected
+            GROUP BY time_bucket
+        ),
+        distribution AS (
+            SELECT sentiment, SUM(article_count) AS total
+            FROM base
+            WHERE selected
+            GROUP BY sentiment
+        ),
+        topics AS (
+            SELECT
+                topic,
+                SUM(article_count) AS total,
+                COALESCE(SUM(article_count) FILTER (WHERE sentiment = 'positive'), 0) AS positive
+            FROM base
+            GROUP BY topic
+        ){"," + _SOURCE_CTES if with_sources else ""}
+        SELECT 'series', time_bucket, NULL, NULL, total, positive,
+               ROUND(100.0 * positive / NULLIF(total, 0), 2)
+        FROM series
+        UNION ALL
+        SELECT 'distribution', NULL, NULL, sentiment, total, NULL, NULL
+        FROM distribution
+        UNION ALL
+        SELECT 'topic', NULL, topic, NULL, total, positive,
+               ROUND(100.0 * positive / NULLIF(total, 0), 2)
+        FROM topics
+        {"UNION ALL" + _SOURCE_SELECT if with_sources else ""}
+    """
+    params = (time_bucket, timezone, list(topics), start, end)
+    if with_sources:
+        params += (MIN_SOURCE_ARTICLES, limit)
+    return query, params
+
+
+def source_analysis(start, end, topics, limit, timezone=DASHBOARD_TIMEZONE):
+    """Only the source panel of dashboard() over [start, end)."""
+    query = f"""
+        WITH {_base(TIME_BUCKETS['Day'], timezone)},{_SOURCE_CTES}
+        {_SOURCE_SELECT}
+    """
+    return query, (TIME_BUCKETS['Day'], timezone, list(topics), start, end, MIN_SOURCE_ARTICLES, limit)
+
+
+# Article explorer
+
+EXPLORER_COLUMNS = ['id', 'published_at', 'topic', 'source_name', 'sentiment', 'title', 'description', 'url']
+
+
+def article_page(start, end, topics=None, sentiments=None, sources=None, search=None, after=None, page_size=50):
+    """
+    One page of the articles matching the filters, newest first.
+
+    Pages are read by keyset (seek) pagination: ``after`` is the (published_at, id) of
+    the last article of the previous page, so a deep page costs as much as the first one
+    instead of scanning every row an OFFSET would skip. ``search`` is matched against
+    title, description and content in websearch syntax ("quoted phrase", or, -excluded).
+    """
+    conditions = ["published_at >= %s", "published_at < %s"]
+    params = [start, end]
+    if topics:
+        conditions.append("topic_id = ANY(ARRAY(SELECT id FROM article_topics WHERE name = ANY(%s)))")
+        params.append(list(topics))
+    if sentiments:
+        conditions.append("sentiment = ANY(%s::sentiment[])")
+        params.append(list(sentiments))
+    if sources:
+        conditions.append("source_id = ANY(ARRAY(SELECT id FROM article_sources WHERE name = ANY(%s)))")
+        params.append(list(sources))
+    if search:
+        conditions.append("search_vector @@ websearch_to_tsquery('english', %s)")
+        params.append(search)
+    if after is not None:
+        conditions.append("(published_at, id) < (%s, %s)")
+        params.extend(after)
+
+    # The description of old articles may have been moved to articles_text_archive (see tier_article_text)
+    query = f"""
+        SELECT
+            page.id, page.published_at, topic.name, source.name, page.sentiment, page.title,
+            COALESCE(page.description, archive.description) AS description, page.url
+        FROM (
+            SELECT id, published_at, topic_id, source_id, sentiment, title, description, url
+            FROM articles
+            WHERE {'''
+                AND '''.join(conditions)}
+            ORDER BY published_at DESC, id DESC
+            LIMIT %s
+        ) page
+        JOIN article_topics topic ON topic.id = page.topic_id
+        LEFT JOIN article_sources source ON source.id = page.source_id
+        LEFT JOIN articles_text_archive archive ON archive.id = page.id AND archive.published_at = page.published_at
+        ORDER BY page.published_at DESC, page.id DESC
+    """
+    return query, (*params, page_size)
+
+
+def source_names(start, end):
+    """The sources with articles in [start, end), read from the daily rollup."""
+    query = f"""
+        SELECT name
+        FROM article_sources
+        WHERE id IN (SELECT source_id FROM {DAILY_ROLLUP} WHERE bucket >= %s AND bucket < %s)
+        ORDER BY name
+    """
+    return query, (start, end)
@@ -79,7 +79,7 @@ def run_sentiment_analysis(analyzer_class, topic: str, tests: List[Test]) -> Lis
 
     for test in tests:
         try:
-            prediction = analyzer.sentiment_analysis(test.input.model_dump())
+            prediction = analyzer.sentiment_analysis(test.input)
             predictions.append(prediction)
         except Exception as e:
             st.error(f"Error analyzing article: {e}")